@@ -0,0 +1,92 @@
+# Benchmark: vault health audit of a 20k-entry vault
+#
+#   python benchmarks/bench_audit.py [rows]
+#
+# Fills a scratch vault with `rows` entries (a mix of random, word-based and
+# reused passwords), runs a full audit in-process and with the process pool,
+# then edits 1% of the entries and times the incremental re-audit, and the
+# health report read that the Health view does.
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+WORDS = ["dragon", "sunshine", "monkey", "letmein", "football", "shadow", "orbit", "velvet", "crane"]
+
+
+def passwords(rows, rng):
+    for _ in range(rows):
+        kind = rng.random()
+        if kind < 0.5:
+            yield "".join(rng.choice(string.ascii_letters + string.digits + "!#$%") for _ in range(rng.randint(10, 18)))
+        elif kind < 0.9:
+            yield rng.choice(WORDS).capitalize() + str(rng.randint(0, 9999))
+        else:
+            yield rng.choice(WORDS) + "123"
+
+
+def fill(rows, rng):
+    from core.crypto import get_cipher, current_key_version
+
+    version = current_key_version()
+    sealed = get_cipher().seal_many(passwords(rows, rng))
+    db.insert_password_entries([
+        (f"Site {i}", f"user{i}", f"https://site{i}.example", token, "", None, None, 0, version, data_key, None)
+        for i, (token, data_key) in enumerate(sealed)
+    ])
+
+
+def audit(label, workers):
+    from core.audit import run_audit
+
+    start = time.perf_counter()
+    stats = run_audit(workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"{label:24} {stats['audited']:6} rows in {elapsed:6.2f} s ({stats['audited'] / max(elapsed, 1e-9):8.0f} rows/s)")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from cryptography.fernet import Fernet
+        from core import keys
+        from core.audit import health_report
+        from core.crypto import seal_password, set_vault_key
+        os.chdir(tmp)  # keep clear of a legacy vault.key in the checkout
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+        set_vault_key(Fernet.generate_key())
+        keys.recalibrate(50)
+        keys.enroll("bench", "bench")
+        fill(rows, rng)
+
+        audit("full, in-process", 0)
+        db.clear_audit()
+        audit(f"full, {os.cpu_count() or 1} workers", os.cpu_count() or 1)
+        audit("nothing changed", None)
+
+        edited = rng.sample(range(1, rows + 1), rows // 100)
+        for entry_id in edited:
+            token, data_key, version = seal_password(next(passwords(1, rng)))
+            db.update_password_details(entry_id, f"Site {entry_id}", "", "", token, "", None, version, data_key)
+        audit(f"{len(edited)} edited", None)
+
+        start = time.perf_counter()
+        summary, issues = health_report()
+        elapsed = time.perf_counter() - start
+        print(f"\nhealth report read      {elapsed * 1e3:6.1f} ms, {len(issues)} issues")
+        print("  " + ", ".join(f"{k} {v}" for k, v in summary.items()))
+
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
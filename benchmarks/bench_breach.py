@@ -0,0 +1,82 @@
+# Benchmark: offline breached-password lookups
+#
+#   python benchmarks/bench_breach.py [hashes]
+#
+# Writes a synthetic Pwned Passwords style dump of `hashes` random SHA-1s
+# (plus a few known passwords), compiles it with build_corpus, then times
+# opening the corpus, lookups that hit and that miss (with how many misses
+# the Bloom filter stopped), and, for comparison, loading the dump into a
+# Python set and its memory.
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.breach import BreachCorpus, build_corpus, password_hash
+
+KNOWN = ["password", "123456", "qwerty", "letmein", "dragon"]
+
+
+def write_dump(path, hashes, rng):
+    with open(path, "w") as f:
+        for password in KNOWN:
+            f.write(f"{hashlib.sha1(password.encode()).hexdigest().upper()}:{rng.randint(1000, 10 ** 6)}\n")
+        for _ in range(hashes):
+            f.write(f"{rng.getrandbits(160):040X}:{rng.randint(1, 500)}\n")
+
+
+def per_lookup(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main():
+    hashes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.txt")
+        dst = os.path.join(tmp, "breaches.bin")
+        write_dump(dump, hashes, rng)
+
+        start = time.perf_counter()
+        written = build_corpus(dump, dst)
+        elapsed = time.perf_counter() - start
+        print(f"build             {written} hashes in {elapsed:6.2f} s ({written / elapsed:8.0f}/s)")
+        print(f"sizes             dump {os.path.getsize(dump) / 2 ** 20:7.1f} MiB, "
+              f"corpus {os.path.getsize(dst) / 2 ** 20:7.1f} MiB")
+
+        start = time.perf_counter()
+        corpus = BreachCorpus(dst)
+        print(f"open              {(time.perf_counter() - start) * 1e6:8.1f} us")
+
+        with open(dump) as f:
+            present = [bytes.fromhex(line[:40]) for _, line in zip(range(50_000), f)]
+        absent = [password_hash(f"not-breached-{i}") for i in range(50_000)]
+        print(f"lookup, hit       {per_lookup(corpus.seen, present) * 1e6:8.2f} us")
+        print(f"lookup, miss      {per_lookup(corpus.seen, absent) * 1e6:8.2f} us")
+        stopped = sum(not corpus.might_contain(d[:corpus.width]) for d in absent)
+        print(f"Bloom filter      stopped {stopped / len(absent):6.1%} of misses")
+        for password in KNOWN:
+            assert corpus.check(password), password
+        corpus.close()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(dump) as f:
+            loaded = {line[:40] for line in f}
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"\nPython set        {len(loaded)} hashes loaded in {elapsed:6.2f} s, {size / 2 ** 20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
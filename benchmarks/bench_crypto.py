@@ -0,0 +1,48 @@
+# Benchmark: per-entry encryption vs the cached cipher's batch API
+#
+#   python benchmarks/bench_crypto.py [sizes...]
+#
+# Compares the old per-call path (a new Fernet for every entry) with
+# Cipher.encrypt_many/decrypt_many in-process and across a process pool,
+# for 1k, 10k and 100k payloads by default.
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    workers = os.cpu_count() or 1
+
+    from core.crypto import get_cipher
+    key = Fernet.generate_key()
+    cipher = get_cipher(key)
+
+    print(f"{'entries':>8} {'op':8} {'per-call':>12} {'many':>12} {'pool x' + str(workers):>12}   (entries/s)")
+    for size in sizes:
+        payloads = [f"password-{i:08d}-Aa1!" for i in range(size)]
+        tokens = list(cipher.encrypt_many(payloads))
+
+        per_call = rate(size, lambda: [Fernet(key).encrypt(p.encode()).decode() for p in payloads])
+        many = rate(size, lambda: list(cipher.encrypt_many(payloads)))
+        pooled = rate(size, lambda: list(cipher.encrypt_many(payloads, workers=workers)))
+        print(f"{size:8} {'encrypt':8} {per_call:12.0f} {many:12.0f} {pooled:12.0f}")
+
+        per_call = rate(size, lambda: [Fernet(key).decrypt(t.encode()).decode() for t in tokens])
+        many = rate(size, lambda: list(cipher.decrypt_many(tokens)))
+        pooled = rate(size, lambda: list(cipher.decrypt_many(tokens, workers=workers)))
+        print(f"{size:8} {'decrypt':8} {per_call:12.0f} {many:12.0f} {pooled:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Benchmark: OTP email delivery against a local SMTP sink
+#
+#   python benchmarks/bench_emailer.py [messages] [connect delay in ms]
+#
+# Sends `messages` OTP emails to the sink in smtp_sink.py, which waits
+# `connect delay` on every new connection like a relay doing STARTTLS and
+# login. Times one connection per message (what send_otp_email used to do,
+# on the GUI thread) against the mailer queue on one kept session, with how
+# long queueing takes the caller; then the queue again with the sink dropping
+# the connection every 10 messages and refusing the first 3 with a 451, to
+# show the reconnects and retries.
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import emailer
+from core.emailer import SENT, Mailer, SmtpConfig, otp_message
+from smtp_sink import SmtpSink
+
+
+def per_message(sink, messages):
+    start = time.perf_counter()
+    for i in range(messages):
+        with smtplib.SMTP("127.0.0.1", sink.port) as server:
+            server.send_message(otp_message(f"user{i}@example.com", "123456", "vault@example.com"))
+    return time.perf_counter() - start
+
+
+def queued(sink, messages):
+    mailer = Mailer(SmtpConfig("127.0.0.1", sink.port, "none", sender="vault@example.com"))
+    mailer.start()
+    start = time.perf_counter()
+    deliveries = [mailer.submit(otp_message(f"user{i}@example.com", "123456", "vault@example.com"),
+                                f"user{i}@example.com") for i in range(messages)]
+    queueing = time.perf_counter() - start
+    for delivery in deliveries:
+        delivery.wait()
+    elapsed = time.perf_counter() - start
+    mailer.stop()
+    sent = sum(d.status == SENT for d in deliveries)
+    retried = sum(d.attempts > 1 for d in deliveries)
+    return elapsed, queueing, sent, retried, mailer.connections
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    emailer.RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4)
+
+    sink = SmtpSink(connect_delay=delay).start()
+    elapsed = per_message(sink, messages)
+    print(f"connection per message  {messages / elapsed:8.1f} msg/s, {elapsed / messages * 1e3:7.2f} ms blocked per send")
+
+    elapsed, queueing, sent, _retried, connections = queued(sink, messages)
+    print(f"queue, kept session     {messages / elapsed:8.1f} msg/s, {queueing / messages * 1e3:7.2f} ms blocked per send, "
+          f"{sent} sent over {connections} connection(s)")
+    assert len(sink.messages) == 2 * messages
+    sink.stop()
+
+    sink = SmtpSink(connect_delay=delay, drop_every=10, fail_first=3).start()
+    elapsed, queueing, sent, retried, connections = queued(sink, messages)
+    print(f"queue, flaky sink       {messages / elapsed:8.1f} msg/s, {sent} sent, {retried} retried, "
+          f"{connections} connections")
+    sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Benchmark: key changes with per-entry data keys vs direct encryption
+#
+#   python benchmarks/bench_envelope.py [rows]
+#
+# Fills a scratch vault with `rows` entries encrypted directly under the vault
+# key (the layout before data keys) and compares:
+#   * re-encrypting every password under a new key, as a rotation had to
+#   * the one-off move of those entries to data keys (core.rotation)
+#   * a rotation afterwards, which only re-wraps the data keys
+#   * a master password change, which only re-wraps the user's keyring
+#   * opening a single entry
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+
+def fill(rows):
+    from core.crypto import get_cipher
+
+    tokens = get_cipher().encrypt_many(f"password-{i}" for i in range(rows))
+    db.insert_password_entries([
+        (f"Site {i}", f"user{i}", f"https://site{i}.example", token, "", None, None, 0, 1, None, None)
+        for i, token in enumerate(tokens)
+    ])
+
+
+def report(label, touched, elapsed):
+    rate = f"({touched / elapsed:8.0f} rows/s)" if touched > 1 else ""
+    print(f"{label:34} {touched:6} rows in {elapsed * 1000:9.1f} ms  {rate}")
+
+
+def direct_rotation():
+    # What rotating cost before data keys: every password re-encrypted
+    from cryptography.fernet import Fernet
+    from core.crypto import Cipher, get_cipher
+
+    source, target = get_cipher(), Cipher(Fernet.generate_key())
+    start = time.perf_counter()
+    c = db.get_connection().cursor()
+    rows = c.execute("SELECT id, password FROM passwords").fetchall()
+    tokens = source.reencrypt_many((row[1] for row in rows), target)
+    with db.transaction() as c:
+        # Written back unchanged in value so the vault stays readable
+        c.executemany("UPDATE passwords SET password = ? WHERE id = ?",
+                      [(row[1], row[0]) for row, _token in zip(rows, tokens)])
+    report("re-encrypt passwords (before)", len(rows), time.perf_counter() - start)
+
+
+def rotation(label):
+    from core import rotation
+
+    start = time.perf_counter()
+    rotation.begin_rotation()
+    stats = rotation.run_rotation(workers=0)
+    elapsed = time.perf_counter() - start
+    result = rotation.verify_rotation()
+    assert not result["failed"] and not result["stale"], result
+    report(label, stats["rotated"] + stats["migrated"], elapsed)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from cryptography.fernet import Fernet
+        from core import keys
+        from core.crypto import open_password, set_vault_key
+        os.chdir(tmp)  # keep clear of a legacy vault.key in the checkout
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+        set_vault_key(Fernet.generate_key())
+        keys.recalibrate(50)
+        keys.enroll("bench", "bench")
+        with db.transaction() as c:
+            c.execute("INSERT INTO master_password (username, password_hash) VALUES ('bench', '')")
+        fill(rows)
+
+        direct_rotation()
+        rotation("move to data keys (one-off)")
+        rotation("rotate vault key (after)")
+
+        start = time.perf_counter()
+        keys.change_master_password("bench", "bench", "new master password")
+        report("change master password", 1, time.perf_counter() - start)
+
+        row = db.fetch_password_entry(rows // 2)
+        start = time.perf_counter()
+        open_password(row[3], row[8], row[7])
+        report("open one entry", 1, time.perf_counter() - start)
+
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
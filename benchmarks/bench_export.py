@@ -0,0 +1,70 @@
+# Benchmark: streaming encrypted export of a 40k-entry vault
+#
+#   python benchmarks/bench_export.py [rows]
+#
+# Exports with core.exporter.export_archive and export_csv, verifies the
+# archive, and reports throughput and peak traced memory.
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+
+def seed(rows):
+    from core.crypto import encrypt_password
+
+    with db.transaction() as c:
+        c.executemany(
+            "INSERT INTO passwords (name, email, url, password, notes) VALUES (?, ?, ?, ?, ?)",
+            ((f"Site {i}", f"user{i}@example.com", f"https://site{i}.example",
+              encrypt_password(f"pw-{i:08d}-secret"), "note " * (i % 6)) for i in range(rows))
+        )
+
+
+def timed(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:16} {elapsed:6.2f} s  peak {peak / 1024 / 1024:5.1f} MiB")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from cryptography.fernet import Fernet
+        from core.crypto import set_vault_key
+        set_vault_key(Fernet.generate_key())
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+        seed(rows)
+
+        from core import exporter
+
+        archive = os.path.join(tmp, "export.vltx")
+        stats = timed("export_archive", lambda: exporter.export_archive(archive, "benchmark passphrase"))
+        print(f"  {stats['exported']} entries, {stats['bytes_written'] / 1e6:.1f} MB, {stats['rate']:.0f} entries/s (after KDF)")
+
+        entries, size, seconds = timed("verify_archive", lambda: exporter.verify_archive(archive, "benchmark passphrase"))
+        print(f"  {entries} entries, {size / 1e6 / seconds:.1f} MB/s including KDF")
+
+        count = timed("read_archive", lambda: sum(1 for _ in exporter.read_archive(archive, "benchmark passphrase")))
+        print(f"  {count} entries")
+
+        stats = timed("export_csv", lambda: exporter.export_csv(os.path.join(tmp, "export.csv")))
+        print(f"  {stats['exported']} entries, {stats['rate']:.0f} entries/s")
+
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
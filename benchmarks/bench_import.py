@@ -0,0 +1,87 @@
+# Benchmark: bulk import of a 40k-entry export
+#
+#   python benchmarks/bench_import.py [rows]
+#
+# Writes a Bitwarden-style CSV and JSON export of `rows` entries, imports each
+# with core.importer.import_file in-process and with the process pool, and
+# reports throughput and peak traced memory (which should not grow with rows).
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+FOLDERS = ["Work", "Personal", "Shared", "Finance", "Games", ""]
+
+
+def write_exports(tmp, rows):
+    rnd = random.Random(1)
+    csv_path = os.path.join(tmp, "export.csv")
+    json_path = os.path.join(tmp, "export.json")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f_csv, \
+            open(json_path, "w", encoding="utf-8") as f_json:
+        writer = csv.writer(f_csv)
+        writer.writerow(["folder", "favorite", "type", "name", "notes", "fields",
+                         "reprompt", "login_uri", "login_username", "login_password", "login_totp"])
+        f_json.write('{"encrypted": false, "folders": [')
+        f_json.write(",".join(json.dumps({"id": name, "name": name}) for name in FOLDERS if name))
+        f_json.write('], "items": [')
+        for i in range(rows):
+            folder = rnd.choice(FOLDERS)
+            password = "".join(rnd.choice("abcdefghijkmnpqrstuvwxyz23456789") for _ in range(20))
+            writer.writerow([folder, rnd.randint(0, 1), "login", f"Site {i}", "note " * rnd.randint(0, 5),
+                             "", 0, f"https://site{i}.example", f"user{i}", password, ""])
+            f_json.write(("," if i else "") + json.dumps({
+                "id": str(i), "type": 1, "name": f"Site {i}", "notes": None,
+                "folderId": folder or None, "favorite": False,
+                "login": {"username": f"user{i}", "password": password,
+                          "uris": [{"uri": f"https://site{i}.example"}]},
+            }))
+        f_json.write("]}")
+    return csv_path, json_path
+
+
+def run(path, workers):
+    from core import importer
+
+    with db.transaction() as c:
+        c.execute("DELETE FROM passwords")
+    tracemalloc.start()
+    start = time.perf_counter()
+    stats = importer.import_file(path, workers=workers)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    label = "in-process" if workers == 0 else f"{workers} workers"
+    print(f"{os.path.basename(path):12} {label:12} {stats['imported']:6} rows in {elapsed:6.2f} s"
+          f"  ({stats['rate']:8.0f} rows/s)  peak {peak / 1024 / 1024:5.1f} MiB")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from cryptography.fernet import Fernet
+        from core.crypto import set_vault_key
+        set_vault_key(Fernet.generate_key())
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+        csv_path, json_path = write_exports(tmp, rows)
+        print(f"export sizes: csv {os.path.getsize(csv_path) / 1e6:.1f} MB, json {os.path.getsize(json_path) / 1e6:.1f} MB")
+
+        for path in (csv_path, json_path):
+            run(path, 0)
+            run(path, os.cpu_count() or 1)
+
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
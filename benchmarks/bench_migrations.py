@@ -0,0 +1,86 @@
+# Benchmark: schema migration cost on a 100k-row legacy vault.db
+#
+#   python benchmarks/bench_migrations.py [rows]
+#
+# Builds a pre-versioning vault (user_version 0, passwords table missing the
+# later columns), then times the one-off migration and the warm-start check
+# that every later launch pays.
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db, migrations
+
+
+def build_legacy_vault(path, rows):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            email TEXT,
+            password TEXT,
+            is_verified INTEGER DEFAULT 0,
+            verification_code TEXT,
+            code_expiry DATETIME
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            url TEXT,
+            password TEXT,
+            notes TEXT,
+            folder_id INTEGER
+        )
+    ''')
+    c.executemany(
+        "INSERT INTO passwords (name, email, url, password, notes, folder_id) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"entry-{i}", f"user{i}@example.com", f"https://site{i}.example", "x" * 100, "", i % 20)
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        build_legacy_vault(db.DB_PATH, rows)
+
+        applied, cold_ms = timed(db.init_db)
+        db.close_connection()
+
+        warm = []
+        for _ in range(20):
+            _, ms = timed(db.init_db)
+            warm.append(ms)
+        # Include opening the connection, as a fresh launch would
+        db.close_connection()
+        _, launch_ms = timed(db.init_db)
+        db.close_connection()
+
+        print(f"rows:                   {rows}")
+        print(f"migrated to version:    {migrations.LATEST_VERSION} (applied {applied})")
+        print(f"cold migration:         {cold_ms:8.2f} ms")
+        print(f"warm init_db (median):  {sorted(warm)[len(warm) // 2]:8.3f} ms")
+        print(f"warm init_db + connect: {launch_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
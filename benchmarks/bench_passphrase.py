@@ -0,0 +1,83 @@
+# Benchmark: passphrase generation from the memory-mapped wordlist
+#
+#   python benchmarks/bench_passphrase.py [count]
+#
+# Times opening the compiled wordlist against reading and splitting the text
+# source, then generate_passphrases throughput for a few policies, prints the
+# entropy of each policy, and checks with a chi-square test that every word
+# in the list is picked equally often.
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.passphrase import (
+    RANDOM_SEPARATOR, WORDLIST_PATH, PassphrasePolicy, Wordlist, entropy_bits, generate_passphrases,
+)
+
+POLICIES = [
+    ("4 words", PassphrasePolicy(4)),
+    ("6 words", PassphrasePolicy(6)),
+    ("6 words, random caps", PassphrasePolicy(6, capitalise="random")),
+    ("6 words, random separators", PassphrasePolicy(6, RANDOM_SEPARATOR)),
+    ("5 words, capitals, 3 digits", PassphrasePolicy(5, "", "first", 3)),
+    ("8 words, all options", PassphrasePolicy(8, RANDOM_SEPARATOR, "random", 4)),
+]
+
+
+def best_of(runs, fn):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def chi_square_p(chi2, df):
+    # Upper tail p-value, Wilson-Hilferty normal approximation
+    z = ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    source = os.path.join(os.path.dirname(WORDLIST_PATH), "wordlist.txt")
+
+    def parse():
+        with open(source, encoding="utf-8") as f:
+            return f.read().split()
+
+    def mapped():
+        Wordlist().close()
+
+    wordlist = Wordlist()
+    print(f"wordlist: {len(wordlist)} words, {os.path.getsize(WORDLIST_PATH)} bytes compiled, "
+          f"{math.log2(len(wordlist)):.2f} bits per word")
+    print(f"open mapped list  {best_of(50, mapped) * 1e3:8.3f} ms")
+    print(f"parse text list   {best_of(50, parse) * 1e3:8.3f} ms")
+
+    print(f"\n{'policy':30} {'entropy':>9} {'passphrases/s':>14} {'words/s':>10}  example")
+    for name, policy in POLICIES:
+        elapsed = best_of(3, lambda: generate_passphrases(count, policy))
+        example = generate_passphrases(1, policy)[0]
+        print(f"{name:30} {entropy_bits(policy):6.1f} b {count / elapsed:14.0f} "
+              f"{count * policy.words / elapsed:10.0f}  {example}")
+
+    # Every word should be drawn equally often; capitals off so words map back directly
+    index = {wordlist.word(i): i for i in range(len(wordlist))}
+    counts = [0] * len(wordlist)
+    for passphrase in generate_passphrases(count, PassphrasePolicy(6, " ")):
+        for word in passphrase.split(" "):
+            counts[index[word]] += 1
+    expected = count * 6 / len(wordlist)
+    chi2 = sum((c - expected) ** 2 / expected for c in counts)
+    df = len(wordlist) - 1
+    print(f"\nword frequencies: chi2 {chi2:.0f} on {df} df, p = {chi_square_p(chi2, df):.3f}")
+    print("(p should be unremarkable, not close to 0, across runs)")
+
+
+if __name__ == "__main__":
+    main()
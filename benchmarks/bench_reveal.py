@@ -0,0 +1,57 @@
+# Benchmark: decrypt-on-open vs lazy reveal with the secret cache
+#
+#   python benchmarks/bench_reveal.py [opens]
+#
+# Simulates `opens` entry views over a vault, most of them on a small hot set,
+# where one view in four copies the password (twice). Compares decrypting on
+# every open, as the detail window used to, with core.secret_cache, which only
+# decrypts on copy and serves repeats from the cache.
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENTRIES = 2000
+HOT = 20
+
+
+def main():
+    opens = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    from cryptography.fernet import Fernet
+    from core import crypto, secret_cache
+    crypto.set_vault_key(Fernet.generate_key())
+    cipher = crypto.get_cipher()
+    vault = {entry_id: cipher.seal(f"password-{entry_id}") + (1,) for entry_id in range(ENTRIES)}
+
+    rnd = random.Random(1)
+    views = [(rnd.randrange(HOT) if rnd.random() < 0.9 else rnd.randrange(ENTRIES), rnd.random() < 0.25)
+             for _ in range(opens)]
+
+    start = time.perf_counter()
+    decrypts = 0
+    for entry_id, copies in views:
+        crypto.open_password(*vault[entry_id])
+        decrypts += 1
+        for _ in range(2 if copies else 0):
+            crypto.open_password(*vault[entry_id])
+            decrypts += 1
+    eager = time.perf_counter() - start
+    print(f"decrypt on open   {eager * 1000:8.1f} ms  {decrypts:6} decrypts")
+
+    start = time.perf_counter()
+    for entry_id, copies in views:
+        for _ in range(2 if copies else 0):
+            secret_cache.reveal_password(entry_id, *vault[entry_id])
+    lazy = time.perf_counter() - start
+    stats = secret_cache.cache_stats()
+    print(f"lazy + cache      {lazy * 1000:8.1f} ms  {stats['misses']:6} decrypts, {stats['hits']} cache hits")
+
+    crypto.lock()
+    print(f"after lock: {secret_cache.cache_stats()['size']} secrets cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Benchmark: full-text search latency on a 100k-entry vault
+#
+#   python benchmarks/bench_search.py [rows]
+#
+# Times core.db.search_passwords for typical search-as-you-type prefixes.
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+SITES = ["github", "gitlab", "google", "amazon", "netflix", "spotify", "paypal", "dropbox",
+         "slack", "atlassian", "microsoft", "apple", "twitter", "linkedin", "reddit", "steam"]
+WORDS = ["work", "personal", "shared", "admin", "backup", "legacy", "billing", "staging",
+         "production", "family", "travel", "bank", "school", "project", "team", "test"]
+QUERIES = ["g", "gi", "git", "github", "github work", "paypal billing", "zzz", "user123"]
+
+
+def seed(rows):
+    rnd = random.Random(1)
+    entries = []
+    for i in range(rows):
+        site = rnd.choice(SITES)
+        entries.append((
+            f"{site.title()} {rnd.choice(WORDS)} {i}",
+            f"user{i}@{site}.com",
+            f"https://{site}.com/login",
+            "x" * 100,
+            " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 6))),
+        ))
+    with db.transaction() as c:
+        c.executemany(
+            "INSERT INTO passwords (name, email, url, password, notes) VALUES (?, ?, ?, ?, ?)",
+            entries
+        )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+        start = time.perf_counter()
+        seed(rows)
+        print(f"seeded {rows} rows (index kept by triggers) in {time.perf_counter() - start:.2f} s")
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(25):
+                start = time.perf_counter()
+                results = db.search_passwords(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"{query!r:18} hits={len(results):3}  median {timings[len(timings) // 2]:7.3f} ms"
+                  f"  p95 {timings[int(len(timings) * 0.95)]:7.3f} ms")
+
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
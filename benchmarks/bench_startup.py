@@ -0,0 +1,131 @@
+# Benchmark: cold start to the first window, with an import-time profile
+#
+#   python benchmarks/bench_startup.py [runs]
+#
+# Starts main.py in a fresh interpreter (offscreen Qt) `runs` times, timing
+# the path from interpreter start to the start page being shown, and prints
+# a `python -X importtime` profile of the slowest imports on that path.
+# Exits non-zero if the median goes over STARTUP_BUDGET_MS, or if one of the
+# modules that should only load with the screen that needs it (DEFERRED)
+# was imported before the first window.
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_MS = 400
+DEFERRED = ("bcrypt", "pyotp", "qrcode", "PIL", "smtplib", "email.mime", "cryptography", "core.crypto")
+PROFILE_TOP = 15
+# Screen modules whose own import cost is reported (what opening them adds)
+SCREENS = ("ui.login", "ui.register", "ui.otp_verify", "ui.otp_setup", "ui.master_password", "ui.home")
+
+# Runs the real main.py, with app.exec_() replaced by one pass of the event
+# loop so the window gets shown and the process reports instead of blocking
+CHILD = r"""
+import time
+start = time.perf_counter()
+import runpy, sys
+from PyQt5.QtWidgets import QApplication
+
+def first_window(app):
+    app.processEvents()
+    elapsed = (time.perf_counter() - start) * 1000
+    import json
+    print(json.dumps({"ms": elapsed, "modules": sorted(sys.modules)}))
+    return 0
+
+QApplication.exec_ = first_window
+sys.argv = [MAIN]
+try:
+    runpy.run_path(MAIN, run_name="__main__")
+except SystemExit:
+    pass
+"""
+
+
+def run_once(workdir, importtime=False):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    args += ["-c", CHILD.replace("MAIN", repr(os.path.join(ROOT, "main.py")))]
+    start = time.perf_counter()
+    proc = subprocess.run(args, cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_ms"] = wall_ms
+    return result, proc.stderr
+
+
+def import_profile(stderr):
+    # "import time: self [us] | cumulative | imported package", nesting by indent
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def screen_import_ms(name):
+    # Cumulative import time of one screen module, PyQt5 already loaded
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code = f"import PyQt5.QtWidgets, core.db; import {name}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    for cumulative_us, _self_us, _depth, module in import_profile(proc.stderr):
+        if module == name:
+            return cumulative_us / 1000
+    return 0.0
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workdir = tempfile.mkdtemp()
+    try:
+        # The first start creates and migrates the vault; time the ones after
+        run_once(workdir)
+        results = [run_once(workdir)[0] for _ in range(runs)]
+        _result, stderr = run_once(workdir, importtime=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    in_process = statistics.median(r["ms"] for r in results)
+    wall = statistics.median(r["wall_ms"] for r in results)
+    print(f"time to first window: {in_process:.0f} ms in-process, {wall:.0f} ms wall "
+          f"(median of {runs}, budget {STARTUP_BUDGET_MS} ms)")
+
+    profile = import_profile(stderr)
+    print("\nslowest top-level imports (cumulative / self, ms):")
+    for cumulative, self_us, _depth, name in sorted((r for r in profile if r[2] == 0), reverse=True)[:PROFILE_TOP]:
+        print(f"  {cumulative / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+    print("\nslowest modules by self time (ms):")
+    for self_us, name in sorted(((r[1], r[3]) for r in profile), reverse=True)[:PROFILE_TOP]:
+        print(f"  {self_us / 1000:8.1f}  {name}")
+
+    print("\nscreen module imports (ms):")
+    for name in SCREENS:
+        print(f"  {screen_import_ms(name):8.1f}  {name}")
+
+    loaded = sorted({m for m in results[-1]["modules"] for d in DEFERRED if m == d or m.startswith(d + ".")})
+    failed = False
+    if loaded:
+        print(f"\nFAIL: imported before the first window: {', '.join(loaded)}")
+        failed = True
+    if wall > STARTUP_BUDGET_MS:
+        print(f"\nFAIL: {wall:.0f} ms is over the {STARTUP_BUDGET_MS} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
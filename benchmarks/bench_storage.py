@@ -0,0 +1,101 @@
+# Benchmark: on-disk size and decrypt speed of the ciphertext formats
+#
+#   python benchmarks/bench_storage.py [rows]
+#
+# Builds a `rows`-entry vault (100k by default) in each storage format:
+#   * fernet           base64 Fernet TEXT under the vault key (original)
+#   * fernet-envelope  Fernet TEXT under a Fernet TEXT data key
+#   * binary           BLOBs: version byte, nonce, AES-GCM ciphertext and tag
+# and reports file size after VACUUM, page count, ciphertext bytes per entry
+# and decrypt throughput. The fernet vault is then migrated in place by the
+# rotation job and measured again.
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+
+def fernet_envelope(texts):
+    # The format data keys were first stored in, before BLOBs
+    from cryptography.fernet import Fernet
+    from core.crypto import get_vault_key
+
+    vault = Fernet(get_vault_key())
+    for text in texts:
+        data_key = Fernet.generate_key()
+        yield Fernet(data_key).encrypt(text.encode()).decode(), vault.encrypt(data_key).decode()
+
+
+def fill(rows, fmt):
+    from core.crypto import get_cipher
+
+    texts = (f"pw-{i:08d}-{'x' * (i % 12)}" for i in range(rows))
+    if fmt == "fernet":
+        sealed = ((token, None) for token in get_cipher().encrypt_many(texts))
+    elif fmt == "fernet-envelope":
+        sealed = fernet_envelope(texts)
+    else:
+        sealed = get_cipher().seal_many(texts)
+    db.insert_password_entries([
+        (f"Site {i}", f"user{i}@example.com", f"https://site{i}.example", token, "", None, None, 0, 1, data_key, None)
+        for i, (token, data_key) in enumerate(sealed)
+    ])
+
+
+def measure(label):
+    from core.crypto import get_cipher
+
+    db.vacuum()
+    c = db.get_connection().cursor()
+    pages = c.execute("PRAGMA page_count").fetchone()[0]
+    rows, cipher_bytes = c.execute(
+        "SELECT COUNT(*), SUM(length(password) + COALESCE(length(data_key), 0)) FROM passwords"
+    ).fetchone()
+    # Checkpoint so the file on disk holds everything
+    c.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(db.DB_PATH)
+
+    cipher = get_cipher()
+    entries = c.execute("SELECT password, data_key FROM passwords").fetchall()
+    start = time.perf_counter()
+    for token, data_key in entries:
+        cipher.open(token, data_key)
+    rate = len(entries) / (time.perf_counter() - start)
+    print(f"{label:22} {size / 1e6:7.2f} MB {pages:7} pages {cipher_bytes / rows:6.1f} B/entry"
+          f" {rate:9.0f} decrypts/s")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    from cryptography.fernet import Fernet
+    from core import rotation
+    from core.crypto import set_vault_key
+    key = Fernet.generate_key()
+
+    for fmt in ("fernet", "fernet-envelope", "binary"):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # keep clear of a legacy vault.key in the checkout
+            db.DB_PATH = os.path.join(tmp, "vault.db")
+            db.init_db()
+            set_vault_key(key)
+            fill(rows, fmt)
+            measure(fmt)
+
+            if fmt == "fernet":
+                start = time.perf_counter()
+                stats = rotation.run_rotation()
+                elapsed = time.perf_counter() - start
+                result = rotation.verify_rotation()
+                assert not result["failed"] and not result["stale"], result
+                measure("fernet -> binary")
+                print(f"  migrated {stats['migrated']} entries in place in {elapsed:.2f} s")
+            db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
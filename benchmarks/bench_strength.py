@@ -0,0 +1,93 @@
+# Benchmark: password strength estimation
+#
+#   python benchmarks/bench_strength.py [count]
+#
+# Times loading the compiled dictionaries against reading the text lists,
+# then the cost of one keystroke when a StrengthMeter rescores a password as
+# it is typed (against scoring the whole password again), estimate_many
+# throughput over a vault-sized batch, and prints scores for a few examples.
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.strength import DATA_DIR, DICTIONARIES_PATH, DICTIONARY_SOURCES, StrengthMeter, estimate, \
+    estimate_many, load_dictionaries
+
+EXAMPLES = [
+    "password", "P@ssw0rd!", "qwertyuiop", "1qaz2wsx", "abcabcabc", "19/06/1987",
+    "dragonfly99", "Tr0ub4dor&3", "correct-horse-battery-staple", "k8#Lq2!vZp9x",
+]
+
+
+def best_of(runs, fn):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def typed(password):
+    # Per-keystroke times for typing password into a fresh meter
+    meter = StrengthMeter(("alice", "alice@example.com"))
+    meter.update("")
+    times = []
+    for k in range(1, len(password) + 1):
+        start = time.perf_counter()
+        meter.update(password[:k])
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    rng = random.Random(1)
+
+    def parse():
+        for _, paths in DICTIONARY_SOURCES:
+            for path in paths:
+                with open(os.path.join(DATA_DIR, path), encoding="utf-8") as f:
+                    {w.strip(): i for i, w in enumerate(f)}
+
+    words = sum(len(d) for d in load_dictionaries().values())
+    print(f"dictionaries: {words} words, {os.path.getsize(DICTIONARIES_PATH)} bytes compiled")
+    print(f"load compiled     {best_of(20, load_dictionaries) * 1e3:8.3f} ms")
+    print(f"parse text lists  {best_of(20, parse) * 1e3:8.3f} ms")
+
+    print(f"\n{'typing':34} {'mean':>9} {'worst':>9} {'full rescore':>13}")
+    for password in ("Correct-Horse-Battery-Staple-9!x",
+                     "".join(rng.choice(string.printable[:94]) for _ in range(64))):
+        times = [min(t) for t in zip(*(typed(password) for _ in range(5)))]
+        full = best_of(5, lambda: estimate(password, ("alice", "alice@example.com")))
+        label = password if len(password) <= 32 else password[:29] + "..."
+        print(f"{label:34} {sum(times) / len(times) * 1e3:6.3f} ms {max(times) * 1e3:6.3f} ms "
+              f"{full * 1e3:10.3f} ms")
+
+    # A vault's worth of mixed passwords: random, word-based, and reused
+    vault = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            vault.append("".join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(8, 16))))
+        elif kind < 0.8:
+            vault.append(rng.choice(EXAMPLES[:7]) + str(rng.randint(0, 999)))
+        else:
+            vault.append(rng.choice(EXAMPLES))
+    batch = best_of(3, lambda: estimate_many(vault))
+    single = best_of(1, lambda: [estimate(p) for p in vault])
+    print(f"\nestimate_many     {count / batch:10.0f} passwords/s")
+    print(f"estimate each     {count / single:10.0f} passwords/s")
+
+    print(f"\n{'password':30} {'score':>5} {'guesses':>8}  warning")
+    for password in EXAMPLES:
+        result = estimate(password)
+        print(f"{password:30} {result.score:5} {'1e%.1f' % result.guesses_log10:>8}  {result.warning}")
+
+
+if __name__ == "__main__":
+    main()
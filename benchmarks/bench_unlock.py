@@ -0,0 +1,51 @@
+# Benchmark: KDF calibration and master-password unlock latency
+#
+#   python benchmarks/bench_unlock.py [target_ms...]
+#
+# For each target, calibrates the KDF on this machine, enrols a user with
+# those parameters and times repeated unlocks through core.keys.unlock.
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import crypto, db, keys
+
+
+def main():
+    targets = [int(t) for t in sys.argv[1:]] or [100, 250, 500, 1000]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db.DB_PATH = os.path.join(tmp, "vault.db")
+        db.init_db()
+
+        for target in targets:
+            start = time.perf_counter()
+            params = keys.recalibrate(target)
+            calibration_ms = (time.perf_counter() - start) * 1000
+            cost = {k: v for k, v in params.items() if k not in ("target_ms", "measured_ms")}
+
+            # Still unlocked from the previous round (or a fresh vault), so
+            # enrolling shares the same vault key
+            username = f"user{target}"
+            keys.enroll(username, "correct horse battery staple")
+            timings = []
+            for _ in range(5):
+                crypto.lock()
+                timings.append(keys.unlock(username, "correct horse battery staple")["total_ms"])
+            timings.sort()
+            print(f"target {target:5} ms  {cost}  calibration {calibration_ms:6.0f} ms"
+                  f"  unlock median {timings[2]:6.1f} ms  max {timings[-1]:6.1f} ms")
+
+        print("\nrecorded unlocks:")
+        for params, stats in keys.unlock_timing_summary().items():
+            print(f"  {params}  n={stats['count']}  kdf median {stats['kdf_median_ms']:.1f} ms"
+                  f"  total p95 {stats['total_p95_ms']:.1f} ms")
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Local SMTP sink: accepts mail and keeps it, for trying out OTP delivery
+# without a real server
+#
+#   python benchmarks/smtp_sink.py [port]
+#   VAULT_SMTP_HOST=localhost VAULT_SMTP_PORT=8025 VAULT_SMTP_SECURITY=none python main.py
+#
+# Plain SMTP only (no STARTTLS or AUTH). SmtpSink can also slow down each new
+# connection (like a relay doing TLS and login), drop the connection every
+# few messages, or answer 451 to the first few messages, which
+# bench_emailer.py uses to exercise the mailer's reconnects and retries.
+import email
+import socketserver
+import sys
+import threading
+import time
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, connect_delay=0.0, drop_every=0, fail_first=0, on_message=None):
+        super().__init__(("127.0.0.1", port), _SmtpHandler)
+        self.port = self.server_address[1]
+        self.connect_delay = connect_delay
+        self.drop_every = drop_every
+        self.fail_first = fail_first
+        self.on_message = on_message
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        time.sleep(sink.connect_delay)
+        self.reply("220 sink ready")
+        sent_here = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif verb in ("HELO", "MAIL", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                with sink.lock:
+                    refuse = sink.fail_first > 0
+                    sink.fail_first -= refuse
+                self.reply("451 Try again later" if refuse else "250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                message = email.message_from_bytes(b"".join(lines))
+                with sink.lock:
+                    sink.messages.append(message)
+                if sink.on_message:
+                    sink.on_message(message)
+                self.reply("250 Queued")
+                sent_here += 1
+                if sink.drop_every and sent_here % sink.drop_every == 0:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    sink = SmtpSink(port, on_message=lambda m: print(f"To {m['To']}: {m.get_payload().strip()}", flush=True))
+    print(f"SMTP sink listening on 127.0.0.1:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
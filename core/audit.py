@@ -0,0 +1,213 @@
+"""Vault health audit.
+
+run_audit() brings the audit table up to date in one pass over the entries
+that changed since the last run (new, or last_modified moved on). Those rows
+are streamed from the database in id-ordered batches, decrypted and scored
+for strength (core.strength, with the entry's name, email and URL as user
+inputs) and looked up in the breach corpus (core.breach) if one is
+installed, in worker processes, and written back one transaction per batch.
+Only the results leave the workers: the score, the warning, the breach count
+and the password's fingerprint (core.fingerprint), which fills in the column
+for entries written before it existed or without one; reuse is then a GROUP
+BY on it. Age and expiry come from the entries' own columns when the report
+is read, so they never go stale between runs. Installing or replacing the
+corpus makes every entry due again.
+"""
+import datetime
+import os
+import threading
+import time
+
+from core import breach, crypto, db
+from core.fingerprint import fingerprint, fingerprint_key
+
+AUDIT_BATCH_SIZE = 500
+# Below this many pending entries the pool costs more than it saves
+AUDIT_POOL_MIN = 2000
+WEAK_SCORE = 2          # core.strength scores at or below this are weak
+MAX_AGE_DAYS = 365      # unchanged for longer than this is old
+EXPIRY_WARNING_DAYS = db.EXPIRY_WARNING_DAYS
+UNREADABLE = "Could not be decrypted"
+# Build id of the corpus the audit table was checked against
+AUDIT_CORPUS_SETTING = "audit_breach_corpus"
+
+
+def audit_rows(rows, ciphers, fp_key, corpus=None):
+    """Audit result tuples for rows from db.fetch_entries_to_audit.
+
+    Rows under a key version missing from ciphers (re-wrapped by a rotation
+    that started after the keyring was read) get no result and stay pending.
+    """
+    from core.strength import estimate
+
+    results = []
+    for entry_id, name, email, url, token, data_key, key_version, last_modified in rows:
+        if token and key_version not in ciphers:
+            continue
+        try:
+            password = ciphers[key_version].open(token, data_key) if token else ""
+        except Exception:
+            results.append((entry_id, token, last_modified, None, None, UNREADABLE, None, None))
+            continue
+        result = estimate(password, (name, email, url))
+        breached = corpus.check(password) if corpus is not None and password else None
+        results.append((entry_id, token, last_modified, result.score, round(result.guesses_log10, 2),
+                        result.warning or None, breached, fingerprint(password, fp_key) if password else None))
+    return results
+
+
+def run_audit(progress=None, stop=None, batch_size=AUDIT_BATCH_SIZE, workers=None):
+    """Audit every entry that changed since the last run.
+
+    progress, if given, is called after each batch with a dict of audited,
+    remaining, elapsed and rate. stop is an optional threading.Event; when
+    set, the run ends after the current batch and the rest stays pending.
+    Returns the final progress dict.
+    """
+    keyring, _current = crypto.get_keyring()
+    fp_key = fingerprint_key()
+    corpus = breach.get_corpus()
+    corpus_id = corpus.build_id if corpus is not None else ""
+    with db.transaction():
+        if db.get_setting(AUDIT_CORPUS_SETTING, "") != corpus_id:
+            db.clear_audit()
+            db.set_setting(AUDIT_CORPUS_SETTING, corpus_id)
+
+    pending = db.count_entries_to_audit()
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 and pending >= AUDIT_POOL_MIN else 0
+    stats = {"audited": 0, "remaining": pending, "elapsed": 0.0, "rate": 0.0}
+    start = time.perf_counter()
+
+    def entries():
+        after_id = 0
+        while not (stop and stop.is_set()):
+            rows = db.fetch_entries_to_audit(after_id, batch_size)
+            if not rows:
+                return
+            yield from rows
+            after_id = rows[-1][0]
+
+    if workers:
+        results = crypto.run_pooled(_audit_chunk, entries(), workers, batch_size,
+                                    _init_worker, (keyring, fp_key, corpus and corpus.path))
+    else:
+        ciphers = {version: crypto.get_cipher(key) for version, key in keyring.items()}
+        results = (result for row in entries() for result in audit_rows([row], ciphers, fp_key, corpus))
+
+    batch = []
+    for result in results:
+        batch.append(result)
+        if len(batch) == batch_size:
+            _save(batch, stats, start, progress)
+            batch = []
+    if batch:
+        _save(batch, stats, start, progress)
+    return stats
+
+
+def _save(batch, stats, start, progress):
+    db.save_audit_results(batch)
+    stats["audited"] += len(batch)
+    stats["remaining"] = max(0, stats["remaining"] - len(batch))
+    stats["elapsed"] = time.perf_counter() - start
+    stats["rate"] = stats["audited"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    if progress:
+        progress(dict(stats))
+
+
+def health_report(today=None):
+    """(summary, issues) from the audit table, without decrypting anything.
+
+    issues are dicts of id, name, score, warning, reused (entries sharing
+    the password), breached (times seen in the breach corpus), age_days,
+    expired and expiring; summary counts entries, weak, reused, breached
+    (None without a corpus), old, expired, expiring and unreadable.
+    """
+    today = today or datetime.date.today()
+    cutoff = today - datetime.timedelta(days=MAX_AGE_DAYS)
+    expiring_by = today + datetime.timedelta(days=EXPIRY_WARNING_DAYS)
+    rows = db.fetch_audit_issues(WEAK_SCORE, cutoff.isoformat(), expiring_by.isoformat())
+
+    summary = {"entries": db.count_audited_entries(), "weak": 0, "reused": 0,
+               "breached": 0 if breach.get_corpus() is not None else None, "old": 0, "expired": 0,
+               "expiring": 0, "unreadable": 0}
+    issues = []
+    for entry_id, name, score, warning, last_modified, expiry_date, uses, breached in rows:
+        age_days = None
+        if last_modified:
+            age_days = (today - datetime.date.fromisoformat(last_modified[:10])).days
+        expired = bool(expiry_date) and expiry_date < today.isoformat()
+        expiring = bool(expiry_date) and not expired and expiry_date <= expiring_by.isoformat()
+        issue = {"id": entry_id, "name": name, "score": score, "warning": warning, "reused": uses or 0,
+                 "breached": breached or 0, "age_days": age_days, "expired": expired, "expiring": expiring}
+        summary["unreadable"] += score is None
+        summary["weak"] += score is not None and score <= WEAK_SCORE
+        summary["reused"] += bool(uses)
+        if summary["breached"] is not None:
+            summary["breached"] += bool(breached)
+        summary["old"] += age_days is not None and age_days > MAX_AGE_DAYS
+        summary["expired"] += expired
+        summary["expiring"] += expiring
+        issues.append(issue)
+    return summary, issues
+
+
+class AuditJob(threading.Thread):
+    """Runs an incremental audit in the background."""
+
+    def __init__(self, on_progress=None, on_done=None):
+        super().__init__(daemon=True)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.stop_event = threading.Event()
+        self.result = None
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def run(self):
+        try:
+            self.result = run_audit(self.on_progress, self.stop_event)
+        except Exception as e:
+            self.result = {"error": str(e)}
+        finally:
+            db.close_connection()
+        if self.on_done:
+            self.on_done(self.result)
+
+
+_job = None
+
+def start_audit(on_progress=None, on_done=None):
+    global _job
+    if _job is not None and _job.is_alive():
+        return _job
+    _job = AuditJob(on_progress, on_done)
+    _job.start()
+    return _job
+
+def stop_audit():
+    # Before lock: the job needs the keyring to decrypt
+    global _job
+    if _job is not None:
+        _job.stop()
+        _job = None
+
+
+# Pool worker side: each process builds its ciphers once
+_worker_ciphers = None
+_worker_fp_key = None
+_worker_corpus = None
+
+def _init_worker(keyring, fp_key, corpus_path):
+    global _worker_ciphers, _worker_fp_key, _worker_corpus
+    _worker_ciphers = {version: crypto.Cipher(key) for version, key in keyring.items()}
+    _worker_fp_key = fp_key
+    # Each process maps the corpus itself; the pages are shared
+    _worker_corpus = breach.BreachCorpus(corpus_path) if corpus_path else None
+
+def _audit_chunk(rows):
+    return audit_rows(rows, _worker_ciphers, _worker_fp_key, _worker_corpus)
@@ -0,0 +1,285 @@
+"""Offline check of passwords against a breached-password corpus.
+
+A corpus is a local copy of a breached-password hash dump (one SHA-1 per
+line, "HASH:COUNT" as Pwned Passwords ships it), compiled by build_corpus
+into:
+
+    header: b"VLTB", format version, hash prefix width, Bloom hash count
+            (1 byte each), build id (16 bytes), record count, Bloom bits
+            (uint64 each)
+    records: count x (SHA-1 prefix, times seen as uint32), sorted, unique
+    Bloom filter over the prefixes, Bloom bits long
+
+Lookups map the file and touch only the pages they need: the Bloom filter
+answers most misses with a few byte reads, and the rest is a binary search
+over the fixed-width records, about thirty probes for a billion entries.
+Nothing is loaded up front, so an open corpus costs next to no resident
+memory however big the dump was. Prefixes default to 10 bytes of the hash,
+which halves the file and leaves a chance of a false hit around one in
+10^15 per lookup even at a billion entries.
+
+The app looks for the corpus at CORPUS_PATH, beside the vault; without one
+the check is skipped (breach_count returns None).
+"""
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+CORPUS_PATH = "breaches.bin"
+CORPUS_MAGIC = b"VLTB"
+CORPUS_VERSION = 1
+_HEADER = struct.Struct("<4sBBB16sQQ")
+_COUNT = struct.Struct("<I")
+_BLOOM_SEEDS = struct.Struct("<QQ")
+
+DEFAULT_WIDTH = 10          # bytes of each SHA-1 kept
+DEFAULT_BLOOM_BITS = 10     # per entry; about 1% of misses reach the search
+MAX_SEEN = 2 ** 32 - 1
+RUN_SIZE = 2_000_000        # records sorted in memory at a time by the builder
+_READ_RECORDS = 65536
+
+
+def _bloom_positions(prefix, k, bits):
+    # Double hashing off one blake2b digest of the prefix
+    h1, h2 = _BLOOM_SEEDS.unpack(hashlib.blake2b(prefix, digest_size=16).digest())
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(k)]
+
+
+def password_hash(password) -> bytes:
+    return hashlib.sha1(password.encode()).digest()
+
+
+class BreachCorpus:
+    """Read-only view of a compiled corpus."""
+
+    def __init__(self, path=CORPUS_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, width, k, build_id, count, bits = _HEADER.unpack_from(self._map, 0)
+            if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+                raise ValueError(f"{path} is not a compiled breach corpus")
+            self._record = width + _COUNT.size
+            self._bloom = _HEADER.size + count * self._record
+            if not 0 < width <= 20 or not k or not bits or len(self._map) != self._bloom + (bits + 7) // 8:
+                raise ValueError(f"{path} is truncated")
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+        self.path = path
+        self.width = width
+        self.hashes = k
+        self.bits = bits
+        self.count = count
+        self.build_id = build_id.hex()
+
+    def __len__(self):
+        return self.count
+
+    def might_contain(self, prefix) -> bool:
+        """Bloom filter check; False means certainly not in the corpus."""
+        m, base = self._map, self._bloom
+        for bit in _bloom_positions(prefix, self.hashes, self.bits):
+            if not m[base + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def seen(self, digest) -> int:
+        """Times the password with this SHA-1 digest was seen; 0 if never."""
+        prefix = digest[:self.width]
+        if not self.might_contain(prefix):
+            return 0
+        m, width, size = self._map, self.width, self._record
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = _HEADER.size + mid * size
+            probe = m[pos:pos + width]
+            if probe < prefix:
+                lo = mid + 1
+            elif probe > prefix:
+                hi = mid
+            else:
+                return _COUNT.unpack_from(m, pos + width)[0]
+        return 0
+
+    def check(self, password) -> int:
+        return self.seen(password_hash(password))
+
+    def close(self):
+        self._map.close()
+
+
+def _parse_line(line, width, plain):
+    if plain:
+        password = line.rstrip("\r\n")
+        return (password_hash(password)[:width], 1) if password else None
+    line = line.strip()
+    if not line:
+        return None
+    digest, _, seen = line.partition(":")
+    if len(digest) != 40:
+        raise ValueError(f"{digest!r} is not a SHA-1 hash")
+    return bytes.fromhex(digest)[:width], int(seen) if seen else 1
+
+
+def _read_run(path, size):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(size * _READ_RECORDS)
+            if not block:
+                return
+            for i in range(0, len(block), size):
+                yield block[i:i + size]
+
+
+def build_corpus(src, dst=CORPUS_PATH, width=DEFAULT_WIDTH, bloom_bits=DEFAULT_BLOOM_BITS, plain=False,
+                 run_size=RUN_SIZE, progress=None):
+    """Compile a breached-password dump into the mapped format.
+
+    src has one "SHA1[:COUNT]" per line in any order (hex, either case), or
+    with plain=True one password per line. The dump is sorted in runs of
+    run_size records spilled to temporary files beside dst and merged, so
+    memory stays flat apart from the Bloom filter (bloom_bits per entry).
+    The result is written in the same temporary directory and moved over dst
+    once complete; on failure the directory goes with everything in it.
+    Repeated prefixes are merged and their counts added. progress, if given,
+    is called with the number of lines read every run. Returns the number of
+    records written.
+    """
+    if not 4 <= width <= 20:
+        raise ValueError("Hash prefix width must be 4 to 20 bytes")
+    size = width + _COUNT.size
+    workdir = os.path.dirname(os.path.abspath(dst))
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        runs = []
+        total = 0
+
+        def spill(records):
+            records.sort()
+            path = os.path.join(tmp, f"run{len(runs)}")
+            with open(path, "wb") as f:
+                f.write(b"".join(records))
+            runs.append(path)
+
+        records = []
+        with open(src, encoding="utf-8", errors="replace" if plain else "strict") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    record = _parse_line(line, width, plain)
+                except ValueError as e:
+                    raise ValueError(f"{src} line {number}: {e}")
+                if record is None:
+                    continue
+                records.append(record[0] + _COUNT.pack(min(record[1], MAX_SEEN)))
+                if len(records) == run_size:
+                    total += len(records)
+                    spill(records)
+                    records = []
+                    if progress:
+                        progress(number)
+        if records or not runs:
+            total += len(records)
+            spill(records)
+        del records
+
+        # Sized for every record read; merging duplicates only makes it sparser
+        bits = max(64, total * bloom_bits)
+        k = max(1, round(bloom_bits * math.log(2)))
+        bloom = bytearray((bits + 7) // 8)
+
+        out = os.path.join(tmp, "corpus")
+        count = 0
+        readers = [_read_run(path, size) for path in runs]
+        try:
+            with open(out, "wb") as f:
+                f.write(b"\0" * _HEADER.size)
+                buffer = []
+
+                def emit(prefix, seen):
+                    nonlocal count
+                    buffer.append(prefix + _COUNT.pack(min(seen, MAX_SEEN)))
+                    for bit in _bloom_positions(prefix, k, bits):
+                        bloom[bit >> 3] |= 1 << (bit & 7)
+                    count += 1
+                    if len(buffer) == _READ_RECORDS:
+                        f.write(b"".join(buffer))
+                        buffer.clear()
+
+                prev, seen = None, 0
+                for record in heapq.merge(*readers):
+                    prefix = record[:width]
+                    if prefix == prev:
+                        seen += _COUNT.unpack_from(record, width)[0]
+                        continue
+                    if prev is not None:
+                        emit(prev, seen)
+                    prev, seen = prefix, _COUNT.unpack_from(record, width)[0]
+                if prev is not None:
+                    emit(prev, seen)
+                f.write(b"".join(buffer))
+                f.write(bloom)
+                f.seek(0)
+                f.write(_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, width, k, os.urandom(16), count, bits))
+        finally:
+            # Close the run files before the directory is removed
+            for reader in readers:
+                reader.close()
+        os.replace(out, dst)
+    return count
+
+
+_corpus = None
+_corpus_stat = None
+_corpus_lock = threading.Lock()
+
+def get_corpus(path=CORPUS_PATH):
+    """The installed corpus, or None without a usable one; reopened if replaced."""
+    global _corpus, _corpus_stat
+    with _corpus_lock:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        stat = st and (path, st.st_size, st.st_mtime_ns)
+        if stat != _corpus_stat:
+            # The old map stays valid for anyone still holding it
+            _corpus = None
+            _corpus_stat = stat
+            if stat:
+                try:
+                    _corpus = BreachCorpus(path)
+                except ValueError as e:
+                    print(f"Ignoring breach corpus: {e}")
+        return _corpus
+
+
+def breach_count(password):
+    """Times password appears in the corpus, or None if none is installed."""
+    corpus = get_corpus()
+    if corpus is None or not password:
+        return None
+    return corpus.check(password)
+
+
+if __name__ == "__main__":
+    # python -m core.breach DUMP [DST] [--plain] [--width N] [--bloom-bits N]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile a breached-password dump for offline checks.")
+    parser.add_argument("src", help="dump with one SHA1[:COUNT] per line")
+    parser.add_argument("dst", nargs="?", default=CORPUS_PATH)
+    parser.add_argument("--plain", action="store_true", help="the dump lists passwords, not hashes")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="bytes of each hash to keep")
+    parser.add_argument("--bloom-bits", type=int, default=DEFAULT_BLOOM_BITS, help="Bloom filter bits per entry")
+    args = parser.parse_args()
+    written = build_corpus(args.src, args.dst, args.width, args.bloom_bits, args.plain,
+                           progress=lambda n: print(f"{n} lines read", flush=True))
+    print(f"{written} hashes written to {args.dst}")
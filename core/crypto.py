@@ -1,19 +1,255 @@
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import base64
+import collections
+import concurrent.futures
+import itertools
 import os
 
-def get_or_create_key():
-    if not os.path.exists("vault.key"):
-        with open("vault.key", "wb") as f:
-            f.write(Fernet.generate_key())
-    with open("vault.key", "rb") as f:
-        return f.read()
+# The vault key only lives in memory, between unlock (core.keys.unlock) and
+# lock. Older vaults kept it in plaintext in this file; it is read once to
+# wrap it for each user and removed when every user has a wrapped copy.
+LEGACY_KEY_FILE = "vault.key"
 
-KEY = get_or_create_key()
 
-def encrypt_password(password: str, key: bytes = KEY) -> str:
-    f = Fernet(key)
-    return f.encrypt(password.encode()).decode()
+class VaultLockedError(Exception):
+    pass
 
-def decrypt_password(encrypted: str, key: bytes = KEY) -> str:
-    f = Fernet(key)
-    return f.decrypt(encrypted.encode()).decode()
+
+# key_version -> vault key. New ciphertexts use the current version; older
+# versions stay while a key rotation still has entries under them.
+_keyring = {}
+_current_version = None
+_lock_listeners = []
+
+def set_keyring(keyring, current_version):
+    global _keyring, _current_version
+    _keyring = dict(keyring)
+    _current_version = current_version
+
+def set_vault_key(key: bytes):
+    set_keyring({1: key}, 1)
+
+def get_keyring():
+    if _current_version is None:
+        raise VaultLockedError("The vault is locked")
+    return dict(_keyring), _current_version
+
+def get_vault_key(version=None) -> bytes:
+    if _current_version is None:
+        raise VaultLockedError("The vault is locked")
+    version = _current_version if version is None else version
+    try:
+        return _keyring[version]
+    except KeyError:
+        raise VaultLockedError(f"Vault key version {version} is not available")
+
+def current_key_version():
+    get_vault_key()
+    return _current_version
+
+def is_unlocked():
+    return _current_version is not None
+
+def add_lock_listener(callback):
+    # Called on lock() to drop anything derived from the vault key
+    _lock_listeners.append(callback)
+
+def lock():
+    global _keyring, _current_version
+    _keyring = {}
+    _current_version = None
+    _ciphers.clear()
+    for callback in _lock_listeners:
+        callback()
+
+# Entries per task sent to a pool worker
+POOL_CHUNK_SIZE = 500
+
+# Stored ciphertexts are BLOBs: version byte, 12-byte nonce, then the AES-GCM
+# ciphertext with its 16-byte tag. Older rows hold base64 Fernet tokens as
+# TEXT and are converted by the rotation job (see core.rotation).
+BLOB_VERSION = 1
+NONCE_SIZE = 12
+
+
+def _pack(aead, data: bytes) -> bytes:
+    nonce = os.urandom(NONCE_SIZE)
+    return bytes((BLOB_VERSION,)) + nonce + aead.encrypt(nonce, data, None)
+
+def _unpack(aead, blob: bytes) -> bytes:
+    if blob[0] != BLOB_VERSION:
+        raise ValueError(f"Unknown ciphertext version {blob[0]}")
+    return aead.decrypt(blob[1:1 + NONCE_SIZE], blob[1 + NONCE_SIZE:], None)
+
+
+class Cipher:
+    """The ciphers for one vault key, built once, with batch helpers.
+
+    seal/open are the envelope scheme used for stored passwords: each one is
+    encrypted under its own random data key, and only that data key is
+    encrypted under this (vault) key, both in the binary format above.
+    Rotating the vault key then re-wraps the small data keys and leaves the
+    password ciphertexts alone. encrypt/decrypt are plain Fernet, for rows
+    from before data keys.
+
+    The *_many helpers take any iterable (including a generator) and return
+    an iterator in the same order. With workers > 0 the work is split into
+    chunks across a process pool, keeping only a few chunks in flight so
+    memory stays bounded however long the input is.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._fernet = Fernet(key)
+        # A separate AES-256 key for wrapping data keys, so the Fernet key
+        # material isn't used by two algorithms
+        wrap_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                        info=b"vault data key wrapping").derive(base64.urlsafe_b64decode(key))
+        self._aead = AESGCM(wrap_key)
+
+    def encrypt(self, text: str) -> str:
+        return self._fernet.encrypt(text.encode()).decode()
+
+    def decrypt(self, token: str) -> str:
+        return self._fernet.decrypt(token.encode()).decode()
+
+    def seal(self, text: str):
+        # -> (ciphertext, wrapped data key), both BLOBs
+        data_key = AESGCM.generate_key(256)
+        return _pack(AESGCM(data_key), text.encode()), _pack(self._aead, data_key)
+
+    def open(self, token, data_key=None) -> str:
+        if isinstance(data_key, bytes):
+            return _unpack(AESGCM(_unpack(self._aead, data_key)), token).decode()
+        if data_key is None:
+            return self.decrypt(token)  # From before per-entry data keys
+        # Fernet data key as TEXT, from before the binary format
+        return Fernet(self._fernet.decrypt(data_key.encode())).decrypt(token.encode()).decode()
+
+    def rewrap(self, data_key: bytes, target) -> bytes:
+        return target.wrap(self.unwrap(data_key))
+
+    def wrap(self, secret: bytes) -> bytes:
+        # A small secret (a data key, the fingerprint key) sealed under this vault key
+        return _pack(self._aead, secret)
+
+    def unwrap(self, blob: bytes) -> bytes:
+        return _unpack(self._aead, blob)
+
+    def encrypt_many(self, texts, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        if not workers:
+            return map(self.encrypt, texts)
+        return self._pooled(_encrypt_chunk, texts, workers, chunk_size)
+
+    def decrypt_many(self, tokens, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        if not workers:
+            return map(self.decrypt, tokens)
+        return self._pooled(_decrypt_chunk, tokens, workers, chunk_size)
+
+    def seal_many(self, texts, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        if not workers:
+            return map(self.seal, texts)
+        return self._pooled(_seal_chunk, texts, workers, chunk_size)
+
+    def reencrypt_many(self, tokens, target, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        # Fernet-decrypt with this cipher and Fernet-encrypt with `target`
+        if not workers:
+            return (target.encrypt(self.decrypt(token)) for token in tokens)
+        return self._pooled(_reencrypt_chunk, tokens, workers, chunk_size, target.key)
+
+    def rewrap_many(self, data_keys, target, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        # Move wrapped data keys from this vault key to `target` (key rotation)
+        if not workers:
+            return (self.rewrap(data_key, target) for data_key in data_keys)
+        return self._pooled(_rewrap_chunk, data_keys, workers, chunk_size, target.key)
+
+    def reseal_many(self, entries, target, workers=0, chunk_size=POOL_CHUNK_SIZE):
+        # (token, data_key) pairs in an older format, opened with this key and
+        # sealed afresh under `target`
+        if not workers:
+            return (target.seal(self.open(token, data_key)) for token, data_key in entries)
+        return self._pooled(_reseal_chunk, entries, workers, chunk_size, target.key)
+
+    def _pooled(self, fn, items, workers, chunk_size, target_key=None):
+        return run_pooled(fn, items, workers, chunk_size, _init_worker, (self.key, target_key))
+
+
+def run_pooled(fn, items, workers, chunk_size=POOL_CHUNK_SIZE, initializer=None, initargs=()):
+    """Yield fn(chunk) results for chunks of items, computed in a process pool.
+
+    Results come back in input order. Only two chunks per worker are in
+    flight at once, so a long or generated input never sits in memory whole.
+    """
+    items = iter(items)
+    pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs)
+    try:
+        # Two chunks per worker: one running, one queued behind it
+        in_flight = collections.deque()
+        while True:
+            chunk = list(itertools.islice(items, chunk_size))
+            if chunk:
+                in_flight.append(pool.submit(fn, chunk))
+            if in_flight and (not chunk or len(in_flight) >= workers * 2):
+                yield from in_flight.popleft().result()
+            if not chunk and not in_flight:
+                return
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+_ciphers = {}
+
+def get_cipher(key: bytes = None, version=None) -> Cipher:
+    key = key or get_vault_key(version)
+    cipher = _ciphers.get(key)
+    if cipher is None:
+        cipher = _ciphers[key] = Cipher(key)
+    return cipher
+
+
+# Pool worker side: each process builds its cipher(s) once
+_worker_cipher = None
+_worker_target = None
+
+def _init_worker(key, target_key=None):
+    global _worker_cipher, _worker_target
+    _worker_cipher = Cipher(key)
+    _worker_target = Cipher(target_key) if target_key else None
+
+def _encrypt_chunk(texts):
+    return [_worker_cipher.encrypt(text) for text in texts]
+
+def _decrypt_chunk(tokens):
+    return [_worker_cipher.decrypt(token) for token in tokens]
+
+def _seal_chunk(texts):
+    return [_worker_cipher.seal(text) for text in texts]
+
+def _reencrypt_chunk(tokens):
+    return [_worker_target.encrypt(_worker_cipher.decrypt(token)) for token in tokens]
+
+def _rewrap_chunk(data_keys):
+    return [_worker_cipher.rewrap(data_key, _worker_target) for data_key in data_keys]
+
+def _reseal_chunk(entries):
+    return [_worker_target.seal(_worker_cipher.open(token, data_key)) for token, data_key in entries]
+
+
+def encrypt_password(password: str, key: bytes = None) -> str:
+    return get_cipher(key).encrypt(password)
+
+def seal_password(password: str):
+    """Encrypt under a new data key; returns (ciphertext, data_key, key_version) for storage."""
+    version = current_key_version()
+    token, data_key = get_cipher(version=version).seal(password)
+    return token, data_key, version
+
+def open_password(token, data_key=None, version=None) -> str:
+    # Only this entry's data key is unwrapped, nothing vault-wide
+    return get_cipher(version=version).open(token, data_key)
+
+def decrypt_password(encrypted: str, key: bytes = None, version=None) -> str:
+    return get_cipher(key, version).decrypt(encrypted)
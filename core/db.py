@@ -1,356 +1,796 @@
 import sqlite3
 import datetime
-
-def create_user_table():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS passwords (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT,
-            url TEXT,
-            password TEXT,
-            notes TEXT,
-            folder_id INTEGER,
-            last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
-            is_favourite INTEGER DEFAULT 0,
-            expiry_date DATE,
-            last_modified DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (folder_id) REFERENCES folders(id)
+import threading
+import itertools
+import atexit
+from contextlib import contextmanager
+from core import migrations
+
+DB_PATH = "vault.db"
+BUSY_TIMEOUT = 5.0  # seconds to wait on a lock held by another connection/process
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+
+def get_connection():
+    # One connection per thread, opened lazily and reused for every query
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(
+            DB_PATH,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,  # transactions are managed explicitly by transaction()
+            cached_statements=STATEMENT_CACHE_SIZE,
         )
-    ''')
-    conn.commit()
-    conn.close()
-
-def create_master_password_table():
-    conn = sqlite3.connect("vault.db")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+        _local.conn = conn
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction():
+    """Run a block of writes atomically on this thread's connection.
+
+    BEGIN IMMEDIATE takes the write lock up front, so a second writer waits on
+    the busy timeout instead of failing halfway with "database is locked".
+    Nested blocks become savepoints inside the outer transaction.
+    """
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS master_password (
-            username TEXT PRIMARY KEY,
-            password_hash BLOB
-        )
-    ''')
-    conn.commit()
+
+    if conn.in_transaction:
+        depth = getattr(_local, "savepoint_depth", 0) + 1
+        _local.savepoint_depth = depth
+        name = f"sp_{depth}"
+        c.execute(f"SAVEPOINT {name}")
+        try:
+            yield c
+        except BaseException:
+            c.execute(f"ROLLBACK TO {name}")
+            c.execute(f"RELEASE {name}")
+            raise
+        else:
+            c.execute(f"RELEASE {name}")
+        finally:
+            _local.savepoint_depth = depth - 1
+        return
+
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        yield c
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    with _connections_lock:
+        if conn in _connections:
+            _connections.remove(conn)
     conn.close()
 
+
+def close_all_connections():
+    with _connections_lock:
+        conns = list(_connections)
+        _connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Connections created on another thread can only be closed there
+            pass
+    _local.conn = None
+
+
+atexit.register(close_all_connections)
+
+
+# Write-behind buffer for high-frequency, low-value writes (last_used touches
+# and notifications). They are held in memory and flushed together in one
+# transaction after WRITE_BEHIND_DELAY seconds, on lock/logout, or at exit,
+# instead of costing a commit each time an entry is opened.
+WRITE_BEHIND_DELAY = 2.0
+
+_pending_lock = threading.Lock()
+_pending_last_used = {}       # entry_id -> "YYYY-MM-DD HH:MM:SS" (UTC, like CURRENT_TIMESTAMP)
+_pending_notifications = {}   # dedup key -> [username, entry_id, kind, day, message, timestamp, count]
+_pending_seq = itertools.count()
+_flush_timer = None
+
+# Upsert on the (username, entry_id, kind, day) key, so a repeat of the same
+# event on the same day bumps the existing row's count instead of adding one
+_NOTIFICATION_UPSERT = """
+    INSERT INTO notifications (username, entry_id, kind, day, message, timestamp, count)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (username, entry_id, kind, day) DO UPDATE SET
+        count = count + excluded.count,
+        message = excluded.message,
+        timestamp = excluded.timestamp
+"""
+
+
+def _utc_timestamp():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def _schedule_flush():
+    # Caller holds _pending_lock
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(WRITE_BEHIND_DELAY, _flush_on_timer)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+def _flush_on_timer():
+    try:
+        flush_pending_writes()
+    finally:
+        # Timer threads are one-shot, so don't leave their connection behind
+        close_connection()
+
+def touch_last_used(entry_id):
+    with _pending_lock:
+        _pending_last_used[entry_id] = _utc_timestamp()
+        _schedule_flush()
+
+def queue_notification(username, message, entry_id=None, kind=None):
+    # Events with an entry id and kind collapse to one row per user per day
+    ts = _utc_timestamp()
+    day = ts[:10]
+    if entry_id is not None and kind is not None:
+        key = (username, entry_id, kind, day)
+    else:
+        key = next(_pending_seq)
+    with _pending_lock:
+        pending = _pending_notifications.get(key)
+        if pending is None:
+            _pending_notifications[key] = [username, entry_id, kind, day, message, ts, 1]
+        else:
+            pending[4:] = [message, ts, pending[6] + 1]
+        _schedule_flush()
+
+def _requeue_notifications(notifications):
+    # Caller holds _pending_lock
+    for key, row in notifications:
+        pending = _pending_notifications.get(key)
+        if pending is None:
+            _pending_notifications[key] = row
+        else:
+            pending[6] += row[6]
+
+def flush_pending_writes():
+    global _flush_timer
+    with _pending_lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        touches = list(_pending_last_used.items())
+        notifications = list(_pending_notifications.items())
+        _pending_last_used.clear()
+        _pending_notifications.clear()
+
+    if not touches and not notifications:
+        return
+
+    try:
+        with transaction() as c:
+            c.executemany(
+                "UPDATE passwords SET last_used = ? WHERE id = ?",
+                [(ts, entry_id) for entry_id, ts in touches]
+            )
+            c.executemany(_NOTIFICATION_UPSERT, [row for _key, row in notifications])
+    except sqlite3.Error as e:
+        # Put everything back (newer touches win) and try again later
+        print(f"Database error (flush): {e}")
+        with _pending_lock:
+            for entry_id, ts in touches:
+                _pending_last_used.setdefault(entry_id, ts)
+            _requeue_notifications(notifications)
+            _schedule_flush()
+        raise
+
+def _with_pending_last_used(rows):
+    # Overlay unflushed touches on (id, name, last_modified, last_used) rows
+    with _pending_lock:
+        if not _pending_last_used:
+            return rows
+        pending = dict(_pending_last_used)
+    return [
+        (row[0], row[1], row[2], pending[row[0]]) if row[0] in pending else row
+        for row in rows
+    ]
+
+
+# Registered after close_all_connections so it runs first (atexit is LIFO)
+atexit.register(flush_pending_writes)
+
+
 def init_db():
-    create_user_table()
-    create_master_password_table()
+    # Fast path: an up-to-date vault only pays for one PRAGMA read
+    if migrations.schema_version(get_connection()) >= migrations.LATEST_VERSION:
+        return []
 
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+    with transaction() as c:
+        return migrations.apply_pending(c)
 
-    # Password entries
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS passwords (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT,
-            url TEXT,
-            password TEXT,
-            notes TEXT,
-            folder_id INTEGER,
-            last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
-            is_favourite INTEGER DEFAULT 0,
-            expiry_date DATE,
-            last_modified DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (folder_id) REFERENCES folders(id)
-        )
-    ''')
 
-    # Folders
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS folders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE
-        )
-    ''')
+# Callbacks run with an entry id after that entry is inserted, edited or
+# deleted (e.g. the expiry scheduler re-reading its expiry date)
+_entry_listeners = []
 
-    conn.commit()
-    conn.close()
+def add_entry_listener(callback):
+    _entry_listeners.append(callback)
 
-    ensure_favourite_column()
-    ensure_otp_column()
-    ensure_email_otp_columns()
-    create_notifications_table()
-    ensure_expiry_column()
-    ensure_last_modified_column()
+def remove_entry_listener(callback):
+    if callback in _entry_listeners:
+        _entry_listeners.remove(callback)
 
+def _entry_changed(entry_id):
+    for callback in list(_entry_listeners):
+        try:
+            callback(entry_id)
+        except Exception as e:
+            print(f"Entry listener failed: {e}")
 
-def insert_password_entry(name, email, url, password, notes, folder_id, expiry_date=None):
-    conn = None
-    try:
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
 
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def _invalidate_audit(c, entry_id):
+    # last_modified only has second resolution; dropping the audit row makes
+    # sure an edit in the same second as the last audit is still re-checked
+    c.execute("DELETE FROM audit WHERE entry_id = ?", (entry_id,))
 
-        c.execute("""
-            INSERT INTO passwords 
-            (name, email, url, password, notes, folder_id, expiry_date, last_modified, last_used) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (name, email, url, password, notes, folder_id, expiry_date, now, now))
 
-        conn.commit()
+# Every write of a password takes the data key it was encrypted under, the
+# key_version of the vault key wrapping that (see core.crypto.seal_password)
+# and the password's fingerprint (core.fingerprint). A fingerprint of None
+# means not known yet; the next audit fills it in.
+
+def insert_password_entry(name, email, url, password, notes, folder_id, expiry_date=None, key_version=None,
+                          data_key=None, fingerprint=None):
+    try:
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        with transaction() as c:
+            c.execute("""
+                INSERT INTO passwords
+                (name, email, url, password, notes, folder_id, expiry_date, last_modified, last_used, key_version,
+                 data_key, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (name, email, url, password, notes, folder_id, expiry_date, now, now, key_version, data_key,
+                  fingerprint))
+            entry_id = c.lastrowid
     except sqlite3.Error as e:
         print(f"Database error (insert): {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
-
-def update_password_entry(entry_id, name, email, url, password, notes, folder_id, expiry_date=None):
-    conn = None
+    _entry_changed(entry_id)
+    return entry_id
+
+def insert_password_entries(rows):
+    """Insert many entries in one transaction, in the order given.
+
+    rows are (name, email, url, password, notes, folder_id, expiry_date, is_favourite, key_version, data_key,
+    fingerprint) with the password already encrypted.
+    """
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as c:
+        c.execute("SELECT COALESCE(MAX(id), 0) FROM passwords")
+        last_id = c.fetchone()[0]
+        c.executemany("""
+            INSERT INTO passwords
+            (name, email, url, password, notes, folder_id, expiry_date, is_favourite, key_version, data_key,
+             fingerprint, last_modified, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [row + (now, now) for row in rows])
+        # Listeners need the ids of the entries with an expiry date. Under
+        # the write lock, every id past last_id is one of these rows.
+        c.execute("SELECT id FROM passwords WHERE id > ? AND expiry_date IS NOT NULL ORDER BY id", (last_id,))
+        expiring = [row[0] for row in c.fetchall()]
+    for entry_id in expiring:
+        _entry_changed(entry_id)
+    return len(rows)
+
+# In an update the stored fingerprint stays if the ciphertext is the one
+# already stored (the password wasn't touched), else it takes the new one
+_UPDATE_FINGERPRINT = "fingerprint = CASE WHEN password IS ? THEN fingerprint ELSE ? END"
+
+def update_password_entry(entry_id, name, email, url, password, notes, folder_id, expiry_date=None, key_version=None,
+                          data_key=None, fingerprint=None):
     try:
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
-
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        c.execute("""
-            UPDATE passwords
-            SET name = ?, email = ?, url = ?, password = ?, notes = ?, folder_id = ?, expiry_date = ?, last_modified = ?
-            WHERE id = ?
-        """, (name, email, url, password, notes, folder_id, expiry_date, now, entry_id))
-
-        conn.commit()
+        with transaction() as c:
+            c.execute(f"""
+                UPDATE passwords
+                SET name = ?, email = ?, url = ?, password = ?, notes = ?, folder_id = ?, expiry_date = ?,
+                    last_modified = ?, key_version = ?, data_key = ?, {_UPDATE_FINGERPRINT}
+                WHERE id = ?
+            """, (name, email, url, password, notes, folder_id, expiry_date, now, key_version, data_key,
+                  password, fingerprint, entry_id))
+            _invalidate_audit(c, entry_id)
     except sqlite3.Error as e:
         print(f"Database error (update): {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
+    _entry_changed(entry_id)
 
 
-def log_notification(username, message):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (username, message))
-    conn.commit()
-    conn.close()
+def fetch_password_entry(entry_id):
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT name, email, url, password, notes, expiry_date, is_favourite, key_version, data_key
+        FROM passwords WHERE id = ?
+    """, (entry_id,))
+    return c.fetchone()
+
+def update_password_details(entry_id, name, email, url, password, notes, expiry_date=None, key_version=None,
+                            data_key=None, fingerprint=None):
+    # Edit from the detail window: everything except the folder
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as c:
+        c.execute(f"""
+            UPDATE passwords
+            SET name = ?, email = ?, url = ?, password = ?, notes = ?, expiry_date = ?, key_version = ?, data_key = ?,
+                last_modified = ?, {_UPDATE_FINGERPRINT}
+            WHERE id = ?
+        """, (name, email, url, password, notes, expiry_date, key_version, data_key, now, password, fingerprint,
+              entry_id))
+        _invalidate_audit(c, entry_id)
+    _entry_changed(entry_id)
+
+def delete_password_entry(entry_id):
+    with transaction() as c:
+        c.execute("DELETE FROM passwords WHERE id = ?", (entry_id,))
+        _invalidate_audit(c, entry_id)
+    _entry_changed(entry_id)
 
 
 def fetch_all_passwords():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("SELECT id, name, last_modified, last_used FROM passwords")
-    results = c.fetchall()
-    conn.close()
-    return results
+    c = get_connection().cursor()
+    # Same order as the vault view's default "Name" sort
+    c.execute("SELECT id, name, last_modified, last_used FROM passwords ORDER BY name COLLATE NOCASE")
+    return _with_pending_last_used(c.fetchall())
 
 
-def insert_folder(name):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO folders (name) VALUES (?)", (name,))
-    conn.commit()
-    conn.close()
+def get_setting(key, default=None):
+    c = get_connection().cursor()
+    c.execute("SELECT value FROM settings WHERE key = ?", (key,))
+    row = c.fetchone()
+    return row[0] if row else default
 
-def fetch_folders():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("SELECT id, name FROM folders")
-    folders = c.fetchall()
-    conn.close()
-    return folders
+def set_setting(key, value):
+    with transaction() as c:
+        c.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
 
-def fetch_passwords_by_folder(folder_id):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("SELECT id, name FROM passwords WHERE folder_id = ?", (folder_id,))
-    results = c.fetchall()
-    conn.close()
-    return results
 
-def update_last_used(entry_id):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("UPDATE passwords SET last_used = CURRENT_TIMESTAMP WHERE id = ?", (entry_id,))
-    conn.commit()
-    conn.close()
+def fetch_wrapped_key(username):
+    # (kdf_params, salt, wrapped_key) or None
+    c = get_connection().cursor()
+    c.execute("SELECT kdf_params, salt, wrapped_key FROM vault_keys WHERE username = ?", (username,))
+    return c.fetchone()
 
-def fetch_recent_passwords(limit=10):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+def save_wrapped_key(username, kdf_params, salt, wrapped_key, public_key, key_version):
+    with transaction() as c:
+        c.execute("""
+            INSERT OR REPLACE INTO vault_keys (username, kdf_params, salt, wrapped_key, public_key, key_version)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (username, kdf_params, salt, wrapped_key, public_key, key_version))
+
+def has_wrapped_keys():
+    c = get_connection().cursor()
+    c.execute("SELECT 1 FROM vault_keys LIMIT 1")
+    return c.fetchone() is not None
+
+def count_unwrapped_users():
+    # Users with a master password but no wrapped vault key yet
+    c = get_connection().cursor()
     c.execute("""
-        SELECT id, name, last_modified, last_used
-        FROM passwords
-        WHERE last_used IS NOT NULL
-        ORDER BY datetime(last_used) DESC
-        LIMIT ?
-    """, (limit,))
-    results = c.fetchall()
-    conn.close()
-    return results
+        SELECT COUNT(*) FROM master_password m
+        WHERE NOT EXISTS (SELECT 1 FROM vault_keys k WHERE k.username = m.username)
+    """)
+    return c.fetchone()[0]
 
+def insert_master_password(username, password_hash):
+    with transaction() as c:
+        c.execute("INSERT INTO master_password (username, password_hash) VALUES (?, ?)", (username, password_hash))
 
-def fetch_notifications(username, limit=50):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+def update_master_password_hash(username, password_hash):
+    with transaction() as c:
+        c.execute("UPDATE master_password SET password_hash = ? WHERE username = ?", (password_hash, username))
+
+
+def fetch_key_holders():
+    # (username, public_key, newest key version held or already pending)
+    c = get_connection().cursor()
     c.execute("""
-        SELECT message, timestamp FROM notifications
-        WHERE username = ?
-        ORDER BY timestamp DESC
+        SELECT k.username, k.public_key,
+               MAX(COALESCE(k.key_version, 0), COALESCE(MAX(p.key_version), 0))
+        FROM vault_keys k LEFT JOIN pending_keys p ON p.username = k.username
+        GROUP BY k.username
+    """)
+    return c.fetchall()
+
+def fetch_pending_keys(username):
+    # (key_version, sealed_key) waiting for this user
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT key_version, sealed_key FROM pending_keys
+        WHERE username = ? ORDER BY key_version
+    """, (username,))
+    return c.fetchall()
+
+def save_pending_key(username, key_version, sealed_key):
+    with transaction() as c:
+        c.execute("""
+            INSERT OR REPLACE INTO pending_keys (username, key_version, sealed_key)
+            VALUES (?, ?, ?)
+        """, (username, key_version, sealed_key))
+
+def delete_pending_keys(username):
+    with transaction() as c:
+        c.execute("DELETE FROM pending_keys WHERE username = ?", (username,))
+
+def fetch_key_versions_in_use():
+    # One index seek per distinct version instead of a scan
+    c = get_connection().cursor()
+    versions = []
+    c.execute("SELECT MIN(key_version) FROM passwords")
+    version = c.fetchone()[0]
+    while version is not None:
+        versions.append(version)
+        c.execute("SELECT MIN(key_version) FROM passwords WHERE key_version > ?", (version,))
+        version = c.fetchone()[0]
+    return versions
+
+def count_entries_by_key_version():
+    c = get_connection().cursor()
+    return {version: c.execute("SELECT COUNT(*) FROM passwords WHERE key_version = ?", (version,)).fetchone()[0]
+            for version in fetch_key_versions_in_use()}
+
+def fetch_entries_for_rotation(key_version, after_id=0, limit=1000):
+    # (id, data_key) with the data key still wrapped under key_version, in id order
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT id, data_key FROM passwords
+        WHERE key_version = ? AND id > ? AND typeof(data_key) = 'blob'
+        ORDER BY id
         LIMIT ?
-    """, (username, limit))
-    result = c.fetchall()
-    conn.close()
-    return result
+    """, (key_version, after_id, limit))
+    return c.fetchall()
+
+def save_rotated_entries(rows, old_version, new_version):
+    # rows are (id, new_data_key). An entry edited since it was read is
+    # already on the new key, so the version check makes the update a no-op.
+    with transaction() as c:
+        c.executemany("""
+            UPDATE passwords SET data_key = ?, key_version = ?
+            WHERE id = ? AND key_version = ?
+        """, [(data_key, new_version, entry_id, old_version) for entry_id, data_key in rows])
+
+# Rows still in a Fernet TEXT format: encrypted directly under the vault key
+# (no data key) or under a TEXT data key. Matches idx_passwords_legacy.
+_LEGACY_ROW = "(data_key IS NULL OR typeof(data_key) = 'text')"
+
+def count_legacy_entries(min_version=0):
+    c = get_connection().cursor()
+    c.execute(f"SELECT COUNT(*) FROM passwords WHERE {_LEGACY_ROW} AND key_version >= ?", (min_version,))
+    return c.fetchone()[0]
+
+def fetch_legacy_entries(key_version, after_id=0, limit=1000):
+    # (id, password, data_key) in a legacy format under key_version, in id order
+    c = get_connection().cursor()
+    c.execute(f"""
+        SELECT id, password, data_key FROM passwords
+        WHERE key_version = ? AND id > ? AND {_LEGACY_ROW}
+        ORDER BY id
+        LIMIT ?
+    """, (key_version, after_id, limit))
+    return c.fetchall()
 
+def save_resealed_entries(rows, old_version, new_version):
+    # rows are (id, new_password, data_key); same optimistic check as above
+    with transaction() as c:
+        c.executemany(f"""
+            UPDATE passwords SET password = ?, data_key = ?, key_version = ?
+            WHERE id = ? AND key_version = ? AND {_LEGACY_ROW}
+        """, [(password, data_key, new_version, entry_id, old_version) for entry_id, password, data_key in rows])
 
-def ensure_favourite_column():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(passwords)")
-    columns = [col[1] for col in c.fetchall()]
+def vacuum():
+    # Give back the pages freed by shrinking rows; needs no open transaction
+    get_connection().execute("VACUUM")
 
-    if "last_modified" not in columns:
-        # Step 1: Add the column with no default
-        c.execute("ALTER TABLE passwords ADD COLUMN last_modified TEXT")
 
-        # Step 2: Manually set all existing rows to now
-        from datetime import datetime
-        now = datetime.now().isoformat()
-        c.execute("UPDATE passwords SET last_modified = ?", (now,))
+UNLOCK_TIMINGS_KEPT = 200
 
-    conn.commit()
-    conn.close()
+def log_unlock_timing(username, kdf_params, kdf_ms, total_ms):
+    with transaction() as c:
+        c.execute("""
+            INSERT INTO unlock_timings (username, kdf_params, kdf_ms, total_ms)
+            VALUES (?, ?, ?, ?)
+        """, (username, kdf_params, kdf_ms, total_ms))
+        c.execute("""
+            DELETE FROM unlock_timings
+            WHERE id <= (SELECT MAX(id) FROM unlock_timings) - ?
+        """, (UNLOCK_TIMINGS_KEPT,))
 
-def set_favourite(entry_id, value=True):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("UPDATE passwords SET is_favourite = ? WHERE id = ?", (1 if value else 0, entry_id))
-    conn.commit()
-    conn.close()
+def fetch_unlock_timings(limit=UNLOCK_TIMINGS_KEPT):
+    # (username, kdf_params, kdf_ms, total_ms, timestamp), newest first
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT username, kdf_params, kdf_ms, total_ms, timestamp
+        FROM unlock_timings
+        ORDER BY id DESC
+        LIMIT ?
+    """, (limit,))
+    return c.fetchall()
 
-def fetch_favourites():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("SELECT id, name FROM passwords WHERE is_favourite = 1")
-    results = c.fetchall()
-    conn.close()
-    return results
 
-def ensure_otp_column():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(users)")
-    columns = [col[1] for col in c.fetchall()]
-    if "otp_secret" not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN otp_secret TEXT")
-        conn.commit()
-    conn.close()
+def insert_folder(name):
+    with transaction() as c:
+        c.execute("INSERT INTO folders (name) VALUES (?)", (name,))
+
+def ensure_folders(names):
+    # name -> id for each folder, creating any that don't exist yet
+    names = list(names)
+    with transaction() as c:
+        c.executemany("INSERT OR IGNORE INTO folders (name) VALUES (?)", [(name,) for name in names])
+        placeholders = ", ".join("?" for _ in names)
+        c.execute(f"SELECT name, id FROM folders WHERE name IN ({placeholders})", names)
+        return dict(c.fetchall())
 
-def create_user_table():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            email TEXT UNIQUE,
-            password BLOB,
-            is_verified INTEGER DEFAULT 0,
-            otp_secret TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+def fetch_folders():
+    c = get_connection().cursor()
+    c.execute("SELECT id, name FROM folders")
+    return c.fetchall()
 
-def ensure_email_otp_columns():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+def fetch_passwords_by_folder(folder_id):
+    c = get_connection().cursor()
+    c.execute("SELECT id, name FROM passwords WHERE folder_id = ? ORDER BY name COLLATE NOCASE", (folder_id,))
+    return c.fetchall()
 
-    # Get all column names in users table
-    c.execute("PRAGMA table_info(users)")
-    columns = [col[1] for col in c.fetchall()]
+def fetch_recent_passwords(limit=10):
+    with _pending_lock:
+        pending = dict(_pending_last_used)
 
-    # Add missing columns
-    if 'otp_code' not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN otp_code TEXT")
-    if 'otp_expiry' not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN otp_expiry DATETIME")
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT id, name, last_modified, last_used
+        FROM passwords
+        WHERE last_used IS NOT NULL
+        ORDER BY last_used DESC
+        LIMIT ?
+    """, (limit,))
+    rows = c.fetchall()
+    if not pending:
+        return rows
+
+    # Entries touched since the last flush may not be in the top `limit` yet
+    listed = {row[0] for row in rows}
+    missing = [entry_id for entry_id in pending if entry_id not in listed]
+    if missing:
+        placeholders = ", ".join("?" for _ in missing)
+        c.execute(f"SELECT id, name, last_modified, last_used FROM passwords WHERE id IN ({placeholders})", missing)
+        rows += c.fetchall()
+
+    rows = [
+        (row[0], row[1], row[2], pending.get(row[0], row[3]))
+        for row in rows
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
+
+
+NOTIFICATION_PAGE_SIZE = 50
+# View events older than this are rolled up into one count per user per day
+NOTIFICATION_VIEW_RETENTION_DAYS = 30
+# Anything older than this is dropped
+NOTIFICATION_MAX_AGE_DAYS = 365
+
+def fetch_notifications(username, after=None, limit=NOTIFICATION_PAGE_SIZE):
+    """Return (rows, next_token) for one page of a user's notifications, newest first.
+
+    rows are (id, message, timestamp, count). Pass next_token back as `after`
+    for the following page; it is None once there are no more.
+    """
+    if after is None:
+        # Buffered events may update rows already on the first page
+        flush_pending_writes()
+
+    c = get_connection().cursor()
+    if after is None:
+        c.execute("""
+            SELECT id, message, timestamp, count FROM notifications
+            WHERE username = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (username, limit))
+    else:
+        c.execute("""
+            SELECT id, message, timestamp, count FROM notifications
+            WHERE username = ? AND timestamp <= ? AND (timestamp < ? OR id < ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (username, after[0], after[0], after[1], limit))
+    rows = c.fetchall()
 
-    conn.commit()
-    conn.close()
+    next_token = None
+    if len(rows) == limit:
+        next_token = (rows[-1][2], rows[-1][0])
+    return rows, next_token
 
-def create_notifications_table():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS notifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            message TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+def compact_notifications(today=None):
+    """Roll old view events into daily counts and drop expired notifications.
 
-def ensure_expiry_column():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+    Returns (rows_compacted, rows_deleted).
+    """
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    view_cutoff = (today - datetime.timedelta(days=NOTIFICATION_VIEW_RETENTION_DAYS)).isoformat()
+    age_cutoff = (today - datetime.timedelta(days=NOTIFICATION_MAX_AGE_DAYS)).isoformat()
 
-    # Check if 'expiry_date' column exists
-    c.execute("PRAGMA table_info(passwords)")
-    columns = [col[1] for col in c.fetchall()]
-    if 'expiry_date' not in columns:
-        c.execute("ALTER TABLE passwords ADD COLUMN expiry_date DATE")
-        conn.commit()
+    with transaction() as c:
+        c.execute("""
+            INSERT INTO notifications (username, kind, day, message, count, timestamp)
+            SELECT username, 'views', day,
+                   printf('Viewed passwords %d time(s)', SUM(count)),
+                   SUM(count), MAX(timestamp)
+            FROM notifications
+            WHERE kind = 'view' AND day < ?
+            GROUP BY username, day
+        """, (view_cutoff,))
+        c.execute("DELETE FROM notifications WHERE kind = 'view' AND day < ?", (view_cutoff,))
+        compacted = c.rowcount
+        c.execute("DELETE FROM notifications WHERE day < ?", (age_cutoff,))
+        deleted = c.rowcount
+    return compacted, deleted
 
-    conn.close()
+
+def set_favourite(entry_id, value=True):
+    with transaction() as c:
+        c.execute("UPDATE passwords SET is_favourite = ? WHERE id = ?", (1 if value else 0, entry_id))
+
+def fetch_favourites():
+    c = get_connection().cursor()
+    c.execute("SELECT id, name FROM passwords WHERE is_favourite = 1")
+    return c.fetchall()
+
+EXPIRY_WARNING_DAYS = 7
 
 def get_expiring_passwords(username):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+    # expiry_date is stored as 'YYYY-MM-DD', so the window is a plain range
+    # scan on idx_passwords_expiry instead of parsing every row in Python
     today = datetime.date.today()
-    warning_day = today + datetime.timedelta(days=7)
+    warning_day = today + datetime.timedelta(days=EXPIRY_WARNING_DAYS)
 
+    c = get_connection().cursor()
     c.execute("""
-        SELECT name, expiry_date FROM passwords
-        WHERE expiry_date IS NOT NULL
-    """)
-    rows = c.fetchall()
-    conn.close()
+        SELECT name, CASE WHEN expiry_date < ? THEN 'expired' ELSE 'soon' END
+        FROM passwords
+        WHERE expiry_date IS NOT NULL AND expiry_date <= ?
+        ORDER BY expiry_date
+    """, (today.isoformat(), warning_day.isoformat()))
+    return c.fetchall()
+
+def fetch_expiries_between(start, end):
+    # (id, name, expiry_date) for expiry dates in (start, end]; start=None means no lower bound
+    c = get_connection().cursor()
+    if start is None:
+        c.execute("""
+            SELECT id, name, expiry_date FROM passwords
+            WHERE expiry_date IS NOT NULL AND expiry_date <= ?
+        """, (end.isoformat(),))
+    else:
+        c.execute("""
+            SELECT id, name, expiry_date FROM passwords
+            WHERE expiry_date > ? AND expiry_date <= ?
+        """, (start.isoformat(), end.isoformat()))
+    return c.fetchall()
 
-    results = []
-    for name, date_str in rows:
-        try:
-            expiry = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-            if expiry < today:
-                results.append((name, "expired"))
-            elif expiry <= warning_day:
-                results.append((name, "soon"))
-        except Exception:
-            continue
-    return results
-
-def ensure_last_modified_column():
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+def fetch_expiry(entry_id):
+    c = get_connection().cursor()
+    c.execute("SELECT id, name, expiry_date FROM passwords WHERE id = ?", (entry_id,))
+    return c.fetchone()
 
-    # Ensure column exists
-    c.execute("PRAGMA table_info(passwords)")
-    columns = [col[1] for col in c.fetchall()]
-    if 'last_modified' not in columns:
-        c.execute("ALTER TABLE passwords ADD COLUMN last_modified DATETIME")
 
-    # Update any NULL values with current timestamp
-    c.execute("""
-        UPDATE passwords
-        SET last_modified = datetime('now')
-        WHERE last_modified IS NULL
+# Vault health audit (see core.audit). An entry needs auditing when it has
+# no audit row yet or its last_modified no longer matches the audited one.
+_NEEDS_AUDIT = "(a.entry_id IS NULL OR a.last_modified IS NOT p.last_modified)"
+
+def count_entries_to_audit():
+    c = get_connection().cursor()
+    c.execute(f"""
+        SELECT COUNT(*) FROM passwords p LEFT JOIN audit a ON a.entry_id = p.id
+        WHERE {_NEEDS_AUDIT}
     """)
+    return c.fetchone()[0]
 
-    conn.commit()
-    conn.close()
+def fetch_entries_to_audit(after_id=0, limit=1000):
+    # (id, name, email, url, password, data_key, key_version, last_modified) in id order
+    c = get_connection().cursor()
+    c.execute(f"""
+        SELECT p.id, p.name, p.email, p.url, p.password, p.data_key, p.key_version, p.last_modified
+        FROM passwords p LEFT JOIN audit a ON a.entry_id = p.id
+        WHERE p.id > ? AND {_NEEDS_AUDIT}
+        ORDER BY p.id
+        LIMIT ?
+    """, (after_id, limit))
+    return c.fetchall()
+
+def save_audit_results(rows):
+    # rows are (entry_id, password, last_modified, score, guesses, warning,
+    # breached, fingerprint) with the ciphertext and last_modified as read.
+    # An entry whose ciphertext has changed since is skipped and stays pending;
+    # a missing fingerprint (unreadable entry) keeps the one already stored.
+    with transaction() as c:
+        for entry_id, password, last_modified, score, guesses, warning, breached, fingerprint in rows:
+            c.execute("UPDATE passwords SET fingerprint = COALESCE(?, fingerprint) WHERE id = ? AND password IS ?",
+                      (fingerprint, entry_id, password))
+            if not c.rowcount:
+                continue
+            c.execute("""
+                INSERT OR REPLACE INTO audit (entry_id, last_modified, score, guesses, warning, breached,
+                                              audited_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (entry_id, last_modified, score, guesses, warning, breached))
+
+def clear_audit():
+    with transaction() as c:
+        c.execute("DELETE FROM audit")
+
+def fetch_audit_issues(weak_score, modified_before, expiring_by):
+    """Audited entries with something wrong, by name.
+
+    Rows are (id, name, score, warning, last_modified, expiry_date, uses,
+    breached): score is None for an entry that couldn't be decrypted, uses
+    is the number of entries sharing its password (None if it isn't reused)
+    and breached the times it was seen in the breach corpus. An entry is
+    listed if it is weak (score <= weak_score), reused, breached, last
+    modified before modified_before, or expires by expiring_by.
+    """
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT a.entry_id, p.name, a.score, a.warning, p.last_modified, p.expiry_date, r.uses, a.breached
+        FROM audit a
+        JOIN passwords p ON p.id = a.entry_id
+        LEFT JOIN (
+            SELECT fingerprint, COUNT(*) AS uses FROM passwords
+            WHERE fingerprint IS NOT NULL
+            GROUP BY fingerprint HAVING COUNT(*) > 1
+        ) r ON r.fingerprint = p.fingerprint
+        WHERE a.score IS NULL OR a.score <= ? OR r.uses IS NOT NULL OR a.breached > 0
+              OR p.last_modified < ? OR p.expiry_date <= ?
+        ORDER BY p.name COLLATE NOCASE, p.id
+    """, (weak_score, modified_before, expiring_by))
+    return c.fetchall()
+
+def fetch_entries_by_fingerprint(fingerprint, exclude_id=None):
+    # (id, name) of the entries with this password fingerprint
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT id, name FROM passwords
+        WHERE fingerprint = ? AND id IS NOT ?
+        ORDER BY name COLLATE NOCASE
+    """, (fingerprint, exclude_id))
+    return c.fetchall()
 
+def count_audited_entries():
+    c = get_connection().cursor()
+    c.execute("SELECT COUNT(*) FROM audit a JOIN passwords p ON p.id = a.entry_id")
+    return c.fetchone()[0]
 
 def fetch_all_passwords_sorted(method="Name"):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+    if method == "Last Used":
+        flush_pending_writes()
+    c = get_connection().cursor()
 
     order_map = {
         "Name": "name COLLATE NOCASE",
@@ -360,13 +800,12 @@ def fetch_all_passwords_sorted(method="Name"):
 
     order_by = order_map.get(method, "name COLLATE NOCASE")
     c.execute(f"SELECT id, name, last_modified, last_used FROM passwords ORDER BY {order_by}")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return _with_pending_last_used(c.fetchall())
 
 def fetch_passwords_by_folder_sorted(folder_id, method="Name"):
-    conn = sqlite3.connect("vault.db")
-    c = conn.cursor()
+    if method == "Last Used":
+        flush_pending_writes()
+    c = get_connection().cursor()
 
     order_map = {
         "Name": "name COLLATE NOCASE",
@@ -381,12 +820,140 @@ def fetch_passwords_by_folder_sorted(folder_id, method="Name"):
         WHERE folder_id = ?
         ORDER BY {order_by}
     """, (folder_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-
-
-
-
-
+    return _with_pending_last_used(c.fetchall())
+
+
+# Keyset pagination: each page seeks past the last (sort key, id) of the
+# previous one, so page N costs the same as page 1 however deep the list goes.
+PAGE_SIZE = 200
+
+PAGE_ORDERS = {
+    # method: (column, collation, direction, index of the key in a result row)
+    "Name": ("name", " COLLATE NOCASE", "ASC", 1),
+    "Last Modified": ("last_modified", "", "DESC", 2),
+    "Last Used": ("last_used", "", "DESC", 3),
+}
+
+def fetch_passwords_page(method="Name", folder_id=None, after=None, page_size=PAGE_SIZE):
+    """Return (rows, next_token) for one page of the vault listing.
+
+    rows are (id, name, last_modified, last_used) like fetch_all_passwords_sorted.
+    Pass next_token back as `after` to get the following page; it is None
+    once the listing is exhausted.
+    """
+    column, collate, direction, key_index = PAGE_ORDERS.get(method, PAGE_ORDERS["Name"])
+    key = column + collate
+    if column == "last_used":
+        # The order itself depends on the buffered touches
+        flush_pending_writes()
+    cmp = ">" if direction == "ASC" else "<"
+
+    # NULL keys sort first ascending and last descending, and never compare
+    # with (key, id) > (?, ?), so they are paged as a separate run by id.
+    runs = ["null", "value"] if direction == "ASC" else ["value", "null"]
+    if after is not None:
+        runs = runs[runs.index("null" if after[0] is None else "value"):]
+
+    c = get_connection().cursor()
+    rows = []
+    for run in runs:
+        where = []
+        params = []
+        if folder_id is not None:
+            where.append("folder_id = ?")
+            params.append(folder_id)
+
+        if run == "null":
+            where.append(f"{column} IS NULL")
+            if after is not None and after[0] is None:
+                where.append(f"id {cmp} ?")
+                params.append(after[1])
+        else:
+            where.append(f"{column} IS NOT NULL")
+            if after is not None and after[0] is not None:
+                where.append(f"{key} {cmp}= ? AND ({key} {cmp} ? OR id {cmp} ?)")
+                params += [after[0], after[0], after[1]]
+
+        c.execute(f"""
+            SELECT id, name, last_modified, last_used
+            FROM passwords
+            WHERE {" AND ".join(where)}
+            ORDER BY {key} {direction}, id {direction}
+            LIMIT ?
+        """, params + [page_size - len(rows)])
+        rows += c.fetchall()
+
+        if len(rows) >= page_size:
+            break
+        # The next run starts from its beginning
+        after = None
+
+    next_token = None
+    if len(rows) == page_size:
+        last = rows[-1]
+        next_token = (last[key_index], last[0])
+    return _with_pending_last_used(rows), next_token
+
+def iter_export_rows(page_size=PAGE_SIZE):
+    """Yield every entry with its folder name, one id-ordered page at a time.
+
+    Rows are (id, name, email, url, password, notes, folder, expiry_date, is_favourite, key_version, data_key)
+    with the password still encrypted.
+    """
+    c = get_connection().cursor()
+    last_id = 0
+    while True:
+        c.execute("""
+            SELECT p.id, p.name, p.email, p.url, p.password, p.notes, f.name, p.expiry_date, p.is_favourite,
+                   p.key_version, p.data_key
+            FROM passwords p
+            LEFT JOIN folders f ON f.id = p.folder_id
+            WHERE p.id > ?
+            ORDER BY p.id
+            LIMIT ?
+        """, (last_id, page_size))
+        rows = c.fetchall()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][0]
+
+
+# Full-text search over name, email, url and notes (see migrations._search_index)
+SEARCH_LIMIT = 50
+SEARCH_CANDIDATES = 2000
+
+def build_search_query(text):
+    # Every word must match, as a prefix, in any indexed column. Words are
+    # quoted so FTS5 operators and punctuation in user input are literal.
+    terms = []
+    for word in text.split():
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    return " ".join(terms)
+
+def search_passwords(text, limit=SEARCH_LIMIT):
+    match = build_search_query(text)
+    if not match:
+        return []
+
+    # Score at most SEARCH_CANDIDATES matches (newest first) and join only the
+    # rows that survive the LIMIT. bm25 costs about a microsecond per match, so
+    # a one-letter prefix over a large vault would otherwise score every row.
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT p.id, p.name, p.last_modified, p.last_used
+        FROM (
+            SELECT rowid, rank FROM (
+                SELECT rowid, rank FROM passwords_fts
+                WHERE passwords_fts MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            )
+            ORDER BY rank
+            LIMIT ?
+        ) AS hits
+        JOIN passwords p ON p.id = hits.rowid
+        ORDER BY hits.rank
+    """, (match, SEARCH_CANDIDATES, limit))
+    return _with_pending_last_used(c.fetchall())
@@ -1,19 +1,327 @@
-import smtplib
-from email.mime.text import MIMEText
-
-def send_otp_email(to_email, otp_code):
-    msg = MIMEText(f"Your OTP code is: {otp_code}")
-    msg['Subject'] = "Your Login OTP"
-    msg['From'] = "pmsotpsender123@gmail.com"
-    msg['To'] = to_email
-
-    # Replace with real SMTP creds or use environment variables
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-    sender_email = "pmsotpsender123@gmail.com"
-    sender_password = "zbbk damu moxx wlwu"
-
-    with smtplib.SMTP(smtp_server, smtp_port) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
+"""Background delivery of OTP emails.
+
+send_otp_email() only queues the message and returns a Delivery; a single
+mailer thread sends the queue over one SMTP session that it keeps open
+between messages, so only the first code pays for the connection, STARTTLS
+and login. A session that dropped while idle is reopened straight away;
+other temporary failures (connection refused, timeouts, 4xx replies) are
+retried after RETRY_DELAYS, and permanent ones (5xx, bad credentials) fail
+at once. Each change of a Delivery's status is passed to its on_status
+callback on the mailer thread. A newer message queued under the same key
+(the username, for OTP codes) replaces an older one still waiting, since
+only the latest code is valid.
+
+The SMTP server is configured from the environment:
+
+    VAULT_SMTP_HOST       server name; email is disabled without it
+    VAULT_SMTP_PORT       default 587, 465 with ssl, 25 with none
+    VAULT_SMTP_SECURITY   starttls (default), ssl or none
+    VAULT_SMTP_USER       login, if the server needs one
+    VAULT_SMTP_PASSWORD
+    VAULT_SMTP_FROM       sender address, default VAULT_SMTP_USER or
+                          noreply@ the host
+    VAULT_SMTP_TIMEOUT    seconds, default 10
+"""
+import collections
+import os
+import threading
+import time
+
+ENV_PREFIX = "VAULT_SMTP_"
+SECURITY_MODES = {"starttls": 587, "ssl": 465, "none": 25}
+DEFAULT_TIMEOUT = 10
+RETRY_DELAYS = (1, 2, 4, 8)     # seconds before each retry
+IDLE_TIMEOUT = 60               # close the session after this long unused
+
+QUEUED = "queued"
+SENDING = "sending"
+RETRYING = "retrying"
+SENT = "sent"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+
+
+class EmailConfigError(ValueError):
+    pass
+
+
+class SmtpConfig:
+    """Where and how to send mail; see from_env."""
+
+    def __init__(self, host, port=None, security="starttls", username=None, password=None, sender=None,
+                 timeout=DEFAULT_TIMEOUT):
+        if security not in SECURITY_MODES:
+            raise EmailConfigError(f"SMTP security must be one of {', '.join(SECURITY_MODES)}")
+        self.host = host
+        self.port = port or SECURITY_MODES[security]
+        self.security = security
+        self.username = username
+        self.password = password
+        self.sender = sender or username or f"noreply@{host}"
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """The configuration in VAULT_SMTP_*, or None if no host is set."""
+        env = os.environ if environ is None else environ
+
+        def get(name, default=None):
+            return env.get(ENV_PREFIX + name, "").strip() or default
+
+        host = get("HOST")
+        if not host:
+            return None
+        try:
+            port = int(get("PORT", 0))
+            timeout = float(get("TIMEOUT", DEFAULT_TIMEOUT))
+        except ValueError:
+            raise EmailConfigError(f"{ENV_PREFIX}PORT and {ENV_PREFIX}TIMEOUT must be numbers")
+        # The password is taken as is; it may legitimately start or end with spaces
+        return cls(host, port, get("SECURITY", "starttls").lower(), get("USER"),
+                   env.get(ENV_PREFIX + "PASSWORD") or None, get("FROM"), timeout)
+
+
+class Delivery:
+    """Progress of one queued message."""
+
+    def __init__(self, to, key=None, on_status=None):
+        self.to = to
+        self.key = key
+        self.on_status = on_status
+        self.status = QUEUED
+        self.attempts = 0
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (SENT, FAILED, SUPERSEDED)
+
+    def wait(self, timeout=None) -> bool:
+        """Block until sent, failed or superseded; False on timeout."""
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return f"Delivery({self.to!r}, {self.status}, attempts={self.attempts})"
+
+
+class Mailer(threading.Thread):
+    """Sends queued messages over one reused SMTP session."""
+
+    def __init__(self, config):
+        super().__init__(daemon=True)
+        self.config = config
+        self.sent = 0
+        self.connections = 0
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._smtp = None
+        self._last_used = 0.0
+
+    def submit(self, message, to, key=None, on_status=None) -> Delivery:
+        delivery = Delivery(to, key, on_status)
+        superseded = []
+        with self._cond:
+            if key is not None:
+                superseded = [(m, d) for m, d in self._queue if d.key == key]
+                for job in superseded:
+                    self._queue.remove(job)
+            self._queue.append((message, delivery))
+            self._cond.notify()
+        for _message, old in superseded:
+            self._set_status(old, SUPERSEDED)
+        self._set_status(delivery, QUEUED)
+        return delivery
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.join()
+
+    def run(self):
+        try:
+            while True:
+                with self._cond:
+                    if not self._queue and not self._stopping:
+                        self._cond.wait(IDLE_TIMEOUT if self._smtp else None)
+                    if self._stopping:
+                        break
+                    job = self._queue.popleft() if self._queue else None
+                if job is not None:
+                    self._deliver(*job)
+                elif self._smtp is not None and time.monotonic() - self._last_used >= IDLE_TIMEOUT:
+                    # Outside the lock: QUIT can take a while and submit() mustn't wait for it
+                    self._disconnect(quit=True)
+        finally:
+            self._disconnect(quit=True)
+            with self._cond:
+                left, self._queue = list(self._queue), collections.deque()
+            for _message, delivery in left:
+                delivery.error = "Mailer stopped"
+                self._set_status(delivery, FAILED)
+
+    def _deliver(self, message, delivery):
+        import smtplib
+
+        retries = iter(RETRY_DELAYS)
+        while True:
+            reused = self._smtp is not None
+            delivery.attempts += 1
+            self._set_status(delivery, SENDING)
+            try:
+                if self.config is None:
+                    raise EmailConfigError(f"Email is not set up; set {ENV_PREFIX}HOST")
+                smtp = self._connect()
+                smtp.send_message(message)
+                self._last_used = time.monotonic()
+                self.sent += 1
+                self._set_status(delivery, SENT)
+                return
+            except Exception as e:
+                # A refused message leaves the session usable; anything else may not
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)) \
+                        or getattr(e, "smtp_code", None) == 421:
+                    self._disconnect()
+                delivery.error = _describe(e)
+                if reused and isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)):
+                    # The kept session went away while idle; reopen it without waiting
+                    delivery.attempts -= 1
+                    continue
+                delay = next(retries, None) if _is_temporary(e) else None
+                if delay is None:
+                    self._set_status(delivery, FAILED)
+                    return
+                self._set_status(delivery, RETRYING)
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopping or self._has_newer(delivery), delay)
+                    stopping, newer = self._stopping, self._has_newer(delivery)
+                if stopping or newer:
+                    self._set_status(delivery, SUPERSEDED if newer else FAILED)
+                    return
+
+    def _has_newer(self, delivery):
+        return delivery.key is not None and any(d.key == delivery.key for _m, d in self._queue)
+
+    def _connect(self):
+        import smtplib
+        import ssl
+
+        if self._smtp is not None and time.monotonic() - self._last_used < IDLE_TIMEOUT:
+            return self._smtp
+        self._disconnect(quit=True)
+        config = self.config
+        if config.security == "ssl":
+            smtp = smtplib.SMTP_SSL(config.host, config.port, timeout=config.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
+        try:
+            if config.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+            if config.username:
+                smtp.login(config.username, config.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self.connections += 1
+        self._smtp = smtp
+        return smtp
+
+    def _disconnect(self, quit=False):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            if quit:
+                smtp.quit()
+        except Exception:
+            pass
+        finally:
+            smtp.close()
+
+    def _set_status(self, delivery, status):
+        delivery.status = status
+        if delivery.done:
+            delivery._done.set()
+        if delivery.on_status:
+            try:
+                delivery.on_status(delivery)
+            except Exception as e:
+                # e.g. the window it reports to has been closed
+                print(f"Email status callback failed: {e}")
+
+
+def _is_temporary(error):
+    import smtplib
+    import ssl
+
+    if isinstance(error, (EmailConfigError, ssl.SSLCertVerificationError, smtplib.SMTPAuthenticationError,
+                          smtplib.SMTPNotSupportedError)):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _msg in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+def _describe(error):
+    import smtplib
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        # One recipient per OTP message; its reply says why
+        code, text = next(iter(error.recipients.values()))
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code, text = error.smtp_code, error.smtp_error
+    else:
+        return str(error) or type(error).__name__
+    return f"{code} {text.decode(errors='replace') if isinstance(text, bytes) else text}"
+
+
+def otp_message(to_email, otp_code, sender):
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["Subject"] = "Your Login OTP"
+    msg["From"] = sender
+    msg["To"] = to_email
+    msg.set_content(f"Your OTP code is: {otp_code}")
+    return msg
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
+def get_mailer() -> Mailer:
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            try:
+                config = SmtpConfig.from_env()
+            except EmailConfigError as e:
+                print(f"Email disabled: {e}")
+                config = None
+            _mailer = Mailer(config)
+            _mailer.start()
+        return _mailer
+
+def stop_mailer():
+    global _mailer
+    with _mailer_lock:
+        mailer, _mailer = _mailer, None
+    if mailer is not None:
+        mailer.stop()
+
+
+def send_otp_email(to_email, otp_code, on_status=None, key=None) -> Delivery:
+    """Queue an OTP email; returns at once with its Delivery.
+
+    on_status(delivery) is called on the mailer thread each time the
+    delivery's status changes. A later code queued under the same key
+    replaces this one if it hasn't been sent yet.
+    """
+    mailer = get_mailer()
+    sender = mailer.config.sender if mailer.config else ""
+    return mailer.submit(otp_message(to_email, otp_code, sender), to_email, key, on_status)
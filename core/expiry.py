@@ -0,0 +1,186 @@
+import datetime
+import threading
+
+from core.db import (
+    EXPIRY_WARNING_DAYS, add_entry_listener, remove_entry_listener,
+    fetch_expiries_between, fetch_expiry, queue_notification,
+)
+
+# Day-granularity hashed timing wheel. Slot = day ordinal % WHEEL_DAYS, so an
+# event lands in its slot in O(1) and each midnight tick only looks at one
+# slot. Expiry dates further out than the wheel covers are not loaded at all
+# until the wheel turns far enough to reach them.
+WHEEL_DAYS = 64
+
+SOON = "soon"
+EXPIRED = "expired"
+
+MESSAGES = {
+    SOON: "Password for '{name}' is expiring soon.",
+    EXPIRED: "Password for '{name}' has expired.",
+}
+
+
+def _parse_date(value):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class ExpiryScheduler:
+    """Fires expiry notifications as entries cross the "soon" and "expired" days.
+
+    Upcoming expiries are read once (an indexed range query) when the
+    scheduler starts, then a timer fires at each local midnight. Edits reach
+    the scheduler through core.db's entry listeners, so nothing rescans the
+    table when the home window is rebuilt.
+    """
+
+    def __init__(self, username, on_event=None):
+        self.username = username
+        self.on_event = on_event or self.log_event
+        self._slots = [[] for _ in range(WHEEL_DAYS)]
+        self._versions = {}       # entry_id -> version; stale events are skipped
+        self._today = None
+        self._loaded_until = None  # expiry dates <= this are on the wheel
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def start(self, today=None):
+        with self._lock:
+            self._today = today or datetime.date.today()
+            self._loaded_until = self._today + datetime.timedelta(days=self._span())
+            fired = []
+            for entry_id, name, expiry_date in fetch_expiries_between(None, self._loaded_until):
+                fired += self._schedule_entry(entry_id, name, _parse_date(expiry_date))
+            add_entry_listener(self.entry_changed)
+            self._arm_timer()
+        self._emit(fired)
+        return fired
+
+    def stop(self):
+        remove_entry_listener(self.entry_changed)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def advance(self, today=None):
+        # Process every day between the last tick and today, inclusive
+        today = today or datetime.date.today()
+        fired = []
+        with self._lock:
+            while self._today < today:
+                self._today += datetime.timedelta(days=1)
+                fired += self._fire_slot(self._today)
+                fired += self._load_next_day()
+        self._emit(fired)
+        return fired
+
+    def entry_changed(self, entry_id):
+        row = fetch_expiry(entry_id)
+        with self._lock:
+            self._versions[entry_id] = self._versions.get(entry_id, 0) + 1
+            if row is None:
+                return  # Deleted: its old events are now stale
+            _, name, expiry_date = row
+            expiry = _parse_date(expiry_date)
+            if expiry is None or expiry > self._loaded_until:
+                return  # Picked up when the wheel reaches it
+            fired = self._schedule_entry(entry_id, name, expiry)
+        self._emit(fired)
+
+    def log_event(self, entry_id, name, kind):
+        queue_notification(self.username, MESSAGES[kind].format(name=name), entry_id, kind)
+
+    def _span(self):
+        # A "soon" event sits EXPIRY_WARNING_DAYS before the expiry date, so
+        # loading expiries that far ahead keeps every event within one turn
+        return WHEEL_DAYS - 1 - EXPIRY_WARNING_DAYS
+
+    def _schedule_entry(self, entry_id, name, expiry):
+        """Place an entry's events on the wheel; return any that are due now."""
+        if expiry is None:
+            return []
+        version = self._versions.get(entry_id, 0)
+        soon_day = expiry - datetime.timedelta(days=EXPIRY_WARNING_DAYS)
+        expired_day = expiry + datetime.timedelta(days=1)
+
+        due = []
+        if expired_day <= self._today:
+            due.append((entry_id, name, EXPIRED))
+        else:
+            if soon_day <= self._today:
+                due.append((entry_id, name, SOON))
+            else:
+                self._add(soon_day, entry_id, version, name, SOON)
+            self._add(expired_day, entry_id, version, name, EXPIRED)
+        return due
+
+    def _add(self, day, entry_id, version, name, kind):
+        self._slots[day.toordinal() % WHEEL_DAYS].append((day, entry_id, version, name, kind))
+
+    def _fire_slot(self, day):
+        slot = self._slots[day.toordinal() % WHEEL_DAYS]
+        due = []
+        keep = []
+        for event in slot:
+            event_day, entry_id, version, name, kind = event
+            if event_day > day:
+                keep.append(event)  # A later turn of the wheel
+            elif version == self._versions.get(entry_id, 0):
+                due.append((entry_id, name, kind))
+        slot[:] = keep
+        return due
+
+    def _load_next_day(self):
+        # Keep the loaded window a fixed span ahead of today
+        target = self._today + datetime.timedelta(days=self._span())
+        due = []
+        if target > self._loaded_until:
+            for entry_id, name, expiry_date in fetch_expiries_between(self._loaded_until, target):
+                due += self._schedule_entry(entry_id, name, _parse_date(expiry_date))
+            self._loaded_until = target
+        return due
+
+    def _arm_timer(self):
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        self._timer = threading.Timer((midnight - now).total_seconds() + 1, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        from core.db import close_connection
+        try:
+            self.advance()
+        finally:
+            close_connection()
+            with self._lock:
+                if self._timer is not None:
+                    self._arm_timer()
+
+    def _emit(self, events):
+        for entry_id, name, kind in events:
+            self.on_event(entry_id, name, kind)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def start_expiry_scheduler(username):
+    # One scheduler per user per process; later home windows reuse it
+    with _schedulers_lock:
+        if username in _schedulers:
+            return []
+        scheduler = ExpiryScheduler(username)
+        _schedulers[username] = scheduler
+    return scheduler.start()
+
+def stop_expiry_schedulers():
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+        _schedulers.clear()
+    for scheduler in schedulers:
+        scheduler.stop()
@@ -0,0 +1,245 @@
+"""Streaming vault export.
+
+Two targets:
+  * an encrypted archive (export_archive / read_archive / verify_archive)
+  * a plain CSV in the generic layout core.importer reads (export_csv)
+
+Archive layout:
+
+    header  MAGIC | version u8 | scrypt log2(n) u8 | r u8 | p u8 | salt 16 | nonce prefix 7 | chunk size u32
+    chunk*  length u32 | AES-256-GCM(plaintext chunk)
+
+The key is scrypt(passphrase, salt). Chunk i is sealed with nonce
+prefix | i (u32) | last flag (u8) and the whole header as associated data, so
+reordered, dropped, truncated or spliced chunks fail to open. The plaintext is
+one JSON object per line, one line per entry. Entries are read from the vault
+a page at a time and each chunk is written as soon as it fills, so neither
+side ever holds more than a page of entries and one chunk.
+"""
+import csv
+import io
+import json
+import os
+import struct
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from core import db
+
+MAGIC = b"VLTX"
+FORMAT_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+EXPORT_PAGE_SIZE = 500
+
+# scrypt cost: ~50-100 ms and 32 MiB on a typical desktop
+SCRYPT_LOG_N = 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+_HEADER = struct.Struct(">4sBBBB16s7sI")
+_LENGTH = struct.Struct(">I")
+
+CSV_COLUMNS = ["name", "username", "url", "password", "notes", "folder", "favorite", "expiry_date"]
+
+
+def derive_key(passphrase, salt, log_n=SCRYPT_LOG_N, r=SCRYPT_R, p=SCRYPT_P):
+    return Scrypt(salt=salt, length=32, n=2 ** log_n, r=r, p=p).derive(passphrase.encode())
+
+
+def _nonce(prefix, index, last):
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+def iter_entries():
+    # Decrypted entries as dicts, read from the vault one page at a time
+    from core.crypto import get_cipher
+
+    # Mid-rotation, entries can be under different key versions
+    for (entry_id, name, email, url, password, notes, folder, expiry_date, is_favourite,
+         key_version, data_key) in db.iter_export_rows(EXPORT_PAGE_SIZE):
+        yield {
+            "name": name,
+            "username": email,
+            "url": url,
+            "password": get_cipher(version=key_version).open(password, data_key) if password else "",
+            "notes": notes,
+            "folder": folder,
+            "favorite": bool(is_favourite),
+            "expiry_date": expiry_date,
+        }
+
+
+class _Stats:
+    def __init__(self, progress):
+        self.progress = progress
+        self.start = time.perf_counter()
+        self.values = {"exported": 0, "bytes_written": 0, "elapsed": 0.0, "rate": 0.0}
+
+    def update(self, exported, bytes_written):
+        elapsed = time.perf_counter() - self.start
+        self.values.update(
+            exported=exported, bytes_written=bytes_written, elapsed=elapsed,
+            rate=exported / elapsed if elapsed else 0.0,
+        )
+        if self.progress:
+            self.progress(dict(self.values))
+        return dict(self.values)
+
+
+def _write_atomically(path, write):
+    # Write next to the target and swap it in, so a failed export never
+    # leaves a half-written file under the real name
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            result = write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
+
+def export_archive(path, passphrase, progress=None, chunk_size=CHUNK_SIZE):
+    """Write every entry to an encrypted archive at `path`.
+
+    progress, if given, is called after each chunk with a dict of exported,
+    bytes_written, elapsed and rate (entries per second). Returns the final dict.
+    """
+    if not passphrase:
+        raise ValueError("An export passphrase is required")
+
+    salt = os.urandom(16)
+    prefix = os.urandom(7)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, SCRYPT_LOG_N, SCRYPT_R, SCRYPT_P, salt, prefix, chunk_size)
+    aead = AESGCM(derive_key(passphrase, salt))
+    stats = _Stats(progress)
+
+    def write(f):
+        f.write(header)
+        written = len(header)
+        index = 0
+        exported = 0
+        buf = bytearray()
+
+        def seal(data, last):
+            nonlocal written, index
+            sealed = aead.encrypt(_nonce(prefix, index, last), bytes(data), header)
+            f.write(_LENGTH.pack(len(sealed)))
+            f.write(sealed)
+            written += _LENGTH.size + len(sealed)
+            index += 1
+
+        for entry in iter_entries():
+            buf += json.dumps(entry, ensure_ascii=False).encode() + b"\n"
+            exported += 1
+            # Only seal a chunk once more data follows it, so the chunk that
+            # carries the last entries is the one flagged final
+            while len(buf) > chunk_size:
+                seal(buf[:chunk_size], last=False)
+                del buf[:chunk_size]
+                stats.update(exported, written)
+        seal(buf, last=True)
+        return stats.update(exported, written)
+
+    return _write_atomically(path, write)
+
+
+def _read_chunks(f, passphrase):
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError("Not a vault export: file is too short")
+    magic, version, log_n, r, p, salt, prefix, chunk_size = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a vault export")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported export version {version}")
+
+    aead = AESGCM(derive_key(passphrase, salt, log_n, r, p))
+    max_sealed = chunk_size + 16
+    index = 0
+    while True:
+        length = f.read(_LENGTH.size)
+        if len(length) < _LENGTH.size:
+            raise ValueError("Export is truncated")
+        (size,) = _LENGTH.unpack(length)
+        if size > max_sealed:
+            raise ValueError("Export is corrupt: oversized chunk")
+        sealed = f.read(size)
+        if len(sealed) < size:
+            raise ValueError("Export is truncated")
+
+        # Try as a middle chunk first; only the final chunk opens with last=True
+        for last in (False, True):
+            try:
+                data = aead.decrypt(_nonce(prefix, index, last), sealed, header)
+                break
+            except InvalidTag:
+                continue
+        else:
+            if index == 0:
+                raise ValueError("Wrong passphrase or corrupt export")
+            raise ValueError(f"Export is corrupt: chunk {index} failed authentication")
+
+        yield data
+        index += 1
+        if last:
+            if f.read(1):
+                raise ValueError("Export is corrupt: data after the final chunk")
+            return
+
+
+def read_archive(path, passphrase):
+    """Yield entry dicts from an encrypted archive, authenticating as it goes.
+
+    Raises ValueError on a wrong passphrase or any tampering; entries already
+    yielded before the bad chunk came from authenticated chunks.
+    """
+    with open(path, "rb") as f:
+        pending = b""
+        for data in _read_chunks(f, passphrase):
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield json.loads(line)
+        if pending:
+            yield json.loads(pending)
+
+
+def verify_archive(path, passphrase):
+    """Check every chunk of an archive; returns (entries, bytes, seconds)."""
+    start = time.perf_counter()
+    entries = 0
+    with open(path, "rb") as f:
+        for data in _read_chunks(f, passphrase):
+            entries += data.count(b"\n")
+    return entries, os.path.getsize(path), time.perf_counter() - start
+
+
+def export_csv(path, progress=None):
+    """Write every entry, decrypted, to a CSV that core.importer can read back."""
+    stats = _Stats(progress)
+
+    def write(f):
+        text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        writer = csv.DictWriter(text, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        exported = 0
+        for entry in iter_entries():
+            writer.writerow({**entry, "favorite": int(entry["favorite"])})
+            exported += 1
+            if exported % EXPORT_PAGE_SIZE == 0:
+                text.flush()
+                stats.update(exported, f.tell())
+        text.flush()
+        result = stats.update(exported, f.tell())
+        text.detach()
+        return result
+
+    return _write_atomically(path, write)
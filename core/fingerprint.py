@@ -0,0 +1,79 @@
+"""Keyed fingerprints of entry passwords.
+
+passwords.fingerprint holds HMAC-SHA256(fingerprint key, password) for each
+entry, so the entries sharing a password are one indexed GROUP BY away and a
+password being typed can be checked for reuse without decrypting anything.
+The key is a random vault secret made on first use and kept in settings,
+sealed under a vault key with the version it is under; a key rotation
+re-seals it under the new vault key, so the fingerprints themselves never
+change. The unsealed key is only held in memory while the vault is unlocked.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+
+from core import crypto, db
+
+FINGERPRINT_KEY_SETTING = "fingerprint_key"
+FINGERPRINT_KEY_SIZE = 32
+
+_key = None
+_key_lock = threading.Lock()
+
+
+def _forget_key():
+    global _key
+    _key = None
+
+crypto.add_lock_listener(_forget_key)
+
+
+def _store_key(key, version, cipher):
+    db.set_setting(FINGERPRINT_KEY_SETTING, json.dumps({
+        "version": version,
+        "key": base64.b64encode(cipher.wrap(key)).decode(),
+    }))
+
+
+def _read_key(stored, keyring):
+    data = json.loads(stored)
+    return crypto.get_cipher(keyring[data["version"]]).unwrap(base64.b64decode(data["key"])), data["version"]
+
+
+def fingerprint_key() -> bytes:
+    global _key
+    with _key_lock:
+        if _key is None:
+            keyring, current = crypto.get_keyring()
+            # Under the write lock, so two instances can't both make one
+            with db.transaction():
+                stored = db.get_setting(FINGERPRINT_KEY_SETTING)
+                if stored:
+                    key, _version = _read_key(stored, keyring)
+                else:
+                    key = os.urandom(FINGERPRINT_KEY_SIZE)
+                    _store_key(key, current, crypto.get_cipher(keyring[current]))
+            _key = key
+        return _key
+
+
+def reseal_fingerprint_key(keyring, new_version):
+    """Move the stored key under new_version (part of beginning a rotation)."""
+    stored = db.get_setting(FINGERPRINT_KEY_SETTING)
+    if stored:
+        key, _version = _read_key(stored, keyring)
+        _store_key(key, new_version, crypto.get_cipher(keyring[new_version]))
+
+
+def fingerprint(password: str, key: bytes = None) -> bytes:
+    return hmac.new(key or fingerprint_key(), password.encode(), hashlib.sha256).digest()
+
+
+def entries_using(password, exclude_id=None):
+    """(id, name) of the entries whose password is this one."""
+    if not password:
+        return []
+    return db.fetch_entries_by_fingerprint(fingerprint(password), exclude_id)
@@ -0,0 +1,126 @@
+"""Password generation from the OS CSPRNG.
+
+Random bytes are read from os.urandom a chunk at a time and turned into
+symbols with bytes.translate: bytes at or above the largest multiple of the
+alphabet size are dropped (rejection sampling, so every symbol is equally
+likely) and the rest mapped in one C-level pass. Each selected character
+class is guaranteed by drawing one character from it and writing it over a
+random position of an otherwise uniform password, the positions distinct
+(a partial Fisher-Yates), so there is never a generate-and-retry loop.
+"""
+import os
+import secrets
+import string
+import threading
+
+RANDOM_CHUNK = 64 * 1024
+GENERATE_BATCH = 4096  # passwords built per pass in generate_many
+
+CLASSES = (
+    ("upper", string.ascii_uppercase),
+    ("lower", string.ascii_lowercase),
+    ("digits", string.digits),
+    ("symbols", string.punctuation),
+)
+
+
+class PasswordPolicy:
+    """Length and character classes; every selected class appears at least once."""
+
+    def __init__(self, length=16, use_upper=True, use_lower=True, use_digits=True, use_symbols=True):
+        selected = {"upper": use_upper, "lower": use_lower, "digits": use_digits, "symbols": use_symbols}
+        self.length = length
+        self.classes = [chars for name, chars in CLASSES if selected[name]]
+        if not self.classes:
+            raise ValueError("Select at least one character class")
+        if length < len(self.classes):
+            raise ValueError(f"Length {length} is too short for {len(self.classes)} required character classes")
+        self.alphabet = "".join(self.classes)
+
+
+class _Uniform:
+    """A buffered stream of symbols, each equally likely."""
+
+    def __init__(self, symbols: bytes):
+        n = len(symbols)
+        limit = 256 - 256 % n
+        self._table = bytes(symbols[b % n] if b < limit else 0 for b in range(256))
+        self._reject = bytes(range(limit, 256))
+        self._buffer = b""
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def take(self, count) -> bytes:
+        with self._lock:
+            if len(self._buffer) - self._pos < count:
+                parts = [self._buffer[self._pos:]]
+                have = len(parts[0])
+                while have < count:
+                    # At least 188 of 256 byte values survive for the full
+                    # 94-symbol alphabet, so twice the count is one pass
+                    part = os.urandom(max(RANDOM_CHUNK, 2 * count)).translate(self._table, self._reject)
+                    parts.append(part)
+                    have += len(part)
+                self._buffer = b"".join(parts)
+                self._pos = 0
+            out = self._buffer[self._pos:self._pos + count]
+            self._pos += count
+            return out
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+def _stream(symbols: bytes) -> _Uniform:
+    with _streams_lock:
+        stream = _streams.get(symbols)
+        if stream is None:
+            stream = _streams[symbols] = _Uniform(symbols)
+        return stream
+
+def random_below(bound, count):
+    """count uniform ints in [0, bound), as bytes when bound <= 256."""
+    if bound <= 256:
+        return _stream(bytes(range(bound))).take(count)
+    if bound <= 65536:
+        # Same rejection as _Uniform, on 16-bit values
+        limit = 65536 - 65536 % bound
+        out = []
+        while len(out) < count:
+            values = memoryview(os.urandom(4 * (count - len(out)))).cast("H")
+            out.extend(v % bound for v in values if v < limit)
+        return out[:count]
+    return [secrets.randbelow(bound) for _ in range(count)]
+
+
+def _generate_batch(count, policy):
+    length = policy.length
+    body = bytearray(_stream(policy.alphabet.encode()).take(count * length))
+    required = [
+        (_stream(chars.encode()).take(count), random_below(length - i, count))
+        for i, chars in enumerate(policy.classes)
+    ]
+    for p in range(count):
+        base = p * length
+        swaps = {}
+        for i, (chars, offsets) in enumerate(required):
+            # Position i of a lazily shuffled range(length)
+            r = i + offsets[p]
+            position = swaps.get(r, r)
+            swaps[r] = swaps.get(i, i)
+            body[base + position] = chars[p]
+    text = body.decode("ascii")
+    return [text[p * length:(p + 1) * length] for p in range(count)]
+
+
+def generate_many(n, policy=None):
+    """n passwords following policy (a PasswordPolicy, default 16 characters of every class)."""
+    policy = policy or PasswordPolicy()
+    passwords = []
+    while len(passwords) < n:
+        passwords.extend(_generate_batch(min(GENERATE_BATCH, n - len(passwords)), policy))
+    return passwords
+
+
+def generate(policy=None):
+    return generate_many(1, policy)[0]
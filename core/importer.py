@@ -0,0 +1,330 @@
+"""Bulk import of entries from CSV and JSON exports.
+
+The file is read as a stream of records, encrypted in batches across a
+process pool and inserted one batch per transaction, so memory stays flat
+no matter how large the export is.
+
+Recognised layouts:
+  * generic CSV with a header row (name, username/email, url, password, notes, folder)
+  * Bitwarden CSV (folder, favorite, name, notes, login_uri, login_username, login_password)
+  * KeePass / KeePassXC CSV (Group, Title, Username, Password, URL, Notes)
+  * LastPass CSV (url, username, password, extra, name, grouping, fav)
+  * Bitwarden JSON ({"folders": [...], "items": [...]})
+  * a JSON array of flat objects using any of the CSV column names
+"""
+import codecs
+import csv
+import datetime
+import itertools
+import json
+import os
+import time
+
+from core import db
+
+IMPORT_BATCH_SIZE = 2000
+# Below this many records the pool costs more to start than it saves
+POOL_THRESHOLD = 5000
+READ_CHUNK_SIZE = 64 * 1024
+
+# Column aliases, lower-cased. The first alias present in the header wins.
+FIELD_ALIASES = {
+    "name": ("name", "title", "account"),
+    "email": ("login_username", "username", "user name", "login", "email"),
+    "url": ("login_uri", "url", "uri", "website", "web site"),
+    "password": ("login_password", "password"),
+    "notes": ("notes", "note", "extra", "comments"),
+    "folder": ("folder", "group", "grouping", "category"),
+    "favourite": ("favorite", "favourite", "fav"),
+    "expiry_date": ("expiry_date", "expires", "expiry"),
+}
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+
+# Tried in order after ISO 8601; day-first wins when both would parse
+_DATE_FORMATS = ("%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def _count_bytes(f, counter):
+    # Decode a binary file line by line, tracking how far into it we are.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for line in f:
+        counter[0] += len(line)
+        yield decoder.decode(line)
+
+
+def _map_columns(header):
+    columns = [h.strip().lower() for h in header]
+    mapping = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in columns:
+                mapping[field] = columns.index(alias)
+                break
+    if "password" not in mapping or "name" not in mapping and "url" not in mapping:
+        raise ValueError("CSV header has no recognisable name/url and password columns")
+    return mapping
+
+
+def _expiry_date(value):
+    # The vault stores YYYY-MM-DD; anything unparseable is dropped
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value).date().isoformat()
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _record(get):
+    # get(field) -> raw value or None; returns a normalised record dict
+    name = (get("name") or "").strip()
+    url = (get("url") or "").strip()
+    return {
+        "name": name or url or "Imported entry",
+        "email": (get("email") or "").strip(),
+        "url": url,
+        "password": get("password") or "",
+        "notes": get("notes") or "",
+        "folder": (get("folder") or "").strip() or None,
+        "favourite": str(get("favourite") or "").strip().lower() in _TRUE_VALUES,
+        "expiry_date": _expiry_date(get("expiry_date")),
+    }
+
+
+def read_csv(f, counter):
+    reader = csv.reader(_count_bytes(f, counter))
+    try:
+        header = next(reader)
+    except StopIteration:
+        return
+    mapping = _map_columns(header)
+    # Bitwarden marks cards, identities and notes in a "type" column
+    columns = [h.strip().lower() for h in header]
+    type_index = columns.index("type") if "type" in columns else None
+    for row in reader:
+        if not any(row):
+            continue
+        if type_index is not None and type_index < len(row) and row[type_index] not in ("", "login"):
+            continue
+        yield _record(lambda field: row[mapping[field]] if field in mapping and mapping[field] < len(row) else None)
+
+
+def _iter_json(f, counter):
+    """Yield (path, value) for each element of every top-level array.
+
+    Only one element is held in memory at a time. A top-level array yields
+    ((), element); an object yields ((key,), element) for array members and
+    ((key,), value) for anything else.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        counter[0] += len(chunk)
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    def peek():
+        skip_ws()
+        return buf[pos] if pos < len(buf) else ""
+
+    def expect(char):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError(f"Malformed JSON: expected {char!r}")
+        pos += 1
+
+    def value():
+        # A value may straddle the buffer end, so read more until it decodes
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise ValueError("Malformed JSON")
+                continue
+            if end == len(buf) and not eof and fill():
+                continue  # A number may continue in the next chunk
+            pos = end
+            return obj
+
+    def array(path):
+        nonlocal pos
+        expect("[")
+        if peek() == "]":
+            pos += 1
+            return
+        while True:
+            yield path, value()
+            if peek() == ",":
+                pos += 1
+                continue
+            expect("]")
+            return
+
+    first = peek()
+    if first == "[":
+        yield from array(())
+    elif first == "{":
+        pos += 1
+        if peek() == "}":
+            return
+        while True:
+            key = value()
+            expect(":")
+            if peek() == "[":
+                yield from array((key,))
+            else:
+                yield (key,), value()
+            if peek() == ",":
+                pos += 1
+                continue
+            expect("}")
+            return
+    else:
+        raise ValueError("JSON export must be an array or an object")
+
+
+def read_json(f, counter):
+    folders = {}  # Bitwarden folder id -> name, listed before the items
+    for path, item in _iter_json(f, counter):
+        if path == ("folders",) and isinstance(item, dict):
+            folders[item.get("id")] = item.get("name")
+            continue
+        if path not in ((), ("items",), ("entries",)) or not isinstance(item, dict):
+            continue
+
+        login = item.get("login")
+        if isinstance(login, dict):
+            # Bitwarden item; only logins carry a password
+            uris = login.get("uris") or []
+            yield _record({
+                "name": item.get("name"),
+                "email": login.get("username"),
+                "url": uris[0].get("uri") if uris else None,
+                "password": login.get("password"),
+                "notes": item.get("notes"),
+                "folder": folders.get(item.get("folderId")),
+                "favourite": item.get("favorite"),
+            }.get)
+            continue
+        if isinstance(item.get("type"), int):
+            continue  # Bitwarden card, identity or secure note
+
+        lowered = {str(k).lower(): v for k, v in item.items()}
+        def get(field, lowered=lowered):
+            for alias in FIELD_ALIASES[field]:
+                if lowered.get(alias) is not None:
+                    return str(lowered[alias]) if not isinstance(lowered[alias], str) else lowered[alias]
+            return None
+        yield _record(get)
+
+
+def _detect_format(path):
+    return "json" if os.path.splitext(path)[1].lower() == ".json" else "csv"
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _resolve_folders(batch, folder_ids):
+    names = {r["folder"] for r, _sealed in batch if r["folder"] and r["folder"] not in folder_ids}
+    if names:
+        folder_ids.update(db.ensure_folders(names))
+
+
+def import_file(path, fmt=None, progress=None, batch_size=IMPORT_BATCH_SIZE, workers=None):
+    """Import every entry in `path` into the vault.
+
+    fmt is "csv" or "json" (default: from the file extension). progress, if
+    given, is called after each batch with a dict of imported, bytes_read,
+    total_bytes, elapsed and rate (entries per second). workers=0 encrypts
+    in-process; None uses one process per CPU once the file is big enough
+    for that to pay off. Returns the final progress dict.
+    """
+    from core.crypto import current_key_version, get_cipher
+    from core.fingerprint import fingerprint, fingerprint_key
+
+    fmt = fmt or _detect_format(path)
+    reader = read_json if fmt == "json" else read_csv
+    total_bytes = os.path.getsize(path)
+    counter = [0]
+    stats = {"imported": 0, "bytes_read": 0, "total_bytes": total_bytes, "elapsed": 0.0, "rate": 0.0}
+    folder_ids = {name: folder_id for folder_id, name in db.fetch_folders()}
+    key_version = current_key_version()
+    fp_key = fingerprint_key()
+    start = time.perf_counter()
+
+    if workers is None:
+        # Rough size check: a vault entry is ~100 bytes of CSV
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 and total_bytes > POOL_THRESHOLD * 100 else 0
+
+    def store(batch):
+        _resolve_folders(batch, folder_ids)
+        db.insert_password_entries([
+            (r["name"], r["email"], r["url"], ciphertext, r["notes"],
+             folder_ids.get(r["folder"]), r["expiry_date"], int(r["favourite"]), key_version, data_key,
+             fingerprint(r["password"], fp_key) if r["password"] else None)
+            for r, (ciphertext, data_key) in batch
+        ])
+        stats["imported"] += len(batch)
+        stats["bytes_read"] = counter[0]
+        stats["elapsed"] = time.perf_counter() - start
+        stats["rate"] = stats["imported"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        if progress:
+            progress(dict(stats))
+
+    with open(path, "rb") as f:
+        # The pool works ahead on the passwords while a batch is inserted;
+        # tee only buffers the records that are still out being encrypted
+        records, pending = itertools.tee(reader(f, counter))
+        sealed = get_cipher(version=key_version).seal_many((r["password"] for r in records), workers=workers)
+        try:
+            for batch in _batches(zip(pending, sealed), batch_size):
+                store(batch)
+        finally:
+            # Shuts the pool down if the import stops part way
+            close = getattr(sealed, "close", None)
+            if close is not None:
+                close()
+
+    stats["bytes_read"] = total_bytes
+    stats["elapsed"] = time.perf_counter() - start
+    stats["rate"] = stats["imported"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
@@ -0,0 +1,389 @@
+"""Master-password unlock of the vault key.
+
+Each user's row in vault_keys holds the vault keyring (every key version
+still in use, and which is current) sealed with AES-GCM under a
+key-encryption key derived from their master password (Argon2id, or scrypt
+where this cryptography build lacks it). The KDF cost is calibrated on the
+machine to a target unlock latency and stored in settings; a user whose row
+was wrapped with different parameters is re-wrapped on their next unlock.
+Every unlock records its timings in unlock_timings for tuning.
+
+Each row also carries an X25519 key pair: the private half is wrapped along
+with the keyring, the public half is stored in the clear, so a key can be
+sealed to a user (pending_keys) without their password and without relying
+on any key they already hold. share_keys() uses it to hand a rotated-in key
+version to the users who weren't there, and the whole keyring to a user who
+enrolled while the vault was locked (their row starts with an empty one);
+they pick it up on their next unlock. Any unlock shares the keyring with
+users still waiting for it, so a new master password gets access the next
+time an existing user unlocks the vault.
+"""
+import base64
+import json
+import os
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from core import crypto, db
+
+try:
+    from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+except ImportError:  # cryptography < 44
+    Argon2id = None
+
+UNLOCK_TARGET_MS = 250
+KDF_SETTING = "kdf_params"
+
+# Calibration bounds
+ARGON2_MEMORY_KIB = 64 * 1024
+ARGON2_MIN_MEMORY_KIB = 19 * 1024
+ARGON2_LANES = 4
+SCRYPT_MIN_LOG_N = 14
+SCRYPT_MAX_LOG_N = 20
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+def derive_kek(password, salt, params):
+    if params["kdf"] == "argon2id":
+        kdf = Argon2id(salt=salt, length=32, iterations=params["iterations"],
+                       lanes=params["lanes"], memory_cost=params["memory_kib"])
+    elif params["kdf"] == "scrypt":
+        kdf = Scrypt(salt=salt, length=32, n=2 ** params["log_n"], r=params["r"], p=params["p"])
+    else:
+        raise ValueError(f"Unknown KDF {params['kdf']!r}")
+    return kdf.derive(password.encode())
+
+
+def _time_kdf(params):
+    start = time.perf_counter()
+    derive_kek("calibration", os.urandom(16), params)
+    return (time.perf_counter() - start) * 1000
+
+
+def calibrate_kdf(target_ms=UNLOCK_TARGET_MS):
+    """Pick the strongest KDF parameters that derive within target_ms here."""
+    if Argon2id is not None:
+        # Fix memory and lanes, then scale iterations to fill the budget;
+        # only a slow machine gives up memory, never below the floor
+        params = {"kdf": "argon2id", "iterations": 1, "lanes": ARGON2_LANES, "memory_kib": ARGON2_MEMORY_KIB}
+        per_pass = _time_kdf(params)
+        while per_pass > target_ms and params["memory_kib"] // 2 >= ARGON2_MIN_MEMORY_KIB:
+            params["memory_kib"] //= 2
+            per_pass = _time_kdf(params)
+        if per_pass < target_ms:
+            # The first pass carries the memory fill, so time a second one
+            # for the marginal cost of each extra iteration
+            params["iterations"] = 2
+            marginal = max(_time_kdf(params) - per_pass, 1.0)
+            params["iterations"] = 1 + int((target_ms - per_pass) // marginal)
+    else:
+        params = {"kdf": "scrypt", "log_n": SCRYPT_MIN_LOG_N, "r": SCRYPT_R, "p": SCRYPT_P}
+        # Each step doubles the cost
+        while params["log_n"] < SCRYPT_MAX_LOG_N and _time_kdf(params) * 2 <= target_ms:
+            params["log_n"] += 1
+
+    params["target_ms"] = target_ms
+    params["measured_ms"] = round(_time_kdf(params), 1)
+    return params
+
+
+def kdf_params():
+    # The calibrated parameters for this vault, calibrating on first use
+    stored = db.get_setting(KDF_SETTING)
+    if stored:
+        return json.loads(stored)
+    return recalibrate()
+
+def recalibrate(target_ms=UNLOCK_TARGET_MS):
+    params = calibrate_kdf(target_ms)
+    db.set_setting(KDF_SETTING, json.dumps(params, sort_keys=True))
+    return params
+
+
+def _cost(params):
+    # Only the fields that change the derived key
+    return {k: v for k, v in params.items() if k not in ("target_ms", "measured_ms")}
+
+
+def _pack_keyring(keyring, current, private_key):
+    return json.dumps({
+        "current": current,
+        "keys": {str(version): key.decode() for version, key in keyring.items()},
+        "private_key": base64.b64encode(private_key).decode(),
+    }).encode()
+
+def _unpack_keyring(payload):
+    # (keyring, current, private_key); rows wrapped before key pairs have none
+    if not payload.startswith(b"{"):
+        return {1: payload}, 1, None  # A single bare key, wrapped before key versions
+    data = json.loads(payload)
+    keyring = {int(version): key.encode() for version, key in data["keys"].items()}
+    private_key = data.get("private_key")
+    return keyring, data["current"], private_key and base64.b64decode(private_key)
+
+
+def _public_key(private_key):
+    return X25519PrivateKey.from_private_bytes(private_key).public_key().public_bytes_raw()
+
+def _pending_cipher(shared, ephemeral_public, public_key):
+    return AESGCM(HKDF(hashes.SHA256(), 32, salt=None,
+                       info=b"vault pending key" + ephemeral_public + public_key).derive(shared))
+
+def _pending_aad(username, version):
+    # Bound to its pending_keys row, so a sealed key can't be moved to another
+    return f"{username}:{version}".encode()
+
+def _seal_to(public_key, username, version, key):
+    # Ephemeral X25519 agreement with the user's public key, then AES-GCM:
+    # only their private key opens it, whoever holds the vault keys
+    ephemeral = X25519PrivateKey.generate()
+    ephemeral_public = ephemeral.public_key().public_bytes_raw()
+    cipher = _pending_cipher(ephemeral.exchange(X25519PublicKey.from_public_bytes(public_key)),
+                             ephemeral_public, public_key)
+    nonce = os.urandom(12)
+    return ephemeral_public + nonce + cipher.encrypt(nonce, key, _pending_aad(username, version))
+
+def _open_sealed(private_key, username, version, sealed):
+    private = X25519PrivateKey.from_private_bytes(private_key)
+    ephemeral_public, nonce, ciphertext = sealed[:32], sealed[32:44], sealed[44:]
+    cipher = _pending_cipher(private.exchange(X25519PublicKey.from_public_bytes(ephemeral_public)),
+                             ephemeral_public, _public_key(private_key))
+    return cipher.decrypt(nonce, ciphertext, _pending_aad(username, version))
+
+
+# The unlocked user's key-encryption key, so the keyring can be re-wrapped
+# (e.g. by a key rotation) without asking for the master password again
+_session = None
+
+def _remember_session(username, kek, salt, params, private_key):
+    global _session
+    _session = (username, kek, salt, params, private_key)
+
+def _clear_session():
+    global _session
+    _session = None
+
+crypto.add_lock_listener(_clear_session)
+
+
+def _store_keyring(username, kek, salt, params, keyring, current, private_key):
+    nonce = os.urandom(12)
+    # The username is bound in as associated data so rows can't be swapped
+    payload = _pack_keyring(keyring, current, private_key)
+    wrapped = nonce + AESGCM(kek).encrypt(nonce, payload, username.encode())
+    params_json = json.dumps(_cost(params), sort_keys=True)
+    db.save_wrapped_key(username, params_json, salt, wrapped, _public_key(private_key), current)
+
+def _new_kek(password, params=None):
+    # (kek, salt, params) for wrapping under a fresh salt. The KDF is slow on
+    # purpose, so derive before taking the write lock, never inside it.
+    params = params or kdf_params()
+    salt = os.urandom(16)
+    return derive_kek(password, salt, params), salt, params
+
+def rewrap_session_keyring(keyring, current):
+    """Re-seal the unlocked user's keyring after it changed (same KEK)."""
+    if _session is None:
+        raise crypto.VaultLockedError("The vault is locked")
+    username, kek, salt, params, private_key = _session
+    _store_keyring(username, kek, salt, params, keyring, current, private_key)
+    _remember_session(username, kek, salt, params, private_key)
+    return username
+
+
+def share_keys(keyring, exclude=None):
+    """Seal the key versions each other user lacks to their public key.
+
+    The sealed keys wait in pending_keys until each user's next unlock.
+    Users without a key pair yet (a row wrapped before key pairs, until that
+    user unlocks once) are skipped; returns their names.
+    """
+    skipped = []
+    with db.transaction():
+        for username, public_key, held in db.fetch_key_holders():
+            if username == exclude:
+                continue
+            if public_key is None:
+                skipped.append(username)
+                continue
+            for version in sorted(keyring):
+                if version > held:
+                    db.save_pending_key(username, version, _seal_to(public_key, username, version, keyring[version]))
+    return skipped
+
+
+def _unwrap(username, password, row):
+    params_json, salt, wrapped = row
+    params = json.loads(params_json)
+    kek = derive_kek(password, salt, params)
+    try:
+        payload = AESGCM(kek).decrypt(wrapped[:12], wrapped[12:], username.encode())
+    except InvalidTag:
+        raise ValueError("Incorrect master password")
+    keyring, current, private_key = _unpack_keyring(payload)
+    return keyring, current, private_key, kek, salt, params
+
+
+def _apply_pending_keys(username, keyring, current, private_key):
+    # Keys rotated in while this user was away, sealed to their public key
+    changed = False
+    if private_key is None:
+        private_key = X25519PrivateKey.generate().private_bytes_raw()
+        changed = True
+    for version, sealed_key in db.fetch_pending_keys(username):
+        if version in keyring:
+            continue
+        keyring[version] = _open_sealed(private_key, username, version, sealed_key)
+        current = max(current or 0, version)
+        changed = True
+
+    # Drop versions no entry uses any more (e.g. after a finished rotation)
+    in_use = set(db.fetch_key_versions_in_use())
+    for version in list(keyring):
+        if version != current and version not in in_use:
+            del keyring[version]
+            changed = True
+    return keyring, current, private_key, changed
+
+
+AWAITING_ACCESS = ("Your master password is set, but the vault keys haven't been shared with you yet. "
+                   "You'll have access once an existing user unlocks the vault.")
+
+
+def _initial_keyring():
+    # For a user without a wrapped key: the legacy plaintext key, the keyring
+    # of an already unlocked session, a brand new key for an empty vault, or
+    # else nothing until another user shares it (see share_keys)
+    if os.path.exists(crypto.LEGACY_KEY_FILE):
+        with open(crypto.LEGACY_KEY_FILE, "rb") as f:
+            return {1: f.read().strip()}, 1
+    if crypto.is_unlocked():
+        return crypto.get_keyring()
+    if not db.has_wrapped_keys():
+        return {1: Fernet.generate_key()}, 1
+    return {}, None
+
+
+def _retire_legacy_key_file():
+    if os.path.exists(crypto.LEGACY_KEY_FILE) and db.count_unwrapped_users() == 0:
+        os.remove(crypto.LEGACY_KEY_FILE)
+
+
+def enroll(username, password, password_hash=None):
+    """Wrap the vault keyring under a new master password and unlock with it.
+
+    If the vault is locked and already has users, there is no keyring to
+    wrap: the user is enrolled without one, the vault stays locked and
+    False is returned; they get access when an existing user next unlocks.
+    password_hash, if given, is saved as the user's master password hash in
+    the same transaction.
+    """
+    kek, salt, params = _new_kek(password)
+    private_key = X25519PrivateKey.generate().private_bytes_raw()
+    with db.transaction():
+        keyring, current = _initial_keyring()
+        _store_keyring(username, kek, salt, params, keyring, current, private_key)
+        if password_hash is not None:
+            db.insert_master_password(username, password_hash)
+    if not keyring:
+        return False
+    _remember_session(username, kek, salt, params, private_key)
+    crypto.set_keyring(keyring, current)
+    _retire_legacy_key_file()
+    return True
+
+
+def unlock(username, password):
+    """Unlock the vault with a user's master password.
+
+    Raises ValueError if the password does not open the user's wrapped key,
+    and VaultLockedError if no user has shared the vault keys with this one
+    yet. Returns the timings recorded for this unlock (kdf_ms, total_ms,
+    params).
+    """
+    start = time.perf_counter()
+    row = db.fetch_wrapped_key(username)
+    if row is None:
+        # Vault from before wrapped keys: enrol on first unlock
+        kdf_start = time.perf_counter()
+        if not enroll(username, password):
+            raise crypto.VaultLockedError(AWAITING_ACCESS)
+        kdf_ms = (time.perf_counter() - kdf_start) * 1000
+        params = _cost(kdf_params())
+    else:
+        kdf_start = time.perf_counter()
+        keyring, current, private_key, kek, salt, params = _unwrap(username, password, row)
+        kdf_ms = (time.perf_counter() - kdf_start) * 1000
+        keyring, current, private_key, changed = _apply_pending_keys(username, keyring, current, private_key)
+        if not keyring:
+            raise crypto.VaultLockedError(AWAITING_ACCESS)
+        crypto.set_keyring(keyring, current)
+
+        calibrated = _cost(kdf_params())
+        if params != calibrated:
+            # Calibration changed since this row was wrapped
+            kek, salt, params = _new_kek(password, calibrated)
+        if changed or params != calibrated:
+            with db.transaction():
+                _store_keyring(username, kek, salt, params, keyring, current, private_key)
+                db.delete_pending_keys(username)
+        _remember_session(username, kek, salt, params, private_key)
+        # Users who enrolled while the vault was locked get its keys now
+        share_keys(keyring, exclude=username)
+        _retire_legacy_key_file()
+
+    total_ms = (time.perf_counter() - start) * 1000
+    params_json = json.dumps(params, sort_keys=True)
+    db.log_unlock_timing(username, params_json, kdf_ms, total_ms)
+    return {"kdf_ms": kdf_ms, "total_ms": total_ms, "params": params}
+
+
+def change_master_password(username, old_password, new_password):
+    """Re-wrap the user's keyring under a new master password.
+
+    Only this user's vault_keys row (and master password hash) changes; the
+    entries and their data keys are untouched. Raises ValueError if
+    old_password is wrong.
+    """
+    import bcrypt
+
+    row = db.fetch_wrapped_key(username)
+    if row is None:
+        raise ValueError("No wrapped vault key for this user")
+    keyring, current, private_key, _kek, _salt, _params = _unwrap(username, old_password, row)
+    kek, salt, params = _new_kek(new_password)
+    password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt())
+    with db.transaction():
+        if db.fetch_wrapped_key(username) != row:
+            # e.g. a key rotation meanwhile; the keyring read above is stale
+            raise ValueError("The vault keys changed meanwhile; try again")
+        _store_keyring(username, kek, salt, params, keyring, current, private_key)
+        db.update_master_password_hash(username, password_hash)
+    _remember_session(username, kek, salt, params, private_key)
+
+
+def unlock_timing_summary(limit=db.UNLOCK_TIMINGS_KEPT):
+    """Median and p95 of recent unlocks, grouped by KDF parameters."""
+    groups = {}
+    for _username, params, kdf_ms, total_ms, _ts in db.fetch_unlock_timings(limit):
+        groups.setdefault(params, []).append((kdf_ms, total_ms))
+
+    summary = {}
+    for params, timings in groups.items():
+        kdf = sorted(t[0] for t in timings)
+        total = sorted(t[1] for t in timings)
+        summary[params] = {
+            "count": len(timings),
+            "kdf_median_ms": kdf[len(kdf) // 2],
+            "total_median_ms": total[len(total) // 2],
+            "total_p95_ms": total[min(len(total) - 1, int(len(total) * 0.95))],
+        }
+    return summary
@@ -0,0 +1,369 @@
+"""Schema migrations for vault.db, keyed on PRAGMA user_version.
+
+Each step runs once, in order, inside the caller's transaction. A vault that
+is already at LATEST_VERSION costs a single PRAGMA read at startup.
+"""
+
+
+def _columns(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return {col[1] for col in c.fetchall()}
+
+
+def _add_missing_columns(c, table, columns):
+    existing = _columns(c, table)
+    for name, decl in columns:
+        if name not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def _baseline(c):
+    # Vaults created before versioning can be in any state the old ensure_*
+    # helpers left them in, so every table and column is checked here once.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT UNIQUE,
+            password BLOB,
+            is_verified INTEGER DEFAULT 0,
+            otp_secret TEXT,
+            otp_code TEXT,
+            otp_expiry DATETIME
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS master_password (
+            username TEXT PRIMARY KEY,
+            password_hash BLOB
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            url TEXT,
+            password TEXT,
+            notes TEXT,
+            folder_id INTEGER,
+            last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
+            is_favourite INTEGER DEFAULT 0,
+            expiry_date DATE,
+            last_modified DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (folder_id) REFERENCES folders(id)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            message TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    _add_missing_columns(c, "users", [
+        ("otp_secret", "TEXT"),
+        ("otp_code", "TEXT"),
+        ("otp_expiry", "DATETIME"),
+    ])
+    # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, hence the backfill below
+    _add_missing_columns(c, "passwords", [
+        ("last_used", "DATETIME"),
+        ("is_favourite", "INTEGER DEFAULT 0"),
+        ("expiry_date", "DATE"),
+        ("last_modified", "DATETIME"),
+    ])
+    c.execute("""
+        UPDATE passwords
+        SET last_modified = datetime('now')
+        WHERE last_modified IS NULL
+    """)
+
+
+def _listing_indexes(c):
+    # Each index covers the columns its listing returns (id is the rowid), so
+    # the sorted views are read straight off the index with no table lookups
+    # and no temp B-tree sort. id comes straight after the sort key, so
+    # "ORDER BY key, id" (the keyset pagination order) reads off the index
+    # and a page can seek past the previous page's last (key, id).
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_name
+        ON passwords (name COLLATE NOCASE, id, last_modified, last_used)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_last_modified
+        ON passwords (last_modified, id, name, last_used)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_last_used
+        ON passwords (last_used, id, name, last_modified)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_folder_name
+        ON passwords (folder_id, name COLLATE NOCASE, id, last_modified, last_used)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_folder_last_modified
+        ON passwords (folder_id, last_modified, id, name, last_used)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_folder_last_used
+        ON passwords (folder_id, last_used, id, name, last_modified)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_favourite
+        ON passwords (is_favourite, name)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_expiry
+        ON passwords (expiry_date, name)
+    """)
+
+
+def _search_index(c):
+    # External-content FTS5 index: the text lives only in passwords, the
+    # triggers keep the index in step with every insert, update and delete.
+    c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5(
+            name, email, url, notes,
+            content='passwords',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3'
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_ai AFTER INSERT ON passwords BEGIN
+            INSERT INTO passwords_fts (rowid, name, email, url, notes)
+            VALUES (new.id, new.name, new.email, new.url, new.notes);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_ad AFTER DELETE ON passwords BEGIN
+            INSERT INTO passwords_fts (passwords_fts, rowid, name, email, url, notes)
+            VALUES ('delete', old.id, old.name, old.email, old.url, old.notes);
+        END
+    """)
+    # Only the indexed columns: last_used/favourite updates skip the index
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_au AFTER UPDATE OF name, email, url, notes ON passwords BEGIN
+            INSERT INTO passwords_fts (passwords_fts, rowid, name, email, url, notes)
+            VALUES ('delete', old.id, old.name, old.email, old.url, old.notes);
+            INSERT INTO passwords_fts (rowid, name, email, url, notes)
+            VALUES (new.id, new.name, new.email, new.url, new.notes);
+        END
+    """)
+    # Default ranking: bm25 with a name hit weighted above email, url and notes
+    c.execute("INSERT INTO passwords_fts (passwords_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0, 1.0)')")
+    c.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild')")
+
+
+def _notification_keys(c):
+    # Rebuild notifications with a dedup key (username, entry_id, kind, day)
+    # and a repeat count. Existing rows have no entry id, so their repeats are
+    # collapsed by identical message on the same day instead.
+    c.execute("""
+        CREATE TABLE notifications_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            entry_id INTEGER,
+            kind TEXT,
+            day TEXT,
+            message TEXT,
+            count INTEGER NOT NULL DEFAULT 1,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        INSERT INTO notifications_new (username, kind, day, message, count, timestamp)
+        SELECT username,
+               CASE
+                   WHEN message LIKE 'Viewed password: %' THEN 'view'
+                   WHEN message LIKE '% has expired.' THEN 'expired'
+                   WHEN message LIKE '% is expiring soon.' THEN 'soon'
+               END,
+               date(timestamp), message, COUNT(*), MAX(timestamp)
+        FROM notifications
+        GROUP BY username, message, date(timestamp)
+        ORDER BY MAX(timestamp)
+    """)
+    c.execute("DROP TABLE notifications")
+    c.execute("ALTER TABLE notifications_new RENAME TO notifications")
+
+    # NULL entry_id/kind never conflict, so free-form messages are not merged
+    c.execute("""
+        CREATE UNIQUE INDEX idx_notifications_key
+        ON notifications (username, entry_id, kind, day)
+    """)
+    # Covers the keyset-paginated listing
+    c.execute("""
+        CREATE INDEX idx_notifications_user_time
+        ON notifications (username, timestamp, id, message, count)
+    """)
+    # Retention compaction deletes by day range
+    c.execute("""
+        CREATE INDEX idx_notifications_day
+        ON notifications (day, kind)
+    """)
+
+
+def _wrapped_keys(c):
+    # The vault key is stored once per user, wrapped under a key derived from
+    # that user's master password. kdf_params is JSON so the cost can change
+    # per row as the calibration is retuned.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS vault_keys (
+            username TEXT PRIMARY KEY,
+            kdf_params TEXT NOT NULL,
+            salt BLOB NOT NULL,
+            wrapped_key BLOB NOT NULL,
+            created DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS unlock_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            kdf_params TEXT,
+            kdf_ms REAL,
+            total_ms REAL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _key_versions(c):
+    # Which vault key each ciphertext is under, so a key rotation can run in
+    # batches and resume, and reads can pick the right key meanwhile
+    _add_missing_columns(c, "passwords", [
+        ("key_version", "INTEGER NOT NULL DEFAULT 1"),
+    ])
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_key_version
+        ON passwords (key_version, id)
+    """)
+    # Each user's public key and the newest key version their keyring holds,
+    # so a new vault key can be sealed to whoever wasn't there to re-wrap
+    # their keyring; pending_keys keeps it until their next unlock
+    _add_missing_columns(c, "vault_keys", [
+        ("public_key", "BLOB"),
+        ("key_version", "INTEGER"),
+    ])
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS pending_keys (
+            username TEXT,
+            key_version INTEGER,
+            sealed_key BLOB,
+            PRIMARY KEY (username, key_version)
+        )
+    """)
+
+
+def _data_keys(c):
+    # Envelope encryption: each password is encrypted under its own data key,
+    # stored here wrapped by the vault key (key_version). NULL marks entries
+    # from before, encrypted directly under the vault key; the rotation job
+    # moves them over, finding them through the partial index.
+    _add_missing_columns(c, "passwords", [
+        ("data_key", "TEXT"),
+    ])
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_direct
+        ON passwords (key_version, id) WHERE data_key IS NULL
+    """)
+
+
+def _binary_ciphertexts(c):
+    # Ciphertexts and data keys are now binary BLOBs (see core.crypto). Rows
+    # still holding Fernet TEXT, with or without a data key, are re-sealed by
+    # the rotation job; this index finds them and empties as it goes.
+    c.execute("DROP INDEX IF EXISTS idx_passwords_direct")
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_legacy
+        ON passwords (key_version, id) WHERE data_key IS NULL OR typeof(data_key) = 'text'
+    """)
+
+
+def _audit(c):
+    # Materialised results of the vault health audit (core.audit), one row
+    # per entry. last_modified is the entry's as of its audit, so a changed
+    # entry shows up as a mismatch and only those are audited again.
+    # breached is the times the password appears in the breach corpus
+    # (core.breach), NULL when none was installed.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS audit (
+            entry_id INTEGER PRIMARY KEY,
+            last_modified DATETIME,
+            score INTEGER,
+            guesses REAL,
+            warning TEXT,
+            breached INTEGER,
+            audited_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _fingerprints(c):
+    # Keyed fingerprint of each entry's password (see core.fingerprint),
+    # written with the entry, so reuse is a GROUP BY on this index. Existing
+    # entries get theirs from the next audit.
+    _add_missing_columns(c, "passwords", [
+        ("fingerprint", "BLOB"),
+    ])
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_passwords_fingerprint
+        ON passwords (fingerprint) WHERE fingerprint IS NOT NULL
+    """)
+
+
+# (version, description, step) in the order they must be applied.
+# Append new steps at the end; never renumber or edit a released one.
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "listing indexes", _listing_indexes),
+    (3, "full-text search index", _search_index),
+    (4, "notification dedup keys", _notification_keys),
+    (5, "wrapped vault keys and settings", _wrapped_keys),
+    (6, "key versions for rotation", _key_versions),
+    (7, "per-entry data keys", _data_keys),
+    (8, "binary ciphertexts", _binary_ciphertexts),
+    (9, "vault health audit", _audit),
+    (10, "password fingerprints", _fingerprints),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(c):
+    return c.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_pending(c):
+    """Apply every step newer than the vault's user_version.
+
+    Must be called inside a write transaction so the steps and the version
+    bump commit together. Returns the list of versions applied.
+    """
+    # Re-read under the write lock: another instance may have just migrated
+    current = schema_version(c)
+    applied = []
+    for version, _description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        step(c)
+        c.execute(f"PRAGMA user_version = {int(version)}")
+        applied.append(version)
+    return applied
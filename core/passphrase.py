@@ -0,0 +1,206 @@
+"""Diceware-style passphrases from a memory-mapped wordlist.
+
+The wordlist ships compiled (core/data/wordlist.bin, built from
+wordlist.txt by build_wordlist) as:
+
+    b"VLTW", format version (1 byte), word count (uint32)
+    count + 1 uint32 offsets into the word data
+    the words, UTF-8, back to back
+
+Opening it maps the file and reads the 9-byte header; word i is the slice
+between offsets i and i + 1, so picking a word is two integer reads and
+nothing is parsed at startup. Words are chosen with the generator's
+rejection sampling, so every word, separator, capital and digit is equally
+likely and entropy_bits is the exact entropy of the policy.
+"""
+import math
+import mmap
+import os
+import struct
+import threading
+
+from core.generator import random_below
+
+WORDLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "wordlist.bin")
+WORDLIST_MAGIC = b"VLTW"
+WORDLIST_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+_OFFSET = struct.Struct("<I")
+
+# Used one per gap when the separator is RANDOM_SEPARATOR; none can appear in a word
+SEPARATORS = "-_.+=*/:;!?#~"
+RANDOM_SEPARATOR = None
+CAPITALISE = ("none", "first", "random")
+MAX_DIGITS = 6
+
+
+class Wordlist:
+    """Read-only view of a compiled wordlist; words are fetched by index."""
+
+    def __init__(self, path=WORDLIST_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = _HEADER.unpack_from(self._map, 0)
+            if magic != WORDLIST_MAGIC or version != WORDLIST_VERSION:
+                raise ValueError(f"{path} is not a compiled wordlist")
+            self._index = _HEADER.size
+            self._data = self._index + (count + 1) * _OFFSET.size
+            if len(self._map) < self._data or self._data + _OFFSET.unpack_from(
+                    self._map, self._index + 4 * count)[0] != len(self._map):
+                raise ValueError(f"{path} is truncated")
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def word(self, i) -> str:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = struct.unpack_from("<2I", self._map, self._index + 4 * i)
+        return self._map[self._data + start:self._data + end].decode()
+
+    def close(self):
+        self._map.close()
+
+
+def build_wordlist(src, dst):
+    """Compile a text wordlist (one word per line) into the mapped format.
+
+    Words are lower-cased, blank lines and duplicates dropped; a word holding
+    anything but letters is rejected, since that could make two different
+    passphrases read the same. Returns the word count.
+    """
+    words = []
+    seen = set()
+    with open(src, encoding="utf-8") as f:
+        for line in f:
+            word = line.strip().lower()
+            if not word or word in seen:
+                continue
+            if not word.isalpha():
+                raise ValueError(f"Wordlist entry {word!r} is not a plain word")
+            seen.add(word)
+            words.append(word)
+    if len(words) < 2:
+        raise ValueError("Wordlist needs at least two words")
+    if len(words) > 65536:
+        raise ValueError("Wordlist is limited to 65536 words")
+
+    blobs = [w.encode() for w in words]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    tmp = dst + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(WORDLIST_MAGIC, WORDLIST_VERSION, len(words)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(b"".join(blobs))
+        os.replace(tmp, dst)
+    finally:
+        # Only still there if writing or replacing failed
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return len(words)
+
+
+_wordlist = None
+_wordlist_lock = threading.Lock()
+
+def get_wordlist() -> Wordlist:
+    global _wordlist
+    with _wordlist_lock:
+        if _wordlist is None:
+            _wordlist = Wordlist()
+        return _wordlist
+
+
+class PassphrasePolicy:
+    """Word count, separator, capitalisation and digits for a passphrase.
+
+    separator is a fixed string or RANDOM_SEPARATOR (one of SEPARATORS per
+    gap). capitalise is "none", "first" (every word) or "random" (each word
+    by coin flip). digits appends that many random digits to one randomly
+    chosen word.
+    """
+
+    def __init__(self, words=6, separator="-", capitalise="none", digits=0):
+        if words < 1:
+            raise ValueError("A passphrase needs at least one word")
+        if capitalise not in CAPITALISE:
+            raise ValueError(f"capitalise must be one of {', '.join(CAPITALISE)}")
+        if not 0 <= digits <= MAX_DIGITS:
+            raise ValueError(f"digits must be between 0 and {MAX_DIGITS}")
+        if separator is not RANDOM_SEPARATOR:
+            if any(ch.isalnum() for ch in separator):
+                raise ValueError("The separator can't contain letters or digits")
+            if not separator and words > 1 and capitalise != "first":
+                # "sun" + "set" and "sunset" would read the same
+                raise ValueError("Words need a separator unless every word is capitalised")
+        self.words = words
+        self.separator = separator
+        self.capitalise = capitalise
+        self.digits = digits
+
+
+def entropy_bits(policy, wordlist_size=None) -> float:
+    """Exact entropy of a passphrase drawn under policy, in bits."""
+    size = wordlist_size or len(get_wordlist())
+    bits = policy.words * math.log2(size)
+    if policy.capitalise == "random":
+        bits += policy.words
+    if policy.separator is RANDOM_SEPARATOR:
+        bits += (policy.words - 1) * math.log2(len(SEPARATORS))
+    if policy.digits:
+        bits += policy.digits * math.log2(10) + math.log2(policy.words)
+    return bits
+
+
+def generate_passphrases(n, policy=None):
+    """n passphrases following policy (a PassphrasePolicy, default six words joined by "-")."""
+    policy = policy or PassphrasePolicy()
+    wordlist = get_wordlist()
+    k = policy.words
+    indexes = random_below(len(wordlist), n * k)
+    if policy.capitalise == "random":
+        flips = random_below(2, n * k)
+    if policy.separator is RANDOM_SEPARATOR:
+        gaps = random_below(len(SEPARATORS), n * (k - 1))
+    if policy.digits:
+        digits = random_below(10, n * policy.digits)
+        targets = random_below(k, n)
+
+    passphrases = []
+    for p in range(n):
+        words = [wordlist.word(i) for i in indexes[p * k:(p + 1) * k]]
+        if policy.capitalise == "first":
+            words = [w.capitalize() for w in words]
+        elif policy.capitalise == "random":
+            words = [w.capitalize() if flip else w for w, flip in zip(words, flips[p * k:(p + 1) * k])]
+        if policy.digits:
+            words[targets[p]] += "".join(map(str, digits[p * policy.digits:(p + 1) * policy.digits]))
+        if policy.separator is RANDOM_SEPARATOR:
+            parts = [words[0]]
+            for word, gap in zip(words[1:], gaps[p * (k - 1):(p + 1) * (k - 1)]):
+                parts.append(SEPARATORS[gap])
+                parts.append(word)
+            passphrases.append("".join(parts))
+        else:
+            passphrases.append(policy.separator.join(words))
+    return passphrases
+
+
+def generate_passphrase(policy=None):
+    return generate_passphrases(1, policy)[0]
+
+
+if __name__ == "__main__":
+    # python -m core.passphrase [wordlist.txt] -- recompile the shipped wordlist
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(WORDLIST_PATH), "wordlist.txt")
+    print(f"{build_wordlist(src, WORDLIST_PATH)} words written to {WORDLIST_PATH}")
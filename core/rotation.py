@@ -0,0 +1,200 @@
+"""Online vault key rotation.
+
+begin_rotation() adds a fresh key version to the keyring and makes it current,
+so every new write already uses it. Other users' keyrings get the new key
+on their next unlock through pending_keys, sealed to each user's public key
+(core.keys) rather than under the old vault key, so whoever may have the old
+key can't read the new one from there. The fingerprint key
+(core.fingerprint) is re-sealed under the new one.
+run_rotation() then re-wraps the older entries' data keys in id-ordered
+batches, one transaction per batch, with the crypto optionally spread over a
+process pool; the password ciphertexts themselves don't change. Entries
+still in an older storage format (Fernet text, with or without a data key)
+are re-sealed in the current one on the way. Progress is the key_version and
+data_key columns themselves: a crash or an app restart just
+leaves some entries on the old version, and resume_rotation() picks up from
+there. verify_rotation() decrypts every entry under its recorded version
+before the old key is retired from the keyring.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from cryptography.fernet import Fernet
+
+from core import crypto, db
+from core.fingerprint import reseal_fingerprint_key
+from core.keys import rewrap_session_keyring, share_keys
+
+ROTATION_BATCH_SIZE = 1000
+
+
+def begin_rotation():
+    """Add a new current key version and return it."""
+    keyring, _current = crypto.get_keyring()
+    new_version = max(keyring) + 1
+    new_key = Fernet.generate_key()
+    keyring[new_version] = new_key
+
+    with db.transaction():
+        username = rewrap_session_keyring(keyring, new_version)
+        skipped = share_keys(keyring, exclude=username)
+        if skipped:
+            # They'd be left without the new key; they get a key pair on unlock
+            raise ValueError(f"{', '.join(skipped)} must unlock the vault once before the key can be rotated")
+        reseal_fingerprint_key(keyring, new_version)
+    crypto.set_keyring(keyring, new_version)
+    return new_version
+
+
+def rotation_pending():
+    # Entries still under an older key than the current one, or in an older format
+    if not crypto.is_unlocked():
+        return 0
+    current = crypto.current_key_version()
+    older = sum(count for version, count in db.count_entries_by_key_version().items() if version < current)
+    return older + db.count_legacy_entries(current)
+
+
+def run_rotation(progress=None, stop=None, batch_size=ROTATION_BATCH_SIZE, workers=None):
+    """Bring every entry onto the current key version, under a data key.
+
+    progress, if given, is called after each batch with a dict of rotated
+    (data keys re-wrapped), migrated (entries re-sealed from an older storage
+    format), remaining,
+    elapsed and rate. stop is an optional threading.Event; when set, the run
+    ends after the current batch and can be resumed later. Returns the final
+    progress dict.
+    """
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 else 0
+
+    keyring, target = crypto.get_keyring()
+    target_cipher = crypto.get_cipher(keyring[target])
+    stats = {"rotated": 0, "migrated": 0, "remaining": rotation_pending(), "elapsed": 0.0, "rate": 0.0}
+    start = time.perf_counter()
+
+    def batches(fetch, counter):
+        # id-ordered batches from fetch(after_id, limit), with the pool size
+        # to use on each; the pool only pays for itself on full batches
+        after_id = 0
+        while not (stop and stop.is_set()):
+            rows = fetch(after_id, batch_size)
+            if not rows:
+                return
+            yield rows, workers if len(rows) == batch_size else 0
+            after_id = rows[-1][0]
+
+            stats[counter] += len(rows)
+            stats["remaining"] = max(0, stats["remaining"] - len(rows))
+            stats["elapsed"] = time.perf_counter() - start
+            done = stats["rotated"] + stats["migrated"]
+            stats["rate"] = done / stats["elapsed"] if stats["elapsed"] else 0.0
+            if progress:
+                progress(dict(stats))
+
+    for version in db.fetch_key_versions_in_use():
+        source = crypto.get_cipher(keyring[version])
+        legacy = lambda after_id, limit: db.fetch_legacy_entries(version, after_id, limit)
+        for rows, pool in batches(legacy, "migrated"):
+            sealed = source.reseal_many((row[1:] for row in rows), target_cipher, workers=pool)
+            db.save_resealed_entries([(row[0],) + pair for row, pair in zip(rows, sealed)], version, target)
+
+        if version < target:
+            wrapped = lambda after_id, limit: db.fetch_entries_for_rotation(version, after_id, limit)
+            for rows, pool in batches(wrapped, "rotated"):
+                data_keys = source.rewrap_many((row[1] for row in rows), target_cipher, workers=pool)
+                db.save_rotated_entries(list(zip((row[0] for row in rows), data_keys)), version, target)
+    return stats
+
+
+def verify_rotation():
+    """Decrypt every entry under its recorded key version.
+
+    Returns a dict of checked, failed (entry ids that don't decrypt) and
+    stale (entries still on an older version or storage format). When both are empty, keys no
+    entry uses any more are dropped from the unlocked user's keyring.
+    """
+    keyring, current = crypto.get_keyring()
+    ciphers = {version: crypto.get_cipher(key) for version, key in keyring.items()}
+    checked = 0
+    failed = []
+    stale = 0
+    for row in db.iter_export_rows():
+        entry_id, password, key_version, data_key = row[0], row[4], row[9], row[10]
+        checked += 1
+        if key_version != current or not isinstance(data_key, bytes):
+            stale += 1
+        if not password:
+            continue
+        try:
+            ciphers[key_version].open(password, data_key)
+        except Exception:
+            failed.append(entry_id)
+
+    if not failed and not stale and len(keyring) > 1:
+        rewrap_session_keyring({current: keyring[current]}, current)
+        crypto.set_keyring({current: keyring[current]}, current)
+    return {"checked": checked, "failed": failed, "stale": stale}
+
+
+class RotationJob(threading.Thread):
+    """Runs (or resumes) a rotation and its verification in the background."""
+
+    def __init__(self, on_progress=None, on_done=None):
+        super().__init__(daemon=True)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.stop_event = threading.Event()
+        self.result = None
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def run(self):
+        try:
+            stats = run_rotation(self.on_progress, self.stop_event)
+            if not self.stop_event.is_set():
+                stats["verify"] = verify_rotation()
+                if stats["migrated"]:
+                    # Re-sealed rows are much smaller; give the freed pages back
+                    try:
+                        db.vacuum()
+                    except sqlite3.OperationalError as e:
+                        print(f"Vacuum after rotation skipped: {e}")
+            self.result = stats
+        except Exception as e:
+            self.result = {"error": str(e)}
+        finally:
+            db.close_connection()
+        if self.on_done:
+            self.on_done(self.result)
+
+
+_job = None
+
+def start_rotation(new_key=True, on_progress=None, on_done=None):
+    """Start a background rotation; new_key=False resumes an interrupted one."""
+    global _job
+    if _job is not None and _job.is_alive():
+        return _job
+    if new_key:
+        begin_rotation()
+    _job = RotationJob(on_progress, on_done)
+    _job.start()
+    return _job
+
+def resume_rotation(on_progress=None, on_done=None):
+    if rotation_pending():
+        return start_rotation(False, on_progress, on_done)
+    return None
+
+def stop_rotation():
+    # Before lock: the job needs the keyring to keep going
+    global _job
+    if _job is not None:
+        _job.stop()
+        _job = None
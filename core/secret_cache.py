@@ -0,0 +1,92 @@
+"""Decrypted passwords, kept briefly for entries the user is working with.
+
+An entry's password is only decrypted when it is revealed or copied
+(reveal_password). The plaintext is then cached for SECRET_TTL seconds, at
+most SECRET_CACHE_SIZE entries with the least recently used evicted first,
+so copying the same password again skips the crypto. Everything is wiped when
+the vault locks (auto-lock and logout both lock), and an entry is dropped as
+soon as it is edited or deleted.
+
+Python strings can't be overwritten, so the cache holds bytearrays and zeroes
+them on eviction; copies handed out to the UI are outside its control.
+"""
+import collections
+import threading
+import time
+
+from core import crypto, db
+
+SECRET_TTL = 30.0
+SECRET_CACHE_SIZE = 32
+
+
+class SecretCache:
+    def __init__(self, ttl=SECRET_TTL, size=SECRET_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._secrets = collections.OrderedDict()  # entry_id -> (expires, bytearray)
+
+    def get(self, entry_id):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            item = self._secrets.get(entry_id)
+            if item is None:
+                self.misses += 1
+                return None
+            self._secrets.move_to_end(entry_id)
+            self.hits += 1
+            return item[1].decode()
+
+    def put(self, entry_id, secret: str):
+        now = time.monotonic()
+        with self._lock:
+            self._drop(entry_id)
+            self._secrets[entry_id] = (now + self.ttl, bytearray(secret.encode()))
+            while len(self._secrets) > self.size:
+                self._drop(next(iter(self._secrets)))
+            self._expire(now)
+
+    def forget(self, entry_id):
+        with self._lock:
+            self._drop(entry_id)
+
+    def wipe(self):
+        with self._lock:
+            for entry_id in list(self._secrets):
+                self._drop(entry_id)
+
+    def __len__(self):
+        return len(self._secrets)
+
+    def _expire(self, now):
+        # Caller holds _lock. The TTL runs from decryption, not last use, so
+        # check every entry; there are at most `size`.
+        for entry_id in [e for e, (expires, _secret) in self._secrets.items() if expires <= now]:
+            self._drop(entry_id)
+
+    def _drop(self, entry_id):
+        item = self._secrets.pop(entry_id, None)
+        if item is not None:
+            secret = item[1]
+            secret[:] = bytes(len(secret))
+
+
+_cache = SecretCache()
+crypto.add_lock_listener(_cache.wipe)
+db.add_entry_listener(_cache.forget)
+
+
+def reveal_password(entry_id, token, data_key=None, version=None) -> str:
+    """The entry's plaintext password, from the cache or decrypted now."""
+    secret = _cache.get(entry_id)
+    if secret is None:
+        secret = crypto.open_password(token, data_key, version) if token else ""
+        _cache.put(entry_id, secret)
+    return secret
+
+def cache_stats():
+    return {"size": len(_cache), "hits": _cache.hits, "misses": _cache.misses}
@@ -0,0 +1,665 @@
+"""Password strength estimation in the style of zxcvbn.
+
+A password is scored by the guesses an attacker would need when trying the
+likely patterns first: common passwords, English words and names (ranked by
+frequency, so "password" costs a couple of guesses and a rare word
+thousands) with capitals, l33t substitutions or reversal; keyboard walks;
+repeats; sequences like "abc" or "9876"; dates and years. Anything no
+pattern covers is brute-forced at 10 guesses a character, and the cheapest
+way to cover the whole password, found by dynamic programming over the
+matches, is the estimate.
+
+The dictionaries ship compiled (core/data/strength.bin, built from the .txt
+lists beside it by build_dictionaries) as:
+
+    b"VLTS", format version (1 byte), dictionary count (1 byte)
+    per dictionary: name length (1 byte), blob size (uint32), name,
+    zlib-compressed "\\n"-joined words, most common first
+
+and are read on first use. Every matcher and the dynamic program only look
+back from the character being added, so a StrengthMeter keeps everything
+computed for the unchanged prefix of the password and a keystroke costs one
+character's worth of work.
+"""
+import datetime
+import functools
+import math
+import os
+import re
+import struct
+import threading
+import zlib
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DICTIONARIES_PATH = os.path.join(DATA_DIR, "strength.bin")
+DICTIONARIES_MAGIC = b"VLTS"
+DICTIONARIES_VERSION = 1
+_HEADER = struct.Struct("<4sBB")
+_ENTRY = struct.Struct("<BI")
+
+# (name, text sources) in the order build_dictionaries writes them; later
+# sources rank after earlier ones
+DICTIONARY_SOURCES = [
+    ("passwords", ["passwords.txt"]),
+    ("english", ["english.txt", "wordlist.txt"]),
+    ("names", ["names.txt"]),
+]
+
+BRUTEFORCE_LOG10 = 1  # 10 guesses per uncovered character
+MIN_SINGLE_CHAR_LOG10 = 1
+MIN_MULTI_CHAR_LOG10 = math.log10(50)
+MIN_DICTIONARY_LENGTH = 3
+MAX_SEQUENCE_DELTA = 5
+MIN_YEAR_SPACE = 20
+DATE_MIN_YEAR = 1000
+DATE_MAX_YEAR = 2050
+REFERENCE_YEAR = datetime.date.today().year
+
+# log10(guesses) needed for scores 1 to 4
+SCORE_THRESHOLDS = (3, 6, 8, 10)
+SCORE_LABELS = (
+    ("Very weak", "red"),
+    ("Weak", "orangered"),
+    ("Fair", "orange"),
+    ("Strong", "yellowgreen"),
+    ("Very strong", "green"),
+)
+# log10(guesses) at which a meter shows full
+FULL_METER_LOG10 = 14
+
+L33T_TABLE = {
+    "4": "a", "@": "a", "8": "b", "(": "c", "{": "c", "[": "c", "<": "c", "3": "e",
+    "6": "g", "9": "g", "1": "il", "!": "i", "|": "il", "7": "lt", "0": "o",
+    "$": "s", "5": "s", "+": "t", "%": "x", "2": "z",
+}
+MAX_L33T_VARIANTS = 16
+
+QWERTY = (
+    "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+",
+    "qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|",
+    "aA sS dD fF gG hH jJ kK lL ;: '\"",
+    "zZ xX cC vV bB nN mM ,< .> /?",
+)
+KEYPAD = (
+    "  / * -",
+    "7 8 9 +",
+    "4 5 6",
+    "1 2 3",
+    "  0 .",
+)
+
+_DATE_WITH_SEPARATOR = re.compile(r"(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})")
+_RECENT_YEAR = re.compile(r"19\d\d|20\d\d")
+# Where to cut a run of digits into day, month and year, by length
+_DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+
+
+def build_dictionaries(dst=DICTIONARIES_PATH, sources=None, data_dir=DATA_DIR):
+    """Compile the ranked word lists into the file the estimator loads.
+
+    sources is a list of (name, [text files]), default DICTIONARY_SOURCES;
+    each file lists one word per line, most common first. Returns
+    {name: word count}.
+    """
+    blobs = []
+    counts = {}
+    for name, paths in sources or DICTIONARY_SOURCES:
+        words = []
+        seen = set()
+        for path in paths:
+            with open(os.path.join(data_dir, path), encoding="utf-8") as f:
+                for line in f:
+                    word = line.strip().lower()
+                    if word and word not in seen:
+                        seen.add(word)
+                        words.append(word)
+        counts[name] = len(words)
+        blobs.append((name.encode(), zlib.compress("\n".join(words).encode(), 9)))
+
+    tmp = dst + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(DICTIONARIES_MAGIC, DICTIONARIES_VERSION, len(blobs)))
+            for name, blob in blobs:
+                f.write(_ENTRY.pack(len(name), len(blob)))
+                f.write(name)
+                f.write(blob)
+        os.replace(tmp, dst)
+    finally:
+        # Only still there if writing or replacing failed
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return counts
+
+
+def load_dictionaries(path=DICTIONARIES_PATH):
+    """{name: {word: rank}} from a compiled dictionary file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != DICTIONARIES_MAGIC or version != DICTIONARIES_VERSION:
+            raise ValueError(f"{path} is not a compiled dictionary file")
+        pos = _HEADER.size
+        dictionaries = {}
+        for _ in range(count):
+            name_length, size = _ENTRY.unpack_from(data, pos)
+            pos += _ENTRY.size
+            name = data[pos:pos + name_length].decode()
+            pos += name_length
+            words = zlib.decompress(data[pos:pos + size]).decode().split("\n")
+            pos += size
+            dictionaries[name] = dict(zip(words, range(1, len(words) + 1)))
+    except (struct.error, zlib.error):
+        raise ValueError(f"{path} is truncated")
+    return dictionaries
+
+
+_dictionaries = None
+_dictionaries_lock = threading.Lock()
+
+def get_dictionaries():
+    """(dictionaries, longest word length), loaded once and shared."""
+    global _dictionaries
+    with _dictionaries_lock:
+        if _dictionaries is None:
+            dictionaries = load_dictionaries()
+            _dictionaries = dictionaries, max(len(w) for words in dictionaries.values() for w in words)
+        return _dictionaries
+
+
+def _keyboard(rows, slanted):
+    # (adjacency, shifted characters, starting positions, average degree) for
+    # a keyboard drawn as rows of keys. adjacency maps a pair of characters on
+    # neighbouring keys to the direction of the step between them.
+    positions = {}
+    for y, row in enumerate(rows):
+        if slanted:
+            # each row sits half a key right of the one above it
+            for x, key in enumerate(row.split()):
+                positions[(x + (1 if y else 0), y)] = key
+        else:
+            for col, key in enumerate(row):
+                if key != " ":
+                    positions[(col // 2, y)] = key
+    if slanted:
+        steps = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+    else:
+        steps = ((-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1))
+
+    adjacency = {}
+    degrees = 0
+    for (x, y), key in positions.items():
+        for direction, (dx, dy) in enumerate(steps):
+            neighbour = positions.get((x + dx, y + dy))
+            if neighbour is None:
+                continue
+            degrees += 1
+            for a in key:
+                for b in neighbour:
+                    adjacency[(a, b)] = direction
+    shifted = frozenset(key[1] for key in positions.values() if len(key) > 1)
+    return adjacency, shifted, len(positions), degrees / len(positions)
+
+
+KEYBOARDS = {"qwerty": _keyboard(QWERTY, True), "keypad": _keyboard(KEYPAD, False)}
+
+
+class Match:
+    """A pattern covering password[i:j + 1], costing 10 ** log_guesses guesses."""
+
+    __slots__ = ("pattern", "i", "j", "token", "log_guesses", "detail")
+
+    def __init__(self, pattern, i, j, token, log_guesses, **detail):
+        self.pattern = pattern
+        self.i = i
+        self.j = j
+        self.token = token
+        floor = MIN_SINGLE_CHAR_LOG10 if i == j else MIN_MULTI_CHAR_LOG10
+        self.log_guesses = max(log_guesses, floor)
+        self.detail = detail
+
+    def __repr__(self):
+        return f"Match({self.pattern!r}, {self.i}, {self.j}, {self.token!r}, {self.log_guesses:.2f})"
+
+
+def _variations(a, b):
+    # Ways of picking which of a + b characters were changed, as zxcvbn counts them
+    if not a or not b:
+        return 2
+    return sum(math.comb(a + b, k) for k in range(1, min(a, b) + 1))
+
+
+def _uppercase_variations(token):
+    upper = sum(c.isupper() for c in token)
+    if not upper:
+        return 1
+    lower = sum(c.islower() for c in token)
+    if not lower or upper == 1 and (token[0].isupper() or token[-1].isupper()):
+        return 2
+    return _variations(upper, lower)
+
+
+def _unl33t(token):
+    # (plain word, {letter: times substituted}) for each way of reading the
+    # l33t characters in token as letters
+    variants = [("", {})]
+    for c in token:
+        letters = L33T_TABLE.get(c)
+        if letters is None:
+            variants = [(word + c, subs) for word, subs in variants]
+            continue
+        grown = []
+        for word, subs in variants:
+            for letter in letters:
+                grown.append((word + letter, {**subs, letter: subs.get(letter, 0) + 1}))
+        variants = grown[:MAX_L33T_VARIANTS]
+    return variants
+
+
+def _l33t_variations(word, subs):
+    variations = 1
+    for letter, subbed in subs.items():
+        variations *= _variations(subbed, word.count(letter) - subbed)
+    return variations
+
+
+def _year_space(year):
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+def _date_year(parts):
+    # The year of a date read from three digit strings, day and month in
+    # either order, year first or last; None if it isn't a plausible date
+    for y, rest in ((parts[2], parts[:2]), (parts[0], parts[1:])):
+        if len(y) == 4:
+            year = int(y)
+            if not DATE_MIN_YEAR <= year <= DATE_MAX_YEAR:
+                continue
+        elif len(y) == 2:
+            year = int(y)
+            year += 1900 if year > 50 else 2000
+        else:
+            continue
+        if any(len(p) > 2 for p in rest):
+            continue
+        a, b = int(rest[0]), int(rest[1])
+        if 1 <= a <= 31 and 1 <= b <= 12 or 1 <= a <= 12 and 1 <= b <= 31:
+            return year
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _repeat_base_log_guesses(base):
+    return StrengthMeter().update(base).guesses_log10
+
+
+def _total_log10(count, log_product):
+    # log10 of count! * product + 10000 ** (count - 1): the guesses for the
+    # matches, in any order, plus a penalty that keeps long chains honest
+    if not count:
+        return 0.0
+    a = math.lgamma(count + 1) / math.log(10) + log_product
+    b = 4.0 * (count - 1)
+    high, low = max(a, b), min(a, b)
+    return high + math.log10(1 + 10 ** (low - high))
+
+
+def _prune(states):
+    # Drop states another state beats on both match count and guesses. A state
+    # still extending a bruteforce run can only be beaten by one with fewer
+    # matches or that is extending a run too, since adding a character to it
+    # doesn't start a new match.
+    kept = {}
+    best_below = math.inf
+    best_tail = math.inf
+    for count in sorted({count for count, _ in states}):
+        tail = states.get((count, True))
+        if tail is not None and tail[0] < min(best_below, best_tail):
+            kept[(count, True)] = tail
+            best_tail = tail[0]
+        level_best = min(best_below, best_tail)
+        plain = states.get((count, False))
+        if plain is not None and plain[0] < level_best:
+            kept[(count, False)] = plain
+            level_best = plain[0]
+        best_below = level_best
+    return kept
+
+
+class Estimate:
+    """Result of scoring one password.
+
+    guesses_log10 is log10 of the estimated guesses; score runs 0 (very weak)
+    to 4 (very strong) with a label and colour to show it; percent fills a
+    meter; warning names the weakest pattern found, or is empty. sequence is
+    the cheapest list of Matches covering the password, with runs of
+    bruteforce as "bruteforce" matches.
+    """
+
+    def __init__(self, guesses_log10, sequence):
+        self.guesses_log10 = guesses_log10
+        self.score = sum(guesses_log10 >= t for t in SCORE_THRESHOLDS)
+        self.label, self.color = SCORE_LABELS[self.score]
+        self.percent = min(100, int(guesses_log10 * 100 / FULL_METER_LOG10))
+        self.sequence = sequence
+        self.warning = _warning(sequence, self.score)
+
+    def __repr__(self):
+        return f"Estimate(score={self.score}, guesses=1e{self.guesses_log10:.1f})"
+
+
+def _warning(sequence, score):
+    if score > 2:
+        return ""
+    found = [m for m in sequence if m.pattern != "bruteforce"]
+    if not found:
+        return ""
+    m = max(found, key=lambda m: m.j - m.i)
+    alone = len(sequence) == 1
+    if m.pattern == "dictionary":
+        name = m.detail["dictionary"]
+        if name == "passwords":
+            if not alone or m.detail.get("l33t") or m.detail.get("reversed"):
+                return "This is similar to a commonly used password"
+            rank = m.detail["rank"]
+            if rank <= 10:
+                return "This is a top-10 common password"
+            if rank <= 100:
+                return "This is a top-100 common password"
+            return "This is a very common password"
+        if name == "names":
+            return "Names and surnames are easy to guess"
+        if name == "user_inputs":
+            return "Avoid using your name, email or the site name"
+        if alone:
+            return "A word by itself is easy to guess"
+        return "Common words are easy to guess"
+    if m.pattern == "spatial":
+        if m.detail["turns"] == 1:
+            return "Straight rows of keys are easy to guess"
+        return "Short keyboard patterns are easy to guess"
+    if m.pattern == "repeat":
+        if len(m.detail["base"]) == 1:
+            return 'Repeats like "aaa" are easy to guess'
+        return 'Repeats like "abcabc" are barely harder to guess than "abc"'
+    if m.pattern == "sequence":
+        return "Sequences like abc or 6543 are easy to guess"
+    if m.pattern == "year":
+        return "Recent years are easy to guess"
+    return "Dates are often easy to guess"
+
+
+class _Step:
+    # What the matchers and the dynamic program know after one character:
+    # the running keyboard walks, sequence and repeats that end here, and
+    # the best ways of covering the password up to here
+    __slots__ = ("spatial", "sequence", "repeats", "states")
+
+    def __init__(self, spatial, sequence, repeats, states):
+        self.spatial = spatial
+        self.sequence = sequence
+        self.repeats = repeats
+        self.states = states
+
+
+class StrengthMeter:
+    """Incremental strength estimator for a password being typed.
+
+    update(password) returns an Estimate, reusing the work done for whatever
+    prefix password shares with the previous one. user_inputs are strings
+    such as the username, email or site name, matched as a dictionary of
+    their own.
+    """
+
+    def __init__(self, user_inputs=()):
+        self._dictionaries = None
+        self._max_length = 0
+        self.set_user_inputs(user_inputs)
+
+    def set_user_inputs(self, user_inputs):
+        inputs = []
+        for text in user_inputs:
+            # match the whole input and its parts, so "alice.smith@example.com"
+            # also catches "alice" and "smith"
+            text = (text or "").strip().lower()
+            inputs.append(text)
+            inputs.extend(re.split(r"[^a-z0-9]+", text))
+        inputs = tuple(dict.fromkeys(w for w in inputs if len(w) >= MIN_DICTIONARY_LENGTH))
+        if self._dictionaries is not None and inputs == self._user_inputs:
+            return
+        self._user_inputs = inputs
+        self._dictionaries = None
+        self.reset()
+
+    def reset(self):
+        self._password = ""
+        self._lower = []
+        self._steps = [_Step({}, (0, None), {}, {(0, False): (0.0, None)})]
+
+    def _load(self):
+        dictionaries, self._max_length = get_dictionaries()
+        self._dictionaries = list(dictionaries.items())
+        if self._user_inputs:
+            self._dictionaries.append(("user_inputs", {w: rank for rank, w in enumerate(self._user_inputs, 1)}))
+            self._max_length = max(self._max_length, *map(len, self._user_inputs))
+
+    def update(self, password) -> Estimate:
+        if self._dictionaries is None:
+            self._load()
+        keep = 0
+        for a, b in zip(self._password, password):
+            if a != b:
+                break
+            keep += 1
+        del self._steps[keep + 1:]
+        del self._lower[keep:]
+        self._password = password
+        for j in range(keep, len(password)):
+            lowered = password[j].lower()
+            self._lower.append(lowered if len(lowered) == 1 else password[j])
+            self._steps.append(self._advance(j))
+        return self._result()
+
+    def _advance(self, j):
+        s = self._password
+        prev = self._steps[j]
+        matches = []
+        spatial = self._match_spatial(s, j, prev, matches)
+        sequence = self._match_sequence(s, j, prev, matches)
+        repeats = self._match_repeats(s, j, prev, matches)
+        self._match_dictionaries(s, j, matches)
+        self._match_dates(s, j, matches)
+
+        candidates = {}
+
+        def offer(key, value):
+            best = candidates.get(key)
+            if best is None or value[0] < best[0]:
+                candidates[key] = value
+
+        for (count, tail), (log_product, _) in prev.states.items():
+            offer((count if tail else count + 1, True),
+                  (log_product + BRUTEFORCE_LOG10, (j, (count, tail), None)))
+        for m in matches:
+            for (count, tail), (log_product, _) in self._steps[m.i].states.items():
+                offer((count + 1, False), (log_product + m.log_guesses, (m.i, (count, tail), m)))
+        return _Step(spatial, sequence, repeats, _prune(candidates))
+
+    def _match_spatial(self, s, j, prev, matches):
+        walks = {}
+        for name, (adjacency, shifted_keys, starts, degree) in KEYBOARDS.items():
+            c = s[j]
+            shifted = c in shifted_keys
+            last = prev.spatial.get(name)
+            direction = adjacency.get((s[j - 1], c)) if j else None
+            if last is None or direction is None:
+                walks[name] = (1, 0, int(shifted), None)
+                continue
+            length, turns, shifts, last_direction = last
+            walk = (length + 1, turns + (direction != last_direction), shifts + shifted, direction)
+            walks[name] = walk
+            length, turns, shifts, _ = walk
+            if length < 3:
+                continue
+            guesses = 0
+            for i in range(2, length + 1):
+                for k in range(1, min(turns, i - 1) + 1):
+                    guesses += math.comb(i - 1, k - 1) * starts * degree ** k
+            if shifts:
+                guesses *= _variations(shifts, length - shifts)
+            i = j - length + 1
+            matches.append(Match("spatial", i, j, s[i:j + 1], math.log10(guesses),
+                                 graph=name, turns=turns, shifted=shifts))
+        return walks
+
+    def _match_sequence(self, s, j, prev, matches):
+        if not j:
+            return (1, None)
+        delta = ord(s[j]) - ord(s[j - 1])
+        if not 0 < abs(delta) <= MAX_SEQUENCE_DELTA:
+            return (1, None)
+        length, last_delta = prev.sequence
+        length = length + 1 if delta == last_delta else 2
+        if length >= 3:
+            i = j - length + 1
+            first = s[i]
+            if first in "aAzZ019":
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            guesses = base * length * (1 if delta > 0 else 2)
+            matches.append(Match("sequence", i, j, s[i:j + 1], math.log10(guesses), delta=delta))
+        return (length, delta)
+
+    def _match_repeats(self, s, j, prev, matches):
+        # repeats[period] counts the characters so far that equal the one
+        # period places before them
+        repeats = {}
+        for period in range(1, j + 1):
+            if s[j] != s[j - period]:
+                continue
+            run = prev.repeats.get(period, 0) + 1
+            repeats[period] = run
+            times = (run + period) // period
+            if times < 2:
+                continue
+            # skip a period that is itself a repeat of a shorter one ("abab"
+            # as a base) -- the shorter period already covers it
+            if any(period % p == 0 and repeats.get(p, 0) >= period for p in range(1, period)):
+                continue
+            i = j + 1 - times * period
+            base = s[i:i + period]
+            log_guesses = _repeat_base_log_guesses(base) + math.log10(times)
+            matches.append(Match("repeat", i, j, s[i:j + 1], log_guesses, base=base, times=times))
+        return repeats
+
+    def _match_dictionaries(self, s, j, matches):
+        lower = self._lower
+        for i in range(max(0, j + 1 - self._max_length), j - MIN_DICTIONARY_LENGTH + 2):
+            token = s[i:j + 1]
+            word = "".join(lower[i:j + 1])
+            reversed_word = word[::-1]
+            l33t = [v for v in _unl33t(word) if v[1]] if any(c in L33T_TABLE for c in word) else ()
+            upper = _uppercase_variations(token)
+            for name, words in self._dictionaries:
+                rank = words.get(word)
+                if rank:
+                    matches.append(Match("dictionary", i, j, token, math.log10(rank * upper),
+                                         dictionary=name, rank=rank, word=word))
+                rank = words.get(reversed_word) if reversed_word != word else None
+                if rank:
+                    matches.append(Match("dictionary", i, j, token, math.log10(rank * upper * 2),
+                                         dictionary=name, rank=rank, word=reversed_word, reversed=True))
+                for plain, subs in l33t:
+                    rank = words.get(plain)
+                    if rank:
+                        guesses = rank * upper * _l33t_variations(plain, subs)
+                        matches.append(Match("dictionary", i, j, token, math.log10(guesses),
+                                             dictionary=name, rank=rank, word=plain, l33t=True))
+
+    def _match_dates(self, s, j, matches):
+        for length in range(4, 11):
+            i = j + 1 - length
+            if i < 0:
+                break
+            token = s[i:j + 1]
+            if token.isdigit():
+                if length == 4 and _RECENT_YEAR.fullmatch(token):
+                    matches.append(Match("year", i, j, token, math.log10(_year_space(int(token)))))
+                for a, b in _DATE_SPLITS.get(length, ()):
+                    year = _date_year((token[:a], token[a:b], token[b:]))
+                    if year is not None:
+                        matches.append(Match("date", i, j, token, math.log10(_year_space(year) * 365)))
+                        break
+            elif length >= 6:
+                m = _DATE_WITH_SEPARATOR.fullmatch(token)
+                if m:
+                    year = _date_year((m.group(1), m.group(3), m.group(4)))
+                    if year is not None:
+                        matches.append(Match("date", i, j, token, math.log10(_year_space(year) * 365 * 4),
+                                             separator=m.group(2)))
+
+    def _result(self):
+        n = len(self._password)
+        if not n:
+            return Estimate(0.0, [])
+        states = self._steps[n].states
+        key = min(states, key=lambda k: _total_log10(k[0], states[k][0]))
+        total = _total_log10(key[0], states[key][0])
+
+        # walk the back pointers to recover the matches, joining bruteforce runs
+        sequence = []
+        pos = n
+        end = None
+        while pos:
+            _, (prev_pos, prev_key, match) = self._steps[pos].states[key]
+            if match is None:
+                if end is None:
+                    end = pos - 1
+            else:
+                if end is not None:
+                    sequence.append(self._bruteforce(pos, end))
+                    end = None
+                sequence.append(match)
+            pos, key = prev_pos, prev_key
+        if end is not None:
+            sequence.append(self._bruteforce(0, end))
+        sequence.reverse()
+        return Estimate(total, sequence)
+
+    def _bruteforce(self, i, j):
+        return Match("bruteforce", i, j, self._password[i:j + 1], BRUTEFORCE_LOG10 * (j - i + 1))
+
+
+def estimate(password, user_inputs=()) -> Estimate:
+    """Score a single password; see StrengthMeter for typing-time scoring."""
+    return StrengthMeter(user_inputs).update(password)
+
+
+def estimate_many(passwords, user_inputs=()):
+    """Estimates for a list of passwords, in the same order.
+
+    Duplicates are scored once, and the rest are fed to one meter in sorted
+    order so neighbours share the work for their common prefix.
+    """
+    meter = StrengthMeter(user_inputs)
+    results = {}
+    for password in sorted(set(passwords)):
+        results[password] = meter.update(password)
+    return [results[p] for p in passwords]
+
+
+if __name__ == "__main__":
+    # python -m core.strength -- recompile the shipped dictionaries
+    for name, count in build_dictionaries().items():
+        print(f"{name}: {count} words")
+    print(f"written to {DICTIONARIES_PATH}")
@@ -1,39 +1,14 @@
-import random
-import string
-import re
-
 def generate_password(length=12, use_upper=True, use_lower=True, use_digits=True, use_symbols=True):
-    chars = ''
-    if use_upper:
-        chars += string.ascii_uppercase
-    if use_lower:
-        chars += string.ascii_lowercase
-    if use_digits:
-        chars += string.digits
-    if use_symbols:
-        chars += string.punctuation
-
-    if not chars:
-        return ''  # or raise ValueError
+    # CSPRNG-backed, with at least one character of each selected class
+    from core.generator import PasswordPolicy, generate
 
-    return ''.join(random.choice(chars) for _ in range(length))
+    if not (use_upper or use_lower or use_digits or use_symbols):
+        return ''
+    return generate(PasswordPolicy(length, use_upper, use_lower, use_digits, use_symbols))
 
-def get_password_strength(password):
-    score = 0
-    if len(password) >= 8:
-        score += 1
-    if re.search(r'[A-Z]', password):
-        score += 1
-    if re.search(r'[a-z]', password):
-        score += 1
-    if re.search(r'[0-9]', password):
-        score += 1
-    if re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-        score += 1
+def get_password_strength(password, user_inputs=()):
+    # Label and colour from the guess-based estimator in core.strength
+    from core.strength import estimate
 
-    if score <= 2:
-        return "Weak", "red"
-    elif score == 3 or score == 4:
-        return "Medium", "orange"
-    else:
-        return "Strong", "green"
+    result = estimate(password, user_inputs)
+    return result.label, result.color
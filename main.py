@@ -1,6 +1,5 @@
 import sys
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QFont, QFontDatabase
 from core.db import init_db
 from ui.start import StartPage
 
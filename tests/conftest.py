@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from core import crypto, db, keys
+
+# Cheapest KDF the code accepts, so tests don't calibrate or wait on it
+FAST_KDF = {"kdf": "scrypt", "log_n": 10, "r": 8, "p": 1}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # vault.db, vault.key and breaches.bin are all relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    crypto.lock()
+    db.close_all_connections()
+
+
+@pytest.fixture
+def vault(workdir):
+    """An empty, migrated vault with a fast KDF."""
+    db.init_db()
+    db.set_setting(keys.KDF_SETTING, json.dumps(FAST_KDF, sort_keys=True))
+    return workdir
+
+
+@pytest.fixture
+def unlocked(vault):
+    """The vault unlocked as alice, its first user."""
+    keys.enroll("alice", "alice-master")
+    return "alice"
+
+
+def add_entries(names):
+    ids = []
+    for name in names:
+        token, data_key, version = crypto.seal_password(f"{name}-secret")
+        ids.append(db.insert_password_entry(name, "", "", token, "", None, None, version, data_key))
+    return ids
+
+
+def read_password(entry_id):
+    row = db.fetch_password_entry(entry_id)
+    return crypto.open_password(row[3], row[8], row[7])
@@ -0,0 +1,112 @@
+import datetime
+import hashlib
+
+import pytest
+
+from conftest import add_entries
+from core import audit, breach, crypto, db
+
+TODAY = datetime.date(2026, 6, 1)
+
+
+@pytest.fixture(autouse=True)
+def no_corpus(monkeypatch):
+    monkeypatch.setattr(breach, "_corpus", None)
+    monkeypatch.setattr(breach, "_corpus_stat", None)
+
+
+def add(name, password, expiry_date=None):
+    token, data_key, version = crypto.seal_password(password)
+    return db.insert_password_entry(name, "", "", token, "", None, expiry_date, version, data_key)
+
+
+def test_health_report(unlocked):
+    weak = add("weak", "password")
+    add("reused-1", "Correct-Horse-42-Battery")
+    add("reused-2", "Correct-Horse-42-Battery")
+    add("strong", "Xk9#vQ2!mZp7-unique")
+    expired = add("expired", "Tq8@wLz3#nVb1", "2026-05-01")
+    old = add("old", "Mh5!kRp9&xWc2")
+    with db.transaction() as c:
+        c.execute("UPDATE passwords SET last_modified = '2024-01-01 00:00:00' WHERE id = ?", (old,))
+
+    assert audit.run_audit(workers=0)["audited"] == 6
+    summary, issues = audit.health_report(TODAY)
+    assert summary == {"entries": 6, "weak": 1, "reused": 2, "breached": None, "old": 1, "expired": 1,
+                       "expiring": 0, "unreadable": 0}
+    by_id = {issue["id"]: issue for issue in issues}
+    assert by_id[weak]["warning"] == "This is a top-10 common password"
+    assert by_id[expired]["expired"] and by_id[old]["age_days"] > audit.MAX_AGE_DAYS
+
+
+def test_audit_is_incremental(unlocked):
+    (entry_id, _other) = add_entries(["a", "b"])
+    assert audit.run_audit(workers=0)["audited"] == 2
+    assert audit.run_audit(workers=0)["audited"] == 0
+
+    token, data_key, version = crypto.seal_password("password")
+    db.update_password_entry(entry_id, "a", "", "", token, "", None, None, version, data_key)
+    assert audit.run_audit(workers=0)["audited"] == 1
+    issues = {issue["id"]: issue for issue in audit.health_report(TODAY)[1]}
+    assert issues[entry_id]["warning"] == "This is a top-10 common password"
+
+
+def test_audit_in_worker_processes(unlocked):
+    weak = add("weak", "password")
+    add_entries(f"entry-{i}" for i in range(30))
+    assert audit.run_audit(workers=2, batch_size=8)["audited"] == 31
+    summary, issues = audit.health_report(TODAY)
+    assert summary["entries"] == 31
+    assert [issue["warning"] for issue in issues if issue["id"] == weak] == ["This is a top-10 common password"]
+
+
+def test_unreadable_entries(unlocked):
+    entry_id = add("broken", "whatever")
+    with db.transaction() as c:
+        c.execute("UPDATE passwords SET password = ? WHERE id = ?", (b"\x01" + bytes(40), entry_id))
+    audit.run_audit(workers=0)
+    summary, issues = audit.health_report(TODAY)
+    assert summary["unreadable"] == 1 and issues[0]["warning"] == audit.UNREADABLE
+
+
+def fingerprint_of(entry_id):
+    return db.get_connection().execute("SELECT fingerprint FROM passwords WHERE id = ?", (entry_id,)).fetchone()[0]
+
+
+def test_unreadable_entry_keeps_its_fingerprint(unlocked):
+    entry_id = add("broken", "Tq8@wLz3#nVb1")
+    audit.run_audit(workers=0)
+    stored = fingerprint_of(entry_id)
+    with db.transaction() as c:
+        c.execute("UPDATE passwords SET password = ?, last_modified = '2026-06-02 00:00:00' WHERE id = ?",
+                  (b"\x01" + bytes(40), entry_id))
+    assert audit.run_audit(workers=0)["audited"] == 1
+    assert stored is not None and fingerprint_of(entry_id) == stored
+
+
+def test_entries_under_an_unseen_key_stay_pending(unlocked):
+    # As if a rotation re-wrapped the entry after the audit read the keyring
+    entry_id = add("rotated", "Tq8@wLz3#nVb1")
+    audit.run_audit(workers=0)
+    stored = fingerprint_of(entry_id)
+    with db.transaction() as c:
+        c.execute("UPDATE passwords SET key_version = 99, last_modified = '2026-06-02 00:00:00' WHERE id = ?",
+                  (entry_id,))
+    stats = audit.run_audit(workers=0)
+    assert (stats["audited"], stats["remaining"]) == (0, 1)
+    assert fingerprint_of(entry_id) == stored
+    assert audit.health_report(TODAY)[0]["unreadable"] == 0
+
+
+def test_new_corpus_makes_every_entry_due(unlocked, workdir):
+    add("leaked", "Tq8@wLz3#nVb1")
+    add("safe", "Mh5!kRp9&xWc2")
+    assert audit.run_audit(workers=0)["audited"] == 2
+
+    with open("dump.txt", "w") as f:
+        f.write(f"{hashlib.sha1(b'Tq8@wLz3#nVb1').hexdigest()}:42\n")
+    breach.build_corpus("dump.txt")
+    assert audit.run_audit(workers=0)["audited"] == 2
+    summary, issues = audit.health_report(TODAY)
+    assert summary["breached"] == 1
+    assert [issue["breached"] for issue in issues if issue["name"] == "leaked"] == [42]
@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+import pytest
+
+from core import breach
+
+
+def write_dump(path, entries):
+    with open(path, "w") as f:
+        for password, seen in entries:
+            f.write(f"{hashlib.sha1(password.encode()).hexdigest().upper()}:{seen}\n")
+
+
+def test_corpus_lookups(workdir):
+    entries = [(f"password{i}", i + 1) for i in range(500)]
+    # Repeats are merged and their counts added
+    write_dump("dump.txt", entries + [("password7", 100)])
+
+    written = breach.build_corpus("dump.txt", run_size=64)
+    assert written == 500
+    corpus = breach.BreachCorpus()
+    try:
+        assert len(corpus) == 500
+        assert corpus.check("password0") == 1
+        assert corpus.check("password499") == 500
+        assert corpus.check("password7") == 108
+        assert corpus.check("not in the dump") == 0
+    finally:
+        corpus.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_corpus_cache(monkeypatch):
+    # get_corpus caches by path, size and mtime; each test has its own file
+    monkeypatch.setattr(breach, "_corpus", None)
+    monkeypatch.setattr(breach, "_corpus_stat", None)
+
+
+def test_breach_count_without_corpus(workdir):
+    assert breach.breach_count("password0") is None
+
+
+def test_breach_count_picks_up_new_corpus(workdir):
+    write_dump("dump.txt", [("hunter2", 17)])
+    breach.build_corpus("dump.txt")
+    assert breach.breach_count("hunter2") == 17
+    assert breach.breach_count("") is None
+
+
+def test_plain_dump(workdir):
+    with open("plain.txt", "w") as f:
+        f.write("letmein\nletmein\nqwerty\n\n")
+    assert breach.build_corpus("plain.txt", "plain.bin", plain=True) == 2
+    corpus = breach.BreachCorpus("plain.bin")
+    assert corpus.check("letmein") == 2
+    corpus.close()
+
+
+def test_failed_build_leaves_nothing_behind(workdir):
+    write_dump("dump.txt", [(f"password{i}", 1) for i in range(10)])
+    with open("dump.txt", "a") as f:
+        f.write("not-a-hash:3\n")
+    with pytest.raises(ValueError, match="line 11"):
+        breach.build_corpus("dump.txt", run_size=4)
+    assert sorted(os.listdir()) == ["dump.txt"]
+
+
+def test_failed_replace_leaves_nothing_behind(workdir, monkeypatch):
+    write_dump("dump.txt", [(f"password{i}", 1) for i in range(10)])
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(breach.os, "replace", fail)
+    with pytest.raises(OSError):
+        breach.build_corpus("dump.txt", run_size=4)
+    assert sorted(os.listdir()) == ["dump.txt"]
@@ -0,0 +1,67 @@
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+
+from conftest import read_password
+from core import crypto, db, rotation
+from core.crypto import BLOB_VERSION, NONCE_SIZE, Cipher
+
+
+@pytest.fixture
+def cipher():
+    return Cipher(Fernet.generate_key())
+
+
+def test_seal_and_open(cipher):
+    token, data_key = cipher.seal("hunter2")
+    assert cipher.open(token, data_key) == "hunter2"
+    # Every entry gets its own data key
+    token2, data_key2 = cipher.seal("hunter2")
+    assert token2 != token and cipher.unwrap(data_key2) != cipher.unwrap(data_key)
+
+
+def test_open_needs_the_right_vault_key(cipher):
+    token, data_key = cipher.seal("hunter2")
+    with pytest.raises(InvalidTag):
+        Cipher(Fernet.generate_key()).open(token, data_key)
+
+
+def test_rewrap_leaves_ciphertext_alone(cipher):
+    target = Cipher(Fernet.generate_key())
+    token, data_key = cipher.seal("hunter2")
+    (rewrapped,) = cipher.rewrap_many([data_key], target)
+    assert target.open(token, rewrapped) == "hunter2"
+
+
+def test_opens_older_formats(cipher):
+    # Fernet text from before data keys, and a Fernet data key as text
+    assert cipher.open(cipher.encrypt("plain fernet")) == "plain fernet"
+    data_key = Fernet.generate_key()
+    token = Fernet(data_key).encrypt(b"fernet envelope").decode()
+    assert cipher.open(token, cipher.encrypt(data_key.decode())) == "fernet envelope"
+
+
+def test_pooled_batches_keep_order(cipher):
+    texts = [f"password-{i}" for i in range(1200)]
+    sealed = list(cipher.seal_many(iter(texts), workers=2, chunk_size=100))
+    assert [cipher.open(token, data_key) for token, data_key in sealed] == texts
+
+
+def test_binary_layout(cipher):
+    token, data_key = cipher.seal("hunter2")
+    # Version byte, nonce, ciphertext and tag
+    assert token[0] == BLOB_VERSION and len(token) == 1 + NONCE_SIZE + len("hunter2") + 16
+    assert data_key[0] == BLOB_VERSION and len(data_key) == 1 + NONCE_SIZE + 32 + 16
+    with pytest.raises(ValueError, match="Unknown ciphertext version"):
+        cipher.open(b"\x02" + token[1:], data_key)
+
+
+def test_rotation_converts_text_rows(unlocked):
+    legacy = db.insert_password_entry("legacy", "", "", crypto.encrypt_password("old-secret"), "", None, None, 1)
+    assert rotation.rotation_pending() == 1
+    assert rotation.run_rotation(workers=0)["migrated"] == 1
+
+    row = db.fetch_password_entry(legacy)
+    assert isinstance(row[3], bytes) and isinstance(row[8], bytes)
+    assert read_password(legacy) == "old-secret"
+    assert rotation.rotation_pending() == 0
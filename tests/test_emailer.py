@@ -0,0 +1,96 @@
+import pytest
+
+from benchmarks.smtp_sink import SmtpSink
+from core import emailer
+from core.emailer import FAILED, QUEUED, SENDING, SENT, SUPERSEDED, Mailer, SmtpConfig, otp_message
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(emailer, "RETRY_DELAYS", (0.01, 0.02, 0.04))
+
+
+@pytest.fixture
+def sink():
+    sink = SmtpSink().start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+def mailer(sink):
+    mailer = Mailer(SmtpConfig("127.0.0.1", sink.port, "none", sender="vault@example.com"))
+    mailer.start()
+    yield mailer
+    mailer.stop()
+
+
+def send(mailer, to, key=None, on_status=None):
+    return mailer.submit(otp_message(to, "123456", "vault@example.com"), to, key, on_status)
+
+
+def test_one_session_for_many_messages(sink, mailer):
+    statuses = []
+    deliveries = [send(mailer, f"user{i}@example.com", on_status=lambda d: statuses.append((d.to, d.status)))
+                  for i in range(5)]
+    assert all(d.wait(5) for d in deliveries)
+    assert [d.status for d in deliveries] == [SENT] * 5
+    assert mailer.connections == 1 and sink.connections == 1
+    assert [m["To"] for m in sink.messages] == [f"user{i}@example.com" for i in range(5)]
+    assert [status for to, status in statuses if to == "user0@example.com"] == [QUEUED, SENDING, SENT]
+
+
+def test_temporary_refusals_are_retried(sink, mailer):
+    sink.fail_first = 2
+    delivery = send(mailer, "user@example.com")
+    assert delivery.wait(5)
+    assert delivery.status == SENT and delivery.attempts == 3
+    assert len(sink.messages) == 1
+
+
+def test_dropped_session_is_reopened(sink, mailer):
+    sink.drop_every = 1
+    deliveries = [send(mailer, f"user{i}@example.com") for i in range(3)]
+    assert all(d.wait(5) for d in deliveries)
+    # A session that went away isn't counted as a failed attempt
+    assert [(d.status, d.attempts) for d in deliveries] == [(SENT, 1)] * 3
+    assert len(sink.messages) == 3
+
+
+def test_gives_up_after_the_last_retry(sink, mailer):
+    sink.fail_first = 10
+    delivery = send(mailer, "user@example.com")
+    assert delivery.wait(5)
+    assert delivery.status == FAILED
+    assert delivery.attempts == len(emailer.RETRY_DELAYS) + 1
+    assert delivery.error == "451 Try again later"
+
+
+def test_unconfigured_mail_fails_at_once():
+    mailer = Mailer(None)
+    mailer.start()
+    try:
+        delivery = send(mailer, "user@example.com")
+        assert delivery.wait(5)
+    finally:
+        mailer.stop()
+    assert delivery.status == FAILED and delivery.attempts == 1
+    assert "VAULT_SMTP_HOST" in delivery.error
+
+
+def test_newer_code_supersedes_a_waiting_one():
+    mailer = Mailer(None)  # Not started, so both stay queued
+    first = send(mailer, "user@example.com", key="alice")
+    second = send(mailer, "user@example.com", key="alice")
+    other = send(mailer, "bob@example.com", key="bob")
+    assert first.status == SUPERSEDED and first.wait(0)
+    assert second.status == QUEUED and other.status == QUEUED
+
+
+def test_config_from_env():
+    assert SmtpConfig.from_env({}) is None
+    config = SmtpConfig.from_env({"VAULT_SMTP_HOST": "mail.example.com", "VAULT_SMTP_SECURITY": "SSL",
+                                  "VAULT_SMTP_USER": "vault@example.com", "VAULT_SMTP_PASSWORD": " pw "})
+    assert (config.port, config.security, config.sender, config.password) == (465, "ssl", "vault@example.com", " pw ")
+    with pytest.raises(emailer.EmailConfigError):
+        SmtpConfig.from_env({"VAULT_SMTP_HOST": "mail.example.com", "VAULT_SMTP_PORT": "smtp"})
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from conftest import FAST_KDF, add_entries
+from core import crypto, db, exporter, importer, keys
+
+
+@pytest.fixture
+def entries(unlocked):
+    add_entries(f"site-{i}" for i in range(40))
+
+
+def test_archive_round_trip(entries):
+    stats = exporter.export_archive("vault.vltx", "export passphrase", chunk_size=512)
+    assert stats["exported"] == 40
+
+    exported = list(exporter.read_archive("vault.vltx", "export passphrase"))
+    assert [e["name"] for e in exported] == [f"site-{i}" for i in range(40)]
+    assert exported[3]["password"] == "site-3-secret"
+    assert exporter.verify_archive("vault.vltx", "export passphrase")[0] == 40
+
+
+def test_archive_rejects_wrong_passphrase_and_tampering(entries):
+    exporter.export_archive("vault.vltx", "export passphrase", chunk_size=512)
+    with pytest.raises(ValueError):
+        list(exporter.read_archive("vault.vltx", "wrong passphrase"))
+
+    with open("vault.vltx", "rb") as f:
+        data = bytearray(f.read())
+    data[-1] ^= 1
+    with open("vault.vltx", "wb") as f:
+        f.write(data)
+    with pytest.raises(ValueError):
+        exporter.verify_archive("vault.vltx", "export passphrase")
+
+    with open("vault.vltx", "wb") as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        exporter.verify_archive("vault.vltx", "export passphrase")
+
+
+def test_csv_export_then_import(entries, workdir, monkeypatch):
+    with db.transaction() as c:
+        c.execute("UPDATE passwords SET expiry_date = '2030-01-01', is_favourite = 1 WHERE name = 'site-5'")
+    exporter.export_csv("vault.csv")
+    crypto.lock()
+    db.close_all_connections()
+
+    # Into a fresh vault in another directory
+    (workdir / "other").mkdir()
+    monkeypatch.chdir(workdir / "other")
+    db.init_db()
+    db.set_setting(keys.KDF_SETTING, json.dumps(FAST_KDF, sort_keys=True))
+    keys.enroll("bob", "bob-master")
+    assert importer.import_file(str(workdir / "vault.csv"), workers=0)["imported"] == 40
+
+    imported = list(exporter.iter_entries())
+    assert [e["name"] for e in imported] == [f"site-{i}" for i in range(40)]
+    assert imported[5]["password"] == "site-5-secret"
+    assert imported[5]["expiry_date"] == "2030-01-01" and imported[5]["favorite"]
+
+
+def test_failed_export_leaves_no_file(entries, monkeypatch):
+    def fail(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(exporter.os, "fsync", fail)
+    with pytest.raises(OSError):
+        exporter.export_csv("vault.csv")
+    assert not any(name.startswith("vault.csv") for name in os.listdir())
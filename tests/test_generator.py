@@ -0,0 +1,42 @@
+import collections
+import string
+
+import pytest
+
+from core import generator
+from core.generator import PasswordPolicy
+
+
+def test_every_selected_class_appears():
+    policy = PasswordPolicy(length=4)
+    passwords = generator.generate_many(5000, policy)
+    assert len(passwords) == 5000 and len(set(passwords)) > 4900
+    for password in passwords:
+        assert len(password) == 4
+        for chars in (string.ascii_uppercase, string.ascii_lowercase, string.digits, string.punctuation):
+            assert any(ch in chars for ch in password)
+
+
+def test_unselected_classes_never_appear():
+    policy = PasswordPolicy(length=20, use_upper=False, use_symbols=False)
+    for password in generator.generate_many(500, policy):
+        assert set(password) <= set(string.ascii_lowercase + string.digits)
+
+
+def test_policy_validation():
+    with pytest.raises(ValueError):
+        PasswordPolicy(use_upper=False, use_lower=False, use_digits=False, use_symbols=False)
+    with pytest.raises(ValueError):
+        PasswordPolicy(length=3)
+
+
+@pytest.mark.parametrize("bound", [3, 94, 1000, 70000])
+def test_random_below_is_uniform(bound):
+    values = generator.random_below(bound, 60000)
+    assert len(values) == 60000 and min(values) >= 0 and max(values) < bound
+    if bound <= 94:
+        # Loose bound, about eight standard deviations
+        expected = 60000 / bound
+        counts = collections.Counter(values)
+        assert len(counts) == bound
+        assert all(abs(count - expected) < 8 * expected ** 0.5 for count in counts.values())
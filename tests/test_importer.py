@@ -0,0 +1,54 @@
+from conftest import read_password
+from core import db, importer
+from core.fingerprint import entries_using, fingerprint
+
+CSV = """name,username,url,password,notes,folder,expiry_date
+alpha,a@example.com,https://a.example,hunter22,,Work,
+beta,b@example.com,,s3cret,note,,2030-01-01
+gamma,,https://g.example,hunter22,,Work,
+delta,,,,,,2029-06-30
+"""
+
+
+def test_import_keeps_file_order(unlocked, workdir):
+    (workdir / "export.csv").write_text(CSV)
+    changed = []
+    db.add_entry_listener(changed.append)
+    try:
+        stats = importer.import_file("export.csv", workers=0)
+    finally:
+        db.remove_entry_listener(changed.append)
+    assert stats["imported"] == 4
+
+    c = db.get_connection().cursor()
+    c.execute("SELECT id, name, expiry_date FROM passwords ORDER BY id")
+    rows = c.fetchall()
+    assert [name for _id, name, _expiry in rows] == ["alpha", "beta", "gamma", "delta"]
+    # Listeners hear about the entries with an expiry date, by their real ids
+    assert changed == [entry_id for entry_id, _name, expiry in rows if expiry]
+    assert read_password(rows[1][0]) == "s3cret"
+
+
+def test_import_stores_fingerprints(unlocked, workdir):
+    (workdir / "export.csv").write_text(CSV)
+    importer.import_file("export.csv", workers=0)
+
+    assert [name for _id, name in entries_using("hunter22")] == ["alpha", "gamma"]
+    c = db.get_connection().cursor()
+    c.execute("SELECT name, fingerprint FROM passwords ORDER BY id")
+    fingerprints = dict(c.fetchall())
+    assert fingerprints["beta"] == fingerprint("s3cret")
+    assert fingerprints["delta"] is None
+
+
+def test_import_normalises_expiry_dates(unlocked, workdir):
+    (workdir / "export.json").write_text(
+        '[{"name": "dmy", "password": "a", "expires": "31/12/2025"},'
+        ' {"name": "iso-time", "password": "b", "expires": "2025-12-31T00:00:00Z"},'
+        ' {"name": "junk", "password": "c", "expires": "next year"}]'
+    )
+    importer.import_file("export.json", workers=0)
+
+    c = db.get_connection().cursor()
+    c.execute("SELECT name, expiry_date FROM passwords ORDER BY id")
+    assert c.fetchall() == [("dmy", "2025-12-31"), ("iso-time", "2025-12-31"), ("junk", None)]
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+
+import pytest
+from cryptography.fernet import Fernet
+
+from conftest import add_entries, read_password
+from core import crypto, db, keys
+
+
+def test_enroll_and_unlock(vault):
+    assert keys.enroll("alice", "alice-master", b"hash")
+    (entry_id,) = add_entries(["mail"])
+    crypto.lock()
+
+    with pytest.raises(ValueError):
+        keys.unlock("alice", "wrong")
+    assert not crypto.is_unlocked()
+    keys.unlock("alice", "alice-master")
+    assert read_password(entry_id) == "mail-secret"
+
+
+def test_enroll_saves_hash_with_the_wrapped_key(vault):
+    db.insert_master_password("alice", b"taken")
+    with pytest.raises(sqlite3.IntegrityError):
+        keys.enroll("alice", "alice-master", b"hash")
+    # Neither write survives the failed one
+    assert db.fetch_wrapped_key("alice") is None
+    assert not crypto.is_unlocked()
+
+
+def test_enroll_after_key_file_retired(vault):
+    # A vault from before wrapped keys: the key file and one user
+    with open(crypto.LEGACY_KEY_FILE, "wb") as f:
+        f.write(Fernet.generate_key())
+    db.insert_master_password("alice", b"hash")
+    keys.unlock("alice", "alice-master")
+    assert not os.path.exists(crypto.LEGACY_KEY_FILE)
+    (entry_id,) = add_entries(["shared"])
+    crypto.lock()
+
+    # No key file and the vault locked: bob is enrolled, but waits for access
+    assert keys.enroll("bob", "bob-master", b"hash") is False
+    assert not crypto.is_unlocked()
+    with pytest.raises(crypto.VaultLockedError, match="existing user"):
+        keys.unlock("bob", "bob-master")
+    assert not crypto.is_unlocked()
+
+    # alice's next unlock shares the vault keys with bob
+    keys.unlock("alice", "alice-master")
+    crypto.lock()
+    keys.unlock("bob", "bob-master")
+    assert read_password(entry_id) == "shared-secret"
+    assert db.fetch_pending_keys("bob") == []
+
+
+def test_change_master_password(unlocked):
+    db.insert_master_password("alice", b"hash")
+    (entry_id,) = add_entries(["mail"])
+    with pytest.raises(ValueError):
+        keys.change_master_password("alice", "wrong", "new-master")
+    keys.change_master_password("alice", "alice-master", "new-master")
+    crypto.lock()
+
+    with pytest.raises(ValueError):
+        keys.unlock("alice", "alice-master")
+    keys.unlock("alice", "new-master")
+    assert read_password(entry_id) == "mail-secret"
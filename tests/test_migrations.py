@@ -0,0 +1,47 @@
+import json
+import os
+import shutil
+import sqlite3
+
+from cryptography.fernet import Fernet
+
+from conftest import FAST_KDF, read_password
+from core import crypto, db, keys, migrations
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_fresh_vault(workdir):
+    applied = db.init_db()
+    assert applied == [version for version, _description, _step in migrations.MIGRATIONS]
+    assert migrations.schema_version(db.get_connection()) == migrations.LATEST_VERSION
+    assert db.init_db() == []
+
+
+def test_migrate_committed_baseline(workdir):
+    # The vault.db and vault.key checked in are the pre-migration layout
+    shutil.copy(os.path.join(REPO, db.DB_PATH), db.DB_PATH)
+    shutil.copy(os.path.join(REPO, crypto.LEGACY_KEY_FILE), crypto.LEGACY_KEY_FILE)
+    with open(crypto.LEGACY_KEY_FILE, "rb") as f:
+        legacy_key = f.read().strip()
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        (username,) = conn.execute("SELECT username FROM master_password").fetchone()
+        users = conn.execute("SELECT * FROM users").fetchall()
+        conn.execute("INSERT INTO passwords (name, email, url, password, notes, folder_id) VALUES (?, ?, ?, ?, ?, ?)",
+                     ("legacy", "", "", Fernet(legacy_key).encrypt(b"old-secret").decode(), "", None))
+    conn.close()
+
+    assert db.init_db()
+    assert migrations.schema_version(db.get_connection()) == migrations.LATEST_VERSION
+    c = db.get_connection().cursor()
+    c.execute("SELECT id, username, email, password, is_verified, verification_code, code_expiry FROM users")
+    assert c.fetchall() == users
+    assert db.init_db() == []
+
+    # The first unlock wraps the legacy key and retires the file
+    db.set_setting(keys.KDF_SETTING, json.dumps(FAST_KDF, sort_keys=True))
+    keys.unlock(username, "master")
+    assert not os.path.exists(crypto.LEGACY_KEY_FILE)
+    c.execute("SELECT id FROM passwords WHERE name = 'legacy'")
+    assert read_password(c.fetchone()[0]) == "old-secret"
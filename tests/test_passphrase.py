@@ -0,0 +1,65 @@
+import math
+import os
+
+import pytest
+
+from core import passphrase
+from core.passphrase import PassphrasePolicy
+
+
+def test_build_wordlist(workdir):
+    with open("words.txt", "w") as f:
+        f.write("Apple\nbanana\n\napple\ncherry\n")
+    assert passphrase.build_wordlist("words.txt", "words.bin") == 3
+    wordlist = passphrase.Wordlist("words.bin")
+    assert [wordlist.word(i) for i in range(len(wordlist))] == ["apple", "banana", "cherry"]
+    with pytest.raises(IndexError):
+        wordlist.word(3)
+    wordlist.close()
+
+
+def test_build_wordlist_rejects_non_words(workdir):
+    with open("words.txt", "w") as f:
+        f.write("apple\nsun-set\n")
+    with pytest.raises(ValueError, match="sun-set"):
+        passphrase.build_wordlist("words.txt", "words.bin")
+    assert sorted(os.listdir()) == ["words.txt"]
+
+
+def test_failed_replace_leaves_nothing_behind(workdir, monkeypatch):
+    with open("words.txt", "w") as f:
+        f.write("apple\nbanana\n")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(passphrase.os, "replace", fail)
+    with pytest.raises(OSError):
+        passphrase.build_wordlist("words.txt", "words.bin")
+    assert sorted(os.listdir()) == ["words.txt"]
+
+
+def test_passphrases_follow_policy():
+    wordlist = passphrase.get_wordlist()
+    words = {wordlist.word(i) for i in range(len(wordlist))}
+    for phrase in passphrase.generate_passphrases(50, PassphrasePolicy(words=4, separator=".")):
+        parts = phrase.split(".")
+        assert len(parts) == 4 and set(parts) <= words
+
+    policy = PassphrasePolicy(words=3, separator="", capitalise="first", digits=2)
+    for phrase in passphrase.generate_passphrases(50, policy):
+        assert sum(ch.isupper() for ch in phrase) == 3
+        assert sum(ch.isdigit() for ch in phrase) == 2
+
+
+def test_policy_rejects_ambiguous_passphrases():
+    with pytest.raises(ValueError):
+        PassphrasePolicy(separator="")
+    with pytest.raises(ValueError):
+        PassphrasePolicy(separator="1")
+
+
+def test_entropy_bits():
+    assert passphrase.entropy_bits(PassphrasePolicy(words=6), 7776) == pytest.approx(6 * math.log2(7776))
+    policy = PassphrasePolicy(words=4, separator=passphrase.RANDOM_SEPARATOR, capitalise="random", digits=1)
+    expected = 4 * math.log2(7776) + 4 + 3 * math.log2(len(passphrase.SEPARATORS)) + math.log2(10) + 2
+    assert passphrase.entropy_bits(policy, 7776) == pytest.approx(expected)
@@ -0,0 +1,86 @@
+"""Query-plan regression checks for core.db.
+
+Every core.db read runs against a seeded vault with its SQL captured, and
+EXPLAIN QUERY PLAN on each statement must show no full SCAN of passwords or
+notifications and no sort through a temp B-tree.
+"""
+import datetime
+import re
+
+import pytest
+
+from core import db
+
+CHECKED_TABLES = ("passwords", "notifications")
+SORT_METHODS = ("Name", "Last Modified", "Last Used")
+
+
+def core_queries():
+    # (label, callable) for every read path in core.db
+    queries = [
+        ("fetch_all_passwords", db.fetch_all_passwords),
+        ("fetch_folders", db.fetch_folders),
+        ("fetch_passwords_by_folder", lambda: db.fetch_passwords_by_folder(1)),
+        ("fetch_recent_passwords", db.fetch_recent_passwords),
+        ("fetch_notifications", lambda: db.fetch_notifications("alice")),
+        ("fetch_notifications[after]", lambda: db.fetch_notifications("alice", ("2024-01-01 00:00:00", 10))),
+        ("fetch_favourites", db.fetch_favourites),
+        ("get_expiring_passwords", lambda: db.get_expiring_passwords("alice")),
+        ("fetch_expiries_between", lambda: db.fetch_expiries_between(datetime.date(2024, 1, 1), datetime.date(2024, 3, 1))),
+        ("fetch_key_versions_in_use", db.fetch_key_versions_in_use),
+        ("fetch_entries_for_rotation", lambda: db.fetch_entries_for_rotation(1, 10)),
+        ("count_legacy_entries", lambda: db.count_legacy_entries(1)),
+        ("fetch_legacy_entries", lambda: db.fetch_legacy_entries(1, 10)),
+    ]
+    for method in SORT_METHODS:
+        queries.append((f"fetch_all_passwords_sorted[{method}]",
+                        lambda m=method: db.fetch_all_passwords_sorted(m)))
+        queries.append((f"fetch_passwords_by_folder_sorted[{method}]",
+                        lambda m=method: db.fetch_passwords_by_folder_sorted(1, m)))
+        for folder_id in (None, 1):
+            for after in (None, ("entry-1", 10), (None, 10)):
+                queries.append((f"fetch_passwords_page[{method}, folder={folder_id}, after={after}]",
+                                lambda m=method, f=folder_id, a=after: db.fetch_passwords_page(m, f, a, 5)))
+    return queries
+
+
+def seed():
+    with db.transaction() as c:
+        c.execute("INSERT INTO folders (name) VALUES ('Work')")
+        c.executemany(
+            "INSERT INTO passwords (name, email, password, folder_id, is_favourite, expiry_date) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"entry-{i}", f"u{i}@example.com", "x", i % 3, i % 2, "2030-01-01") for i in range(50)]
+        )
+        c.executemany(
+            "INSERT INTO notifications (username, message) VALUES (?, ?)",
+            [("alice", f"event {i}") for i in range(50)]
+        )
+
+
+def plan_problems(plan):
+    problems = []
+    for _id, _parent, _unused, detail in plan:
+        if "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in CHECKED_TABLES and "INDEX" not in detail:
+            problems.append(detail)
+    return problems
+
+
+@pytest.mark.parametrize("label, query", core_queries(), ids=[label for label, _query in core_queries()])
+def test_query_plan(vault, label, query):
+    seed()
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        query()
+    finally:
+        conn.set_trace_callback(None)
+
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert selects, f"{label} ran no SELECT"
+    for sql in selects:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        assert not plan_problems(plan), f"{label}: " + "; ".join(row[3] for row in plan)
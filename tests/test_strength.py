@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from core import strength
+
+
+@pytest.mark.parametrize("password, warning", [
+    ("password", "This is a top-10 common password"),
+    ("P@ssw0rd", "This is similar to a commonly used password"),
+    ("john", "Names and surnames are easy to guess"),
+    ("aaaaaaa", 'Repeats like "aaa" are easy to guess'),
+    ("abcdef", "Sequences like abc or 6543 are easy to guess"),
+    ("1987", "Recent years are easy to guess"),
+])
+def test_weak_patterns(password, warning):
+    estimate = strength.estimate(password)
+    assert estimate.score == 0
+    assert estimate.warning == warning
+
+
+@pytest.mark.parametrize("password", ["correct-horse-battery-staple", "Xk9#vQ2!mZp7"])
+def test_strong_passwords(password):
+    estimate = strength.estimate(password)
+    assert estimate.score == 4
+    assert estimate.warning == ""
+
+
+def test_user_inputs():
+    warning = strength.estimate("alicesmith", ["alicesmith@example.com"]).warning
+    assert warning == "Avoid using your name, email or the site name"
+
+
+def test_meter_matches_one_shot_estimates():
+    meter = strength.StrengthMeter()
+    typed = "Tr0ub4dor&3"
+    for i in range(1, len(typed) + 1):
+        assert meter.update(typed[:i]).guesses_log10 == pytest.approx(strength.estimate(typed[:i]).guesses_log10)
+    # Backspacing reuses the shorter prefix
+    assert meter.update("Tr0ub").guesses_log10 == pytest.approx(strength.estimate("Tr0ub").guesses_log10)
+
+
+def test_estimate_many_keeps_order():
+    passwords = ["zebra", "password", "zebra", "Xk9#vQ2!mZp7"]
+    estimates = strength.estimate_many(passwords)
+    assert [e.guesses_log10 for e in estimates] == [strength.estimate(p).guesses_log10 for p in passwords]
+
+
+def test_build_dictionaries(workdir):
+    with open("common.txt", "w") as f:
+        f.write("Hunter\nletmein\nhunter\n")
+    counts = strength.build_dictionaries("dicts.bin", [("passwords", ["common.txt"])], str(workdir))
+    assert counts == {"passwords": 2}
+    assert strength.load_dictionaries("dicts.bin") == {"passwords": {"hunter": 1, "letmein": 2}}
+
+
+def test_failed_replace_leaves_nothing_behind(workdir, monkeypatch):
+    with open("common.txt", "w") as f:
+        f.write("hunter\n")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(strength.os, "replace", fail)
+    with pytest.raises(OSError):
+        strength.build_dictionaries("dicts.bin", [("passwords", ["common.txt"])], str(workdir))
+    assert sorted(os.listdir()) == ["common.txt"]
@@ -4,9 +4,12 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
-import sqlite3
-from core.crypto import encrypt_password
+from core.breach import breach_count
+from core.crypto import seal_password
 from core.db import insert_password_entry, fetch_folders
+from core.fingerprint import fingerprint
+from ui.db_worker import get_db_worker
+from ui.strength_meter import StrengthMeterWidget
 
 class AddPasswordWindow(QWidget):
     def __init__(self):
@@ -109,17 +112,30 @@ class AddPasswordWindow(QWidget):
         pw_frame.setLayout(pw_row)
         grid.addWidget(QLabel("Password"), 3, 0)
         grid.addWidget(pw_frame, 3, 1)
+        self.strength_meter = StrengthMeterWidget(
+            self.password_input,
+            lambda: (self.name_input.text(), self.email_input.text(), self.url_input.text())
+        )
+        grid.addWidget(self.strength_meter, 4, 1)
+
+        # Live reuse check against the stored fingerprints
+        self.reuse_label = QLabel()
+        self.reuse_label.setWordWrap(True)
+        self.reuse_label.setStyleSheet("font-size: 11px; color: #B03A2E;")
+        self.reuse_label.setVisible(False)
+        self.password_input.textChanged.connect(self.check_reuse)
+        grid.addWidget(self.reuse_label, 5, 1)
 
         self.notes_input = QTextEdit()
         self.notes_input.setPlaceholderText("Notes")
-        grid.addWidget(QLabel("Notes"), 4, 0)
-        grid.addWidget(self.notes_input, 4, 1)
+        grid.addWidget(QLabel("Notes"), 6, 0)
+        grid.addWidget(self.notes_input, 6, 1)
 
         self.expiry_input = QDateEdit()
         self.expiry_input.setCalendarPopup(True)
         self.expiry_input.setDisplayFormat("yyyy-MM-dd")
-        grid.addWidget(QLabel("Expiry Date"), 5, 0)
-        grid.addWidget(self.expiry_input, 5, 1)
+        grid.addWidget(QLabel("Expiry Date"), 7, 0)
+        grid.addWidget(self.expiry_input, 7, 1)
 
         layout.addLayout(grid)
 
@@ -130,6 +146,18 @@ class AddPasswordWindow(QWidget):
 
         self.setLayout(layout)
 
+    def check_reuse(self, password):
+        from core.fingerprint import entries_using
+        # Keyed so a burst of keystrokes only delivers the latest answer
+        get_db_worker().submit(entries_using, password.strip(), key="reuse_check", on_result=self.show_reuse)
+
+    def show_reuse(self, entries):
+        if entries:
+            names = ", ".join(name for _id, name in entries[:3])
+            more = f" and {len(entries) - 3} more" if len(entries) > 3 else ""
+            self.reuse_label.setText(f"Already used by {names}{more}")
+        self.reuse_label.setVisible(bool(entries))
+
     def toggle_visibility(self, checked):
         self.password_input.setEchoMode(QLineEdit.Normal if checked else QLineEdit.Password)
 
@@ -154,12 +182,25 @@ class AddPasswordWindow(QWidget):
             QMessageBox.warning(self, "Missing", "Password field is required.")
             return
 
-        encrypted_password = encrypt_password(password_raw)
+        seen = breach_count(password_raw)
+        if seen:
+            reply = QMessageBox.question(
+                self, "Breached Password",
+                f"This password has appeared {seen:,} times in known data breaches and is likely to be "
+                f"tried first by attackers.\n\nSave it anyway?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+
+        encrypted_password, data_key, key_version = seal_password(password_raw)
+        password_fingerprint = fingerprint(password_raw)
 
         folder_id = None  # Placeholder. If you later add folder selection, update this.
 
         try:
-            insert_password_entry(name, email, url, encrypted_password, notes, folder_id, expiry_date)
+            insert_password_entry(name, email, url, encrypted_password, notes, folder_id, expiry_date, key_version,
+                                  data_key, password_fingerprint)
             QMessageBox.information(self, "Saved", f"Password for '{name}' saved.")
             self.close()
         except Exception as e:
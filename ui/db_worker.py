@@ -0,0 +1,135 @@
+import itertools
+import queue
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class DbJob:
+    def __init__(self, fn, args, kwargs, priority, key, on_result, on_error):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        # A queued job is skipped; a running one finishes but its result is dropped
+        self.cancelled = True
+
+
+class DbWorker(QThread):
+    """Runs core.db calls on a dedicated thread and reports back on the GUI thread.
+
+    submit() returns immediately. The job runs on the worker's own SQLite
+    connection and its on_result/on_error callback is invoked on the GUI
+    thread through a queued signal. Jobs submitted with the same key replace
+    each other, so only the latest search or reload for a view is delivered.
+    """
+
+    job_finished = pyqtSignal(int, object)
+    job_failed = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._latest_by_key = {}
+        self._lock = threading.Lock()
+        self.job_finished.connect(self._deliver_result)
+        self.job_failed.connect(self._deliver_error)
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, key=None, on_result=None, on_error=None, **kwargs):
+        job = DbJob(fn, args, kwargs, priority, key, on_result, on_error)
+        job_id = next(self._seq)
+        with self._lock:
+            if key is not None:
+                previous = self._latest_by_key.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self._latest_by_key[key] = job
+            self._jobs[job_id] = job
+        self._queue.put((priority, job_id, job))
+        return job
+
+    def cancel(self, key):
+        with self._lock:
+            job = self._latest_by_key.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def stop(self):
+        # Sorts after every real job, so queued writes still get flushed
+        self._queue.put((float("inf"), next(self._seq), None))
+        self.wait()
+
+    def run(self):
+        from core.db import close_connection
+
+        while True:
+            _priority, job_id, job = self._queue.get()
+            if job is None:
+                break
+            if job.cancelled:
+                self._forget(job_id)
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                self.job_failed.emit(job_id, e)
+            else:
+                self.job_finished.emit(job_id, result)
+
+        close_connection()
+
+    def _forget(self, job_id):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None and job.key is not None and self._latest_by_key.get(job.key) is job:
+                del self._latest_by_key[job.key]
+        return job
+
+    def _deliver_result(self, job_id, result):
+        job = self._forget(job_id)
+        if job is None or job.cancelled:
+            return
+        if job.on_result:
+            job.on_result(result)
+
+    def _deliver_error(self, job_id, error):
+        job = self._forget(job_id)
+        if job is None or job.cancelled:
+            return
+        if job.on_error:
+            job.on_error(error)
+        else:
+            print(f"Database job failed: {error}")
+
+
+_worker = None
+
+def get_db_worker():
+    global _worker
+    if _worker is None:
+        from PyQt5.QtWidgets import QApplication
+        _worker = DbWorker()
+        _worker.start()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(stop_db_worker)
+    return _worker
+
+def stop_db_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
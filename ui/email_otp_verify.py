@@ -1,15 +1,20 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QFrame, QHBoxLayout
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import QTimer
-import sqlite3
+from PyQt5.QtCore import QTimer, pyqtSignal
 import datetime
+from core.db import get_connection, transaction
 
 class EmailOTPVerifyWindow(QWidget):
+    # Delivery updates arrive on the mailer thread
+    delivery_status = pyqtSignal(object)
+
     def __init__(self, username, on_success_callback):
         super().__init__()
         self.username = username
         self.on_success = on_success_callback
+        self.delivery = None
+        self.delivery_status.connect(self.show_delivery_status)
 
         self.setWindowTitle("Email OTP Verification")
         self.setGeometry(550, 250, 300, 150)
@@ -38,11 +43,17 @@ class EmailOTPVerifyWindow(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold; color: #222052;")
         card_layout.addWidget(title)
 
-        prompt = QLabel("We’ve sent a 6-digit OTP to your email.")
+        prompt = QLabel("Enter the 6-digit OTP sent to your email.")
         prompt.setAlignment(Qt.AlignCenter)
         prompt.setStyleSheet("font-size: 13px; color: #444;")
         card_layout.addWidget(prompt)
 
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("font-size: 12px; color: #444;")
+        card_layout.addWidget(self.status_label)
+
         # OTP Input
         self.otp_input = QLineEdit()
         self.otp_input.setPlaceholderText("●●●●●●")
@@ -115,11 +126,9 @@ class EmailOTPVerifyWindow(QWidget):
             QMessageBox.warning(self, "Missing OTP", "Please enter the OTP.")
             return
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
+        c = get_connection().cursor()
         c.execute("SELECT otp_code, otp_expiry FROM users WHERE username = ?", (self.username,))
         row = c.fetchone()
-        conn.close()
 
         if not row or not row[0]:
             QMessageBox.critical(self, "Error", "No OTP was found for your account.")
@@ -139,11 +148,8 @@ class EmailOTPVerifyWindow(QWidget):
             self.on_success()
 
     def clear_otp(self):
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
-        c.execute("UPDATE users SET otp_code = NULL, otp_expiry = NULL WHERE username = ?", (self.username,))
-        conn.commit()
-        conn.close()
+        with transaction() as c:
+            c.execute("UPDATE users SET otp_code = NULL, otp_expiry = NULL WHERE username = ?", (self.username,))
 
     def update_resend_cooldown(self):
         self.cooldown_seconds -= 1
@@ -154,24 +160,43 @@ class EmailOTPVerifyWindow(QWidget):
         else:
             self.resend_btn.setText(f"Resend OTP ({self.cooldown_seconds})")
 
-    def resend_otp(self):
+    def send_code(self, email, otp_code):
+        # Queued; the window follows the delivery through delivery_status
         from core.emailer import send_otp_email
+        self.status_label.setText(f"Sending the code to {email}...")
+        self.delivery = send_otp_email(email, otp_code, on_status=self.delivery_status.emit, key=self.username)
+
+    def show_delivery_status(self, delivery):
+        from core.emailer import FAILED, RETRYING, RETRY_DELAYS, SENT
+        if delivery is not self.delivery:
+            return  # an earlier code's
+        if delivery.status == SENT:
+            self.status_label.setText(f"Code sent to {delivery.to}.")
+        elif delivery.status == RETRYING:
+            self.status_label.setText(
+                f"Mail server unavailable ({delivery.error}); retrying, attempt "
+                f"{delivery.attempts + 1} of {len(RETRY_DELAYS) + 1}..."
+            )
+        elif delivery.status == FAILED:
+            self.status_label.setText(f"Could not send the code: {delivery.error}")
+            # No point waiting out the cooldown for a code that never went
+            self.cooldown_timer.stop()
+            self.resend_btn.setText("Resend OTP")
+            self.resend_btn.setEnabled(True)
+
+    def resend_otp(self):
         import random, datetime
 
         otp_code = str(random.randint(100000, 999999))
         otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=5)
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
-        c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?", 
-                (otp_code, otp_expiry, self.username))
-        c.execute("SELECT email FROM users WHERE username = ?", (self.username,))
-        email = c.fetchone()[0]
-        conn.commit()
-        conn.close()
-
-        send_otp_email(email, otp_code)
-        QMessageBox.information(self, "Resent", f"A new OTP was sent to {email}.")
+        with transaction() as c:
+            c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?",
+                    (otp_code, otp_expiry, self.username))
+            c.execute("SELECT email FROM users WHERE username = ?", (self.username,))
+            email = c.fetchone()[0]
+
+        self.send_code(email, otp_code)
 
         self.resend_btn.setEnabled(False)
         self.cooldown_seconds = 30
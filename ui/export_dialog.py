@@ -0,0 +1,157 @@
+from PyQt5.QtWidgets import (
+    QLabel, QLineEdit, QPushButton, QCheckBox, QVBoxLayout, QHBoxLayout, QDialog, QFileDialog
+)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ExportThread(QThread):
+    progress = pyqtSignal(dict)
+    finished_export = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, passphrase=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.passphrase = passphrase
+
+    def run(self):
+        from core.db import close_connection
+        from core.exporter import export_archive, export_csv
+
+        try:
+            if self.passphrase is None:
+                stats = export_csv(self.path, progress=self.progress.emit)
+            else:
+                stats = export_archive(self.path, self.passphrase, progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished_export.emit(stats)
+        finally:
+            close_connection()
+
+
+class ExportDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Vault")
+        self.setFixedSize(380, 280)
+        self.thread = None
+
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #EFE9E1;
+                font-family: 'Segoe UI', sans-serif;
+            }
+            QLabel, QCheckBox {
+                font-size: 13px;
+                color: #222052;
+            }
+            QLineEdit {
+                background-color: #DDD7CE;
+                border-radius: 8px;
+                padding: 6px;
+                font-size: 13px;
+                color: #222052;
+            }
+            QPushButton {
+                background-color: #222052;
+                color: #EFE9E1;
+                border-radius: 10px;
+                padding: 6px 12px;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #000000;
+            }
+        """)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        self.passphrase_input = QLineEdit()
+        self.passphrase_input.setEchoMode(QLineEdit.Password)
+        self.passphrase_input.setPlaceholderText("Export passphrase")
+        self.confirm_input = QLineEdit()
+        self.confirm_input.setEchoMode(QLineEdit.Password)
+        self.confirm_input.setPlaceholderText("Confirm passphrase")
+
+        self.csv_checkbox = QCheckBox("Unencrypted CSV (anyone with the file can read it)")
+        self.csv_checkbox.toggled.connect(self.toggle_csv)
+
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+
+        layout.addWidget(QLabel("Protect the export with a passphrase:"))
+        layout.addWidget(self.passphrase_input)
+        layout.addWidget(self.confirm_input)
+        layout.addWidget(self.csv_checkbox)
+        layout.addWidget(self.status_label)
+
+        btn_row = QHBoxLayout()
+        self.export_btn = QPushButton("Export")
+        self.close_btn = QPushButton("Close")
+        self.export_btn.clicked.connect(self.choose_file)
+        self.close_btn.clicked.connect(self.close)
+        btn_row.addWidget(self.export_btn)
+        btn_row.addWidget(self.close_btn)
+
+        layout.addLayout(btn_row)
+        self.setLayout(layout)
+
+    def toggle_csv(self, checked):
+        self.passphrase_input.setEnabled(not checked)
+        self.confirm_input.setEnabled(not checked)
+
+    def choose_file(self):
+        if self.csv_checkbox.isChecked():
+            passphrase = None
+            file_filter = "CSV (*.csv)"
+        else:
+            passphrase = self.passphrase_input.text()
+            if not passphrase:
+                self.status_label.setText("Enter a passphrase.")
+                return
+            if passphrase != self.confirm_input.text():
+                self.status_label.setText("Passphrases do not match.")
+                return
+            file_filter = "Vault export (*.vltx)"
+
+        path, _ = QFileDialog.getSaveFileName(self, "Export Vault", "", file_filter)
+        if path:
+            self.start_export(path, passphrase)
+
+    def start_export(self, path, passphrase):
+        self.export_btn.setEnabled(False)
+        self.close_btn.setEnabled(False)
+        self.status_label.setText("Exporting...")
+
+        self.thread = ExportThread(path, passphrase, self)
+        self.thread.progress.connect(self.show_progress)
+        self.thread.finished_export.connect(self.export_done)
+        self.thread.failed.connect(self.export_failed)
+        self.thread.start()
+
+    def show_progress(self, stats):
+        self.status_label.setText(f"Exported {stats['exported']} entries ({stats['rate']:.0f}/s)")
+
+    def export_done(self, stats):
+        self.status_label.setText(
+            f"Exported {stats['exported']} entries in {stats['elapsed']:.1f} s ({stats['rate']:.0f}/s)"
+        )
+        self.passphrase_input.clear()
+        self.confirm_input.clear()
+        self.export_btn.setEnabled(True)
+        self.close_btn.setEnabled(True)
+
+    def export_failed(self, error):
+        self.status_label.setText(f"Export failed: {error}")
+        self.export_btn.setEnabled(True)
+        self.close_btn.setEnabled(True)
+
+    def closeEvent(self, event):
+        if self.thread is not None and self.thread.isRunning():
+            event.ignore()
+            return
+        super().closeEvent(event)
@@ -2,24 +2,47 @@ from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QListWidget,
     QLineEdit, QListWidgetItem, QStackedLayout, QFrame, QMessageBox, QComboBox, QDialog, QApplication
 )
-from PyQt5.QtCore import Qt, QTimer, QEvent, QTime
-from ui.master_password import MasterPasswordWindow
+from PyQt5.QtCore import Qt, QTimer, QEvent, QTime, pyqtSignal
+from ui.db_worker import get_db_worker, PRIORITY_HIGH, PRIORITY_LOW
 
 class HomeWindow(QWidget):
+    SEARCH_DEBOUNCE_MS = 150
+    # Passphrase separators offered by the generator; None picks one per gap
+    PASSPHRASE_SEPARATORS = [("-", "-"), ("Space", " "), (".", "."), ("_", "_"), ("Random", None), ("None", "")]
+    PASSPHRASE_CAPITALS = [("None", "none"), ("Every word", "first"), ("Random", "random")]
+    GENERATE_ATTEMPTS = 5
+    # Emitted from the rotation and audit threads, delivered on the GUI thread
+    rotation_finished = pyqtSignal(dict)
+    audit_finished = pyqtSignal(dict)
+
     def __init__(self, username):
         super().__init__()
         self.username = username
-        from core.db import get_expiring_passwords, log_notification
-        expiring = get_expiring_passwords(username)
-        for name, status in expiring:
-            if status == "expired":
-                log_notification(username, f"Password for '{name}' has expired.")
-            elif status == "soon":
-                log_notification(username, f"Password for '{name}' is expiring soon.")
         self.current_view = "All Items"
         self.setWindowTitle("Password Vault")
         self.setGeometry(400, 150, 1000, 600)
         self.init_ui()
+
+        # Keep the notifications table bounded on long-lived installs
+        from core.db import compact_notifications
+        get_db_worker().submit(compact_notifications, priority=PRIORITY_LOW)
+
+        # Loads upcoming expiries once per session; later windows reuse it
+        from core.expiry import start_expiry_scheduler
+        get_db_worker().submit(
+            start_expiry_scheduler, username,
+            priority=PRIORITY_LOW,
+            on_result=lambda expiring: self.reload_notifications()
+        )
+        # Finish a key rotation that was interrupted (crash, lock, quit)
+        from core.rotation import resume_rotation
+        self.rotation_finished.connect(self.on_rotation_finished)
+        resume_rotation(on_done=self.rotation_finished.emit)
+        self.audit_finished.connect(self.on_audit_finished)
+        # Catch up on entries changed elsewhere, filling in missing fingerprints
+        from core.audit import start_audit
+        start_audit(on_done=self.audit_finished.emit)
+
         self.lock_timer = QTimer()
         self.lock_timer.timeout.connect(self.auto_lock)
         self.inactivity_timeout = 2 * 60 * 1000 
@@ -27,16 +50,6 @@ class HomeWindow(QWidget):
         self.installEventFilter(self)  # Listen to mouse/keyboard events
 
 
-    def open_entry_view(self, item):
-        index = self.vault_list.row(item)
-        from core.db import fetch_all_passwords
-        entry_list = fetch_all_passwords()
-        entry_id = entry_list[index][0]
-
-        from ui.view_password import ViewPasswordWindow
-        self.detail_window = ViewPasswordWindow(entry_id, refresh_callback=self.reload_all)
-        self.detail_window.show()
-
     def init_ui(self):
         from PyQt5.QtWidgets import QFrame
 
@@ -84,6 +97,10 @@ class HomeWindow(QWidget):
         notif_btn.clicked.connect(lambda: self.switch_view("Notifications"))
         sidebar_layout.addWidget(notif_btn)
 
+        health_btn = QPushButton("Health")
+        health_btn.clicked.connect(lambda: self.switch_view("Health"))
+        sidebar_layout.addWidget(health_btn)
+
         self.vault_toggle = QPushButton("▸ Vault")
         self.vault_toggle.setCheckable(True)
         self.vault_toggle.setChecked(False)
@@ -105,6 +122,18 @@ class HomeWindow(QWidget):
 
         sidebar_layout.addWidget(self.vault_menu_widget)
 
+        import_btn = QPushButton("Import")
+        import_btn.clicked.connect(self.open_import_dialog)
+        sidebar_layout.addWidget(import_btn)
+
+        export_btn = QPushButton("Export")
+        export_btn.clicked.connect(self.open_export_dialog)
+        sidebar_layout.addWidget(export_btn)
+
+        rotate_btn = QPushButton("Rotate Key")
+        rotate_btn.clicked.connect(self.rotate_vault_key)
+        sidebar_layout.addWidget(rotate_btn)
+
         tools_btn = QPushButton("Password Generator")
         tools_btn.clicked.connect(lambda: self.switch_view("Password Generator"))
         sidebar_layout.addWidget(tools_btn)
@@ -150,6 +179,13 @@ class HomeWindow(QWidget):
         self.search_input.setFixedWidth(200)
         self.search_input.setClearButtonEnabled(True)
 
+        # Search as you type, but only query once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
         self.add_btn = QPushButton("+")
         self.add_btn.setFixedWidth(30)
         self.add_btn.clicked.connect(self.handle_add_click)
@@ -170,6 +206,7 @@ class HomeWindow(QWidget):
             "Folders": self.build_folder_view(),
             "Favorites": self.build_favourites_view(),
             "Notifications": self.build_notifications_view(),
+            "Health": self.build_health_view(),
             "Password Generator": self.build_generator_view()
         }
 
@@ -209,16 +246,16 @@ class HomeWindow(QWidget):
         index = list(self.views.keys()).index(name)
         self.stack.setCurrentIndex(index)
 
-        if name == "Vault" and hasattr(self, "current_folder_id"):
+        if name == "Vault" and self.current_folder_id is not None:
             # If we were in a folder view, reset the vault entries
             self.current_folder_id = None
             self.reload_vault()
+        elif name == "Health":
+            self.run_health_audit()
 
 
     def build_recent_view(self):
-        from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, QHBoxLayout
-        from PyQt5.QtCore import Qt, QSize
-        from PyQt5.QtGui import QFont
+        from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget
 
         widget = QWidget()
         layout = QVBoxLayout()
@@ -250,47 +287,8 @@ class HomeWindow(QWidget):
             }
         """)
 
-        from core.db import fetch_recent_passwords
-        self.recent_entries = fetch_recent_passwords()
-
-        for entry in self.recent_entries:
-            if len(entry) < 4:
-                continue
-
-            entry_id, name, modified, used = entry
-
-            # Row widget
-            row_widget = QWidget()
-            row_widget.setFixedHeight(45)  # Or whatever height you prefer
-            row_layout = QHBoxLayout(row_widget)
-            row_layout.setContentsMargins(20, 12, 20, 12)
-            row_layout.setSpacing(10)
-            row_widget.setStyleSheet("""
-                QWidget {
-                    background-color: #EEE5D3;
-                    border-radius: 12px;
-                }
-            """)
-
-            # Text label
-            name_label = QLabel(name if name else "(Unnamed)")
-            name_label.setFont(QFont("Segoe UI", 8, QFont.Bold))
-            name_label.setStyleSheet("color: #222052;")
-
-            # Icon label
-            icon_label = QLabel("➡️")  # Emoji or Unicode arrow → 🡺
-            icon_label.setFont(QFont("Segoe UI Emoji", 10))
-            icon_label.setStyleSheet("color: #222052;")
-            icon_label.setAlignment(Qt.AlignVCenter | Qt.AlignRight)
-
-            row_layout.addWidget(name_label)
-            row_layout.addStretch()
-            row_layout.addWidget(icon_label)
-
-            item = QListWidgetItem()
-            item.setSizeHint(QSize(0, 54))  # Bigger row
-            self.recent_list.addItem(item)
-            self.recent_list.setItemWidget(item, row_widget)
+        self.recent_entries = []
+        self.reload_recent_view()
 
         self.recent_list.itemClicked.connect(self.open_recent_entry)
 
@@ -349,36 +347,11 @@ class HomeWindow(QWidget):
 
         self.vault_list.itemClicked.connect(self.open_entry_view)
 
-        from core.db import fetch_all_passwords
-        self.vault_entries = fetch_all_passwords()
-
-        for entry in self.vault_entries:
-            if len(entry) < 4:
-                continue
-
-            entry_id, name, modified, used = entry
-
-            # Format date strings
-            modified_str = "-"
-            used_str = "-"
-            
-            if modified:
-                try:
-                    modified_dt = datetime.strptime(modified, "%Y-%m-%d %H:%M:%S")
-                    modified_str = modified_dt.strftime("%d %b %Y")
-                except:
-                    pass
-
-            if used:
-                try:
-                    used_dt = datetime.strptime(used, "%Y-%m-%d %H:%M:%S")
-                    used_str = used_dt.strftime("%d %b %Y")
-                except:
-                    pass
-
-            item_text = f"{name:<20}   {modified_str:<15}   {used_str:<15}"
-            item = QListWidgetItem(item_text)
-            self.vault_list.addItem(item)
+        # Rows are fetched a page at a time as the list scrolls
+        self.vault_list.verticalScrollBar().valueChanged.connect(self.on_vault_scroll)
+        self.current_folder_id = None
+        self.vault_loading = False
+        self.load_vault_page(reset=True)
 
         layout.addWidget(self.vault_list)
         widget.setLayout(layout)
@@ -447,7 +420,7 @@ class HomeWindow(QWidget):
 
     
     def open_folder_passwords(self, item):
-        from core.db import fetch_folders, fetch_passwords_by_folder
+        from core.db import fetch_folders
 
         index = self.folder_list.row(item)
         folder_id = fetch_folders()[index][0]  # Get folder ID from DB
@@ -455,13 +428,7 @@ class HomeWindow(QWidget):
         self.current_folder_id = folder_id
         self.current_view = f"Folder:{folder_id}"
 
-        passwords = fetch_passwords_by_folder(folder_id)
-        self.vault_entries = passwords  # Store only these
-
-        self.vault_list.clear()
-        for entry_id, name in passwords:
-            item = QListWidgetItem(name)
-            self.vault_list.addItem(item)
+        self.load_vault_page(reset=True)
 
         self.stack.setCurrentIndex(list(self.views.keys()).index("Vault"))
 
@@ -489,6 +456,15 @@ class HomeWindow(QWidget):
             print(f"No action for + in view: {self.current_view}")
 
     def logout(self):
+        self.flush_pending_writes()
+        from core.crypto import lock
+        from core.audit import stop_audit
+        from core.expiry import stop_expiry_schedulers
+        from core.rotation import stop_rotation
+        stop_audit()
+        stop_rotation()
+        stop_expiry_schedulers()
+        lock()
         self.close()  # Close HomeWindow
 
         # Close any other subwindows (e.g. view/edit)
@@ -500,16 +476,133 @@ class HomeWindow(QWidget):
         self.master_pw_window.show()
 
         
+    def open_import_dialog(self):
+        from ui.import_dialog import ImportDialog
+        self.import_dialog = ImportDialog(self, on_finished=self.reload_vault)
+        self.import_dialog.show()
+
+    def open_export_dialog(self):
+        from ui.export_dialog import ExportDialog
+        # Buffered last_used touches should be in the export too
+        self.flush_pending_writes()
+        self.export_dialog = ExportDialog(self)
+        self.export_dialog.show()
+
+    def rotate_vault_key(self):
+        confirm = QMessageBox.question(
+            self, "Rotate Vault Key",
+            "Re-encrypt every entry under a new vault key? The vault stays usable while it runs.",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+        from core.crypto import VaultLockedError
+        from core.rotation import start_rotation
+        try:
+            start_rotation(on_done=self.rotation_finished.emit)
+        except (ValueError, VaultLockedError) as e:
+            QMessageBox.warning(self, "Rotate Vault Key", f"Could not rotate the vault key:\n{str(e)}")
+
+    def on_rotation_finished(self, result):
+        from core.db import queue_notification
+        if "error" in result:
+            message = f"Key rotation stopped: {result['error']}"
+        elif "verify" not in result:
+            return  # Stopped for lock/logout; resumes next time
+        elif result["verify"]["failed"] or result["verify"]["stale"]:
+            message = (f"Key rotation verification found {len(result['verify']['failed'])} unreadable "
+                       f"and {result['verify']['stale']} un-rotated entries.")
+        elif result["migrated"] and not result["rotated"]:
+            message = f"Moved {result['migrated']} entries to per-entry data keys."
+        else:
+            message = f"Vault key rotated: {result['rotated'] + result['migrated']} entries re-keyed and verified."
+        queue_notification(self.username, message)
+        self.reload_notifications()
+        # Entries re-wrapped under the new key while an audit ran were left pending
+        from core.audit import start_audit
+        start_audit(on_done=self.audit_finished.emit)
+
     def reload_vault(self):
-        from core.db import fetch_all_passwords
         self.current_folder_id = None
+        self.load_vault_page(reset=True)
+
+    def load_vault_page(self, reset=False):
+        from core.db import fetch_passwords_page
+
+        if reset:
+            self.vault_list.clear()
+            self.vault_entries = []
+            self.vault_page_token = None
+        elif self.vault_page_token is None or self.vault_loading:
+            return  # Every page is loaded, or the next one is on its way
+
+        # Same key as searches: whichever was asked for last fills the list
+        self.vault_loading = True
+        get_db_worker().submit(
+            fetch_passwords_page,
+            self.sort_dropdown.currentText(), self.current_folder_id, self.vault_page_token,
+            priority=PRIORITY_HIGH, key="vault_list", on_result=self.show_vault_page
+        )
+
+    def show_vault_page(self, page):
+        rows, self.vault_page_token = page
+        self.vault_loading = False
+        self.vault_entries.extend(rows)
+        for entry in rows:
+            self.vault_list.addItem(QListWidgetItem(self.format_vault_row(entry)))
+
+    def run_search(self):
+        from core.db import search_passwords
+
+        text = self.search_input.text().strip()
+        if not text:
+            self.reload_vault()
+            return
+
+        if self.current_view != "Vault":
+            self.switch_view("Vault")
+
+        self.vault_loading = True
+        get_db_worker().submit(
+            search_passwords, text,
+            priority=PRIORITY_HIGH, key="vault_list", on_result=self.show_search_results
+        )
+
+    def show_search_results(self, results):
+        # Results are ranked and capped, so there is no further page to load
         self.vault_list.clear()
-        entries = fetch_all_passwords()
-        self.vault_entries = entries
+        self.vault_entries = results
+        self.vault_page_token = None
+        self.vault_loading = False
+        for entry in results:
+            self.vault_list.addItem(QListWidgetItem(self.format_vault_row(entry)))
+
+    def on_vault_scroll(self, value):
+        scrollbar = self.vault_list.verticalScrollBar()
+        if value >= scrollbar.maximum() - scrollbar.pageStep():
+            self.load_vault_page()
+
+    def format_vault_row(self, entry):
+        from datetime import datetime
 
-        for entry in entries:
-            entry_id, name = entry[0], entry[1]
-            QListWidgetItem(name, self.vault_list)
+        entry_id, name, modified, used = entry
+        modified_str = used_str = "-"
+
+        if modified:
+            try:
+                modified_dt = datetime.strptime(modified, "%Y-%m-%d %H:%M:%S")
+                modified_str = modified_dt.strftime("%d %b %Y")
+            except ValueError:
+                pass
+
+        if used:
+            try:
+                used_dt = datetime.strptime(used, "%Y-%m-%d %H:%M:%S")
+                used_str = used_dt.strftime("%d %b %Y")
+            except ValueError:
+                pass
+
+        return f"{name or '(Unnamed)':<20}   {modified_str:<15}   {used_str:<15}"
 
     def open_entry_view(self, item):
         index = self.vault_list.row(item)
@@ -549,12 +642,15 @@ class HomeWindow(QWidget):
 
     def reload_recent_view(self):
         from core.db import fetch_recent_passwords
+        get_db_worker().submit(fetch_recent_passwords, key="recent", on_result=self.show_recent_entries)
+
+    def show_recent_entries(self, entries):
         from PyQt5.QtWidgets import QListWidgetItem, QWidget, QHBoxLayout, QLabel
         from PyQt5.QtCore import QSize, Qt
         from PyQt5.QtGui import QFont
 
         self.recent_list.clear()
-        self.recent_entries = fetch_recent_passwords()
+        self.recent_entries = entries
 
         for entry in self.recent_entries:
             if len(entry) < 2:
@@ -599,6 +695,8 @@ class HomeWindow(QWidget):
         self.reload_vault()
         self.reload_recent_view()
         self.reload_favourites()
+        if self.current_view == "Health":
+            self.run_health_audit()
 
     def open_recent_entry(self, item):
         index = self.recent_list.row(item)
@@ -664,12 +762,60 @@ class HomeWindow(QWidget):
         """)
         layout.addWidget(self.quality_bar)
 
+        self.breach_label = QLabel()
+        self.breach_label.setStyleSheet("font-size: 12px; color: #444;")
+        self.breach_label.hide()
+        layout.addWidget(self.breach_label)
+
 
         # Length
         options_label = QLabel("Options")
         options_label.setStyleSheet("font-size: 14px; margin-top: 20px;")
         layout.addWidget(options_label)
 
+        toggle_style = """
+            QPushButton {
+                font-size: 13px;
+                background-color: #EFE9E1;
+                padding: 6px 12px;
+                border: 2px solid #C3B4A6;
+                border-radius: 12px;
+            }
+            QPushButton:checked {
+                background-color: #222052;
+                color: #EFE9E1;
+                border: 2px solid #222052;
+            }
+        """
+        input_style = """
+            QSpinBox, QComboBox {
+                background-color: #EFE9E1;
+                border: 2px solid #C3B4A6;
+                border-radius: 12px;
+                padding: 6px;
+            }
+        """
+
+        # Password or passphrase
+        from PyQt5.QtWidgets import QButtonGroup
+        mode_row = QHBoxLayout()
+        self.password_mode_btn = QPushButton("Password")
+        self.passphrase_mode_btn = QPushButton("Passphrase")
+        self.generator_mode = QButtonGroup(widget)
+        for btn in [self.password_mode_btn, self.passphrase_mode_btn]:
+            btn.setCheckable(True)
+            btn.setStyleSheet(toggle_style)
+            self.generator_mode.addButton(btn)
+            mode_row.addWidget(btn)
+        self.password_mode_btn.setChecked(True)
+        mode_row.addStretch()
+        layout.addLayout(mode_row)
+
+        self.password_options = QWidget()
+        password_layout = QVBoxLayout()
+        password_layout.setContentsMargins(0, 0, 0, 0)
+        password_layout.setSpacing(20)
+
         length_row = QHBoxLayout()
         length_label = QLabel("Length")
         length_label.setStyleSheet("font-size: 13px;")
@@ -688,7 +834,7 @@ class HomeWindow(QWidget):
         length_row.addWidget(length_label)
         length_row.addWidget(self.length_input)
         length_row.addStretch()
-        layout.addLayout(length_row)
+        password_layout.addLayout(length_row)
 
         # Character checkboxes
         checkbox_row = QHBoxLayout()
@@ -703,23 +849,63 @@ class HomeWindow(QWidget):
         for btn in [self.upper_btn, self.lower_btn, self.digits_btn, self.symbols_btn]:
             btn.setCheckable(True)
             btn.setChecked(True)
-            btn.setStyleSheet("""
-                QPushButton {
-                    font-size: 13px;
-                    background-color: #EFE9E1;
-                    padding: 6px 12px;
-                    border: 2px solid #C3B4A6;
-                    border-radius: 12px;
-                }
-                QPushButton:checked {
-                    background-color: #222052;
-                    color: #EFE9E1;
-                    border: 2px solid #222052;
-                }
-            """)
+            btn.setStyleSheet(toggle_style)
             checkbox_row.addWidget(btn)
 
-        layout.addLayout(checkbox_row)
+        password_layout.addLayout(checkbox_row)
+        self.password_options.setLayout(password_layout)
+        layout.addWidget(self.password_options)
+
+        # Passphrase options
+        from core.passphrase import MAX_DIGITS
+
+        self.passphrase_options = QWidget()
+        passphrase_layout = QVBoxLayout()
+        passphrase_layout.setContentsMargins(0, 0, 0, 0)
+        passphrase_layout.setSpacing(12)
+
+        words_row = QHBoxLayout()
+        self.words_input = QSpinBox()
+        self.words_input.setRange(3, 12)
+        self.words_input.setValue(6)
+        self.digits_input = QSpinBox()
+        self.digits_input.setRange(0, MAX_DIGITS)
+        for text, spin in [("Words", self.words_input), ("Digits", self.digits_input)]:
+            label = QLabel(text)
+            label.setStyleSheet("font-size: 13px;")
+            spin.setFixedWidth(100)
+            spin.setStyleSheet(input_style)
+            spin.valueChanged.connect(self.update_passphrase_entropy)
+            words_row.addWidget(label)
+            words_row.addWidget(spin)
+        words_row.addStretch()
+        passphrase_layout.addLayout(words_row)
+
+        style_row = QHBoxLayout()
+        self.separator_input = QComboBox()
+        for text, separator in self.PASSPHRASE_SEPARATORS:
+            self.separator_input.addItem(text, separator)
+        self.capitalise_input = QComboBox()
+        for text, option in self.PASSPHRASE_CAPITALS:
+            self.capitalise_input.addItem(text, option)
+        for text, combo in [("Separator", self.separator_input), ("Capitals", self.capitalise_input)]:
+            label = QLabel(text)
+            label.setStyleSheet("font-size: 13px;")
+            combo.setStyleSheet(input_style)
+            combo.currentIndexChanged.connect(self.update_passphrase_entropy)
+            style_row.addWidget(label)
+            style_row.addWidget(combo)
+        style_row.addStretch()
+        passphrase_layout.addLayout(style_row)
+
+        self.entropy_label = QLabel()
+        self.entropy_label.setStyleSheet("font-size: 12px; color: #444;")
+        passphrase_layout.addWidget(self.entropy_label)
+
+        self.passphrase_options.setLayout(passphrase_layout)
+        self.passphrase_options.hide()
+        layout.addWidget(self.passphrase_options)
+        self.passphrase_mode_btn.toggled.connect(self.set_generator_mode)
 
         # Generate Button
         generate_btn = QPushButton("Generate")
@@ -736,7 +922,10 @@ class HomeWindow(QWidget):
                 background-color: #000000;
             }
         """)
-        generate_btn.clicked.connect(lambda: self.generate_password_ui(generate_password))
+        generate_btn.clicked.connect(
+            lambda: self.generate_passphrase_ui() if self.passphrase_mode_btn.isChecked()
+            else self.generate_password_ui(generate_password)
+        )
         layout.addWidget(generate_btn, alignment=Qt.AlignCenter)
 
         # Copy Button
@@ -760,19 +949,73 @@ class HomeWindow(QWidget):
     
     def generate_password_ui(self, generator_func):
         length = self.length_input.value()
-        password = generator_func(
+        password = self.generate_unbreached(lambda: generator_func(
             length=length,
             use_upper=self.upper_btn.isChecked(),
             use_lower=self.lower_btn.isChecked(),
             use_digits=self.digits_btn.isChecked(),
             use_symbols=self.symbols_btn.isChecked()
-        )
+        ))
         self.output_box.setText(password)
 
         # Update quality bar
         score = self.evaluate_password_strength(password)
         self.quality_bar.setValue(score)
 
+    def generate_unbreached(self, generate):
+        # Draw again while the result is in the breach corpus; a lookup is
+        # microseconds, and only short or narrow policies ever hit it
+        from core.breach import breach_count
+        for _ in range(self.GENERATE_ATTEMPTS):
+            password = generate()
+            seen = breach_count(password)
+            if not seen:
+                break
+        if seen is None:
+            self.breach_label.hide()
+        else:
+            self.breach_label.setText(
+                f"Seen {seen:,} times in known breaches - widen the options" if seen
+                else "Not found in known breaches"
+            )
+            self.breach_label.show()
+        return password
+
+    def passphrase_policy(self):
+        from core.passphrase import PassphrasePolicy
+        return PassphrasePolicy(
+            words=self.words_input.value(),
+            separator=self.separator_input.currentData(),
+            capitalise=self.capitalise_input.currentData(),
+            digits=self.digits_input.value()
+        )
+
+    def set_generator_mode(self, passphrase):
+        self.password_options.setVisible(not passphrase)
+        self.passphrase_options.setVisible(passphrase)
+        if passphrase:
+            self.update_passphrase_entropy()
+
+    def update_passphrase_entropy(self):
+        from core.passphrase import entropy_bits
+        try:
+            bits = entropy_bits(self.passphrase_policy())
+        except ValueError as e:
+            self.entropy_label.setText(str(e))
+            return None
+        self.entropy_label.setText(f"Entropy: {bits:.1f} bits")
+        return bits
+
+    def generate_passphrase_ui(self):
+        from core.passphrase import generate_passphrase
+        bits = self.update_passphrase_entropy()
+        if bits is None:
+            return
+        policy = self.passphrase_policy()
+        passphrase = self.generate_unbreached(lambda: generate_passphrase(policy))
+        self.output_box.setText(passphrase)
+        self.quality_bar.setValue(self.evaluate_password_strength(passphrase))
+
 
     def copy_password_to_clipboard(self):
         from PyQt5.QtWidgets import QApplication
@@ -782,16 +1025,13 @@ class HomeWindow(QWidget):
         QMessageBox.information(self, "Copied", "Password copied to clipboard!")
     
     def build_favourites_view(self):
-        from core.db import fetch_favourites
-
         widget = QWidget()
         layout = QVBoxLayout()
         layout.addWidget(QLabel("Favourites"))
 
         self.fav_list = QListWidget()
-        self.fav_entries = fetch_favourites()
-        for entry_id, name in self.fav_entries:
-            QListWidgetItem(name, self.fav_list)
+        self.fav_entries = []
+        self.reload_favourites()
 
         self.fav_list.itemClicked.connect(self.open_favourite_entry)
         layout.addWidget(self.fav_list)
@@ -808,8 +1048,11 @@ class HomeWindow(QWidget):
 
     def reload_favourites(self):
         from core.db import fetch_favourites
+        get_db_worker().submit(fetch_favourites, key="favourites", on_result=self.show_favourites)
+
+    def show_favourites(self, entries):
         self.fav_list.clear()
-        self.fav_entries = fetch_favourites()
+        self.fav_entries = entries
         for entry_id, name in self.fav_entries:
             QListWidgetItem(name, self.fav_list)
 
@@ -835,6 +1078,15 @@ class HomeWindow(QWidget):
     def auto_lock(self):
         print("Auto-lock triggered")
         self.lock_timer.stop()
+        self.flush_pending_writes()
+        from core.crypto import lock
+        from core.audit import stop_audit
+        from core.expiry import stop_expiry_schedulers
+        from core.rotation import stop_rotation
+        stop_audit()
+        stop_rotation()
+        stop_expiry_schedulers()
+        lock()
 
         # Close all open windows that might still be alive
         for widget in QApplication.topLevelWidgets():
@@ -844,108 +1096,155 @@ class HomeWindow(QWidget):
         self.close()
 
         # Show master password screen
+        from ui.master_password import MasterPasswordWindow
         self.master_pw_window = MasterPasswordWindow(self.get_current_username())
         self.master_pw_window.show()
 
     
+    def flush_pending_writes(self):
+        # Persist buffered last_used touches and notifications before locking
+        from core.db import flush_pending_writes
+        get_db_worker().submit(flush_pending_writes, priority=PRIORITY_HIGH)
+
     def get_current_username(self):
         return self.username if hasattr(self, 'username') else ""
     
     def build_notifications_view(self):
-        from core.db import fetch_notifications
-
         widget = QWidget()
         layout = QVBoxLayout()
         layout.addWidget(QLabel("Notifications"))
 
         self.notif_list = QListWidget()
-        notifications = fetch_notifications(self.username)
-
-        for msg, ts in notifications:
-            display_text = f"{msg} ({ts})"
-            item = QListWidgetItem(display_text)
-            self.notif_list.addItem(item)
+        self.notif_list.verticalScrollBar().valueChanged.connect(self.on_notifications_scroll)
+        self.reload_notifications()
 
         layout.addWidget(self.notif_list)
         widget.setLayout(layout)
         return widget
-    
-    def evaluate_password_strength(self, password: str) -> int:
-        import re
-        length = len(password)
-        score = 0
 
-        if length < 8:
-            return 10  # Very weak, immediate return
-        if length < 12:
-            score -= 20  # Penalise short passwords
-
-        if length >= 14:
-            score += 25
-        elif length >= 12:
-            score += 15
-
-        if re.search(r"[A-Z]", password):
-            score += 20
-        if re.search(r"[a-z]", password):
-            score += 20
-        if re.search(r"[0-9]", password):
-            score += 20
-        if re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
-            score += 15
-
-        return min(max(score, 0), 100)
-
-
-    def sort_vault_entries(self, sort_type):
-        from datetime import datetime
-        from core.db import fetch_all_passwords, fetch_all_passwords_sorted
-        from core.db import fetch_passwords_by_folder, fetch_passwords_by_folder_sorted
-
-        # Fetch based on current view (folder or all)
-        if hasattr(self, "current_folder_id") and self.current_folder_id:
-            passwords = fetch_passwords_by_folder_sorted(self.current_folder_id, sort_type)
-        else:
-            passwords = fetch_all_passwords_sorted(sort_type)
-
-        self.vault_entries = passwords
-        self.vault_list.clear()
-
-        for entry in passwords:
-            if len(entry) < 4:
-                continue
-
-            entry_id, name, modified, used = entry
-            modified_str = used_str = "-"
-
-            if modified:
-                try:
-                    modified_dt = datetime.strptime(modified, "%Y-%m-%d %H:%M:%S")
-                    modified_str = modified_dt.strftime("%d %b %Y")
-                except:
-                    pass
-
-            if used:
-                try:
-                    used_dt = datetime.strptime(used, "%Y-%m-%d %H:%M:%S")
-                    used_str = used_dt.strftime("%d %b %Y")
-                except:
-                    pass
-
-            item_text = f"{name:<20}   {modified_str:<15}   {used_str:<15}"
-            self.vault_list.addItem(QListWidgetItem(item_text))
-
-
-
-
-
-        
+    def reload_notifications(self):
+        self.load_notifications_page(reset=True)
 
+    def load_notifications_page(self, reset=False):
+        from core.db import fetch_notifications
 
+        if reset:
+            self.notif_page_token = None
+        elif self.notif_page_token is None or self.notif_loading:
+            return
 
+        self.notif_loading = True
+        get_db_worker().submit(
+            fetch_notifications, self.username, self.notif_page_token,
+            key="notifications", on_result=lambda page, reset=reset: self.show_notifications(page, reset)
+        )
 
+    def show_notifications(self, page, reset=False):
+        notifications, self.notif_page_token = page
+        self.notif_loading = False
+        if reset:
+            self.notif_list.clear()
+        for _id, msg, ts, count in notifications:
+            display_text = f"{msg} ({ts})" if count == 1 else f"{msg} x{count} ({ts})"
+            item = QListWidgetItem(display_text)
+            self.notif_list.addItem(item)
 
+    def on_notifications_scroll(self, value):
+        scrollbar = self.notif_list.verticalScrollBar()
+        if value >= scrollbar.maximum() - scrollbar.pageStep():
+            self.load_notifications_page()
+    
+    def build_health_view(self):
+        widget = QWidget()
+        layout = QVBoxLayout()
+        header = QHBoxLayout()
+        header.addWidget(QLabel("Health"))
+        header.addStretch()
+        recheck_btn = QPushButton("Re-check")
+        recheck_btn.clicked.connect(self.run_health_audit)
+        header.addWidget(recheck_btn)
+        layout.addLayout(header)
+
+        self.health_summary = QLabel()
+        self.health_summary.setWordWrap(True)
+        layout.addWidget(self.health_summary)
+        self.health_status = QLabel()
+        self.health_status.setStyleSheet("font-weight: normal; font-size: 12px; color: #444;")
+        layout.addWidget(self.health_status)
+
+        self.health_list = QListWidget()
+        self.health_issues = []
+        self.health_list.itemClicked.connect(self.open_health_entry)
+        layout.addWidget(self.health_list)
+        widget.setLayout(layout)
+        return widget
 
+    def reload_health(self):
+        # Reads the materialised audit table; nothing is decrypted here
+        from core.audit import health_report
+        get_db_worker().submit(health_report, key="health", on_result=self.show_health)
+
+    def run_health_audit(self):
+        # Show the last results straight away, then audit whatever changed since
+        from core.audit import start_audit
+        self.reload_health()
+        self.health_status.setText("Checking for changed entries...")
+        start_audit(on_done=self.audit_finished.emit)
+
+    def on_audit_finished(self, result):
+        if "error" in result:
+            self.health_status.setText(f"Audit stopped: {result['error']}")
+            return
+        self.health_status.setText(
+            f"Up to date ({result['audited']} re-checked)" if not result["remaining"]
+            else f"{result['remaining']} entries still to check"
+        )
+        if result["audited"]:
+            self.reload_health()
+
+    def show_health(self, report):
+        from core.audit import MAX_AGE_DAYS, WEAK_SCORE
+        from core.strength import SCORE_LABELS
+        summary, self.health_issues = report
+        self.health_summary.setText(
+            f"{summary['entries']} entries checked: {summary['weak']} weak, {summary['reused']} reused, "
+            + (f"{summary['breached']} breached, " if summary["breached"] is not None else "")
+            + f"{summary['old']} over a year old, {summary['expired']} expired, "
+            f"{summary['expiring']} expiring soon"
+            + (f", {summary['unreadable']} unreadable" if summary["unreadable"] else "")
+        )
+        self.health_list.clear()
+        for issue in self.health_issues:
+            problems = []
+            if issue["score"] is None:
+                problems.append(issue["warning"])
+            elif issue["score"] <= WEAK_SCORE:
+                weak = SCORE_LABELS[issue["score"]][0]
+                problems.append(f"{weak}: {issue['warning']}" if issue["warning"] else weak)
+            if issue["reused"]:
+                problems.append(f"used by {issue['reused']} entries")
+            if issue["breached"]:
+                problems.append(f"seen {issue['breached']:,} times in breaches")
+            if issue["age_days"] is not None and issue["age_days"] > MAX_AGE_DAYS:
+                problems.append(f"unchanged for {issue['age_days']} days")
+            if issue["expired"]:
+                problems.append("expired")
+            elif issue["expiring"]:
+                problems.append("expiring soon")
+            QListWidgetItem(f"{issue['name']} - {'; '.join(problems)}", self.health_list)
+
+    def open_health_entry(self, item):
+        entry_id = self.health_issues[self.health_list.row(item)]["id"]
+        from ui.view_password import ViewPasswordWindow
+        self.detail_window = ViewPasswordWindow(entry_id, self.username, refresh_callback=self.reload_all)
+        self.detail_window.show()
 
+    def evaluate_password_strength(self, password: str) -> int:
+        # Meter fill, 0-100, from the same estimator the entry windows use
+        from core.strength import estimate
+        return estimate(password).percent
 
 
+    def sort_vault_entries(self, sort_type):
+        # The dropdown's current text drives the page order
+        self.load_vault_page(reset=True)
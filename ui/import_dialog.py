@@ -0,0 +1,127 @@
+from PyQt5.QtWidgets import (
+    QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QDialog, QProgressBar, QFileDialog
+)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ImportThread(QThread):
+    # A long import gets its own thread so it doesn't hold up the shared DbWorker
+    progress = pyqtSignal(dict)
+    finished_import = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        from core.db import close_connection
+        from core.importer import import_file
+
+        try:
+            stats = import_file(self.path, progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished_import.emit(stats)
+        finally:
+            close_connection()
+
+
+class ImportDialog(QDialog):
+    def __init__(self, parent=None, on_finished=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Passwords")
+        self.setFixedSize(380, 180)
+        self.on_finished = on_finished
+        self.thread = None
+
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #EFE9E1;
+                font-family: 'Segoe UI', sans-serif;
+            }
+            QLabel {
+                font-size: 13px;
+                color: #222052;
+            }
+            QPushButton {
+                background-color: #222052;
+                color: #EFE9E1;
+                border-radius: 10px;
+                padding: 6px 12px;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #000000;
+            }
+        """)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        self.status_label = QLabel("Choose a CSV or JSON export (Bitwarden, KeePass, LastPass or generic).")
+        self.status_label.setWordWrap(True)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
+
+        btn_row = QHBoxLayout()
+        self.choose_btn = QPushButton("Choose File")
+        self.close_btn = QPushButton("Close")
+        self.choose_btn.clicked.connect(self.choose_file)
+        self.close_btn.clicked.connect(self.close)
+        btn_row.addWidget(self.choose_btn)
+        btn_row.addWidget(self.close_btn)
+
+        layout.addLayout(btn_row)
+        self.setLayout(layout)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Passwords", "", "Exports (*.csv *.json);;All Files (*)"
+        )
+        if path:
+            self.start_import(path)
+
+    def start_import(self, path):
+        self.choose_btn.setEnabled(False)
+        self.close_btn.setEnabled(False)
+        self.status_label.setText("Importing...")
+        self.progress_bar.setValue(0)
+
+        self.thread = ImportThread(path, self)
+        self.thread.progress.connect(self.show_progress)
+        self.thread.finished_import.connect(self.import_done)
+        self.thread.failed.connect(self.import_failed)
+        self.thread.start()
+
+    def show_progress(self, stats):
+        if stats["total_bytes"]:
+            self.progress_bar.setValue(int(stats["bytes_read"] * 100 / stats["total_bytes"]))
+        self.status_label.setText(f"Imported {stats['imported']} entries ({stats['rate']:.0f}/s)")
+
+    def import_done(self, stats):
+        self.progress_bar.setValue(100)
+        self.status_label.setText(
+            f"Imported {stats['imported']} entries in {stats['elapsed']:.1f} s ({stats['rate']:.0f}/s)"
+        )
+        self.choose_btn.setEnabled(True)
+        self.close_btn.setEnabled(True)
+        if self.on_finished:
+            self.on_finished()
+
+    def import_failed(self, error):
+        self.status_label.setText(f"Import failed: {error}")
+        self.choose_btn.setEnabled(True)
+        self.close_btn.setEnabled(True)
+
+    def closeEvent(self, event):
+        # Don't let the dialog go away under a running import
+        if self.thread is not None and self.thread.isRunning():
+            event.ignore()
+            return
+        super().closeEvent(event)
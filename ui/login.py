@@ -1,7 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QFrame, QSizePolicy
 from PyQt5.QtCore import Qt
-import sqlite3
-import bcrypt 
+from core.db import get_connection, transaction
 
 class LoginWindow(QWidget):
     def __init__(self):
@@ -101,14 +100,12 @@ class LoginWindow(QWidget):
 
         try:
             # Get user by username or email
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
+            c = get_connection().cursor()
             c.execute("""
                 SELECT username, password FROM users
                 WHERE username = ? OR email = ?
             """, (user_input, user_input))
             user = c.fetchone()
-            conn.close()
 
             if not user:
                 QMessageBox.warning(self, "Error", "User not found.")
@@ -116,6 +113,7 @@ class LoginWindow(QWidget):
 
             db_username, db_password = user
 
+            import bcrypt
             if not bcrypt.checkpw(password.encode(), db_password):
                 QMessageBox.warning(self, "Error", "Incorrect password.")
                 return
@@ -124,11 +122,8 @@ class LoginWindow(QWidget):
             self.logged_in_username = db_username
 
             # ✅ Check for OTP
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
             c.execute("SELECT otp_secret FROM users WHERE username = ?", (db_username,))
             row = c.fetchone()
-            conn.close()
 
             if row and row[0]:  # otp_secret exists
                 from ui.otp_verify import OTPVerifyWindow
@@ -137,29 +132,25 @@ class LoginWindow(QWidget):
                 self.close()
             else:
                 import random, datetime
-                from core.emailer import send_otp_email
 
                 # Generate OTP code and expiry
                 otp_code = str(random.randint(100000, 999999))
                 otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=5)
 
                 # Store OTP in DB
-                conn = sqlite3.connect("vault.db")
-                c = conn.cursor()
-                c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?", 
-                        (otp_code, otp_expiry, db_username))
-                conn.commit()
-                c.execute("SELECT email FROM users WHERE username = ?", (db_username,))
-                email_row = c.fetchone()
-                conn.close()
+                with transaction() as c:
+                    c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?",
+                            (otp_code, otp_expiry, db_username))
+                    c.execute("SELECT email FROM users WHERE username = ?", (db_username,))
+                    email_row = c.fetchone()
 
                 if email_row and email_row[0]:
                     user_email = email_row[0]
-                    send_otp_email(user_email, otp_code)
 
-                    # Open Email OTP verification window
+                    # Open Email OTP verification window; it sends the code in the background
                     from ui.email_otp_verify import EmailOTPVerifyWindow
                     self.email_otp_window = EmailOTPVerifyWindow(db_username, self.open_master_window)
+                    self.email_otp_window.send_code(user_email, otp_code)
                     self.email_otp_window.show()
                     self.close()
                 else:
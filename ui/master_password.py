@@ -2,8 +2,7 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFrame
 from PyQt5.QtCore import Qt, QTimer
 
-import sqlite3
-import bcrypt
+from core.db import get_connection
 
 
 class MasterPasswordWindow(QWidget):
@@ -91,14 +90,13 @@ class MasterPasswordWindow(QWidget):
             self.input.setPlaceholderText("Create Master Password")
 
     def check_master_exists(self):
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
+        c = get_connection().cursor()
         c.execute("SELECT password_hash FROM master_password WHERE username = ?", (self.username,))
         row = c.fetchone()
-        conn.close()
         return bool(row)
 
     def verify_master_password(self):
+        import bcrypt
         password = self.input.text()
         
         if not password:
@@ -106,11 +104,9 @@ class MasterPasswordWindow(QWidget):
             return
             
         if self.master_exists:
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
+            c = get_connection().cursor()
             c.execute("SELECT password_hash FROM master_password WHERE username = ?", (self.username,))
             row = c.fetchone()
-            conn.close()
 
             if row:
                 hashed_pw = row[0]
@@ -120,6 +116,13 @@ class MasterPasswordWindow(QWidget):
                     hashed_pw = hashed_pw.encode('utf-8')
 
                 if bcrypt.checkpw(password.encode(), hashed_pw):
+                    from core.crypto import VaultLockedError
+                    from core.keys import unlock
+                    try:
+                        unlock(self.username, password)
+                    except (ValueError, VaultLockedError) as e:
+                        QMessageBox.warning(self, "Error", str(e))
+                        return
                     self.open_home()
                     return
 
@@ -153,20 +156,16 @@ class MasterPasswordWindow(QWidget):
                 return
 
                 
+            from core.crypto import lock
+            from core.keys import AWAITING_ACCESS, enroll
             hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-            
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO master_password (username, password_hash) VALUES (?, ?)", (self.username, hashed))
-            conn.commit()
-            conn.close()
-            
-
+            # Saves the hash too; False if still waiting for the vault keys
+            unlocked = enroll(self.username, password, hashed)
 
             msg_box = QMessageBox(self)
             msg_box.setIcon(QMessageBox.Information)
             msg_box.setWindowTitle("Success")
-            msg_box.setText("Master password set.")
+            msg_box.setText("Master password set." if unlocked else f"Master password set.\n\n{AWAITING_ACCESS}")
             msg_box.setStandardButtons(QMessageBox.Ok)
             msg_box.setStyleSheet("""
                 QMessageBox {
@@ -192,7 +191,10 @@ class MasterPasswordWindow(QWidget):
             msg_box.exec_()
 
             # Then proceed
-            if self.from_register:
+            if self.from_register or not unlocked:
+                # Registration ends at the login screen, locked, as does a
+                # user the vault keys haven't been shared with yet
+                lock()
                 from ui.login import LoginWindow
                 self.login_window = LoginWindow()
                 self.login_window.show()
@@ -1,8 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QPushButton
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-import pyotp
-import qrcode
 from io import BytesIO
 
 class OTPSetupWindow(QWidget):
@@ -49,7 +47,9 @@ class OTPSetupWindow(QWidget):
         title.setStyleSheet("font-weight: bold;")
         layout.addWidget(title)
 
-        # Generate TOTP URI and QR Code
+        # Generate TOTP URI and QR Code (qrcode pulls in PIL, so only here)
+        import pyotp
+        import qrcode
         totp_uri = pyotp.totp.TOTP(self.otp_secret).provisioning_uri(
             name=self.username,
             issuer_name="Vault Password Manager"
@@ -1,10 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox
 from PyQt5.QtCore import Qt
-from core.emailer import send_otp_email
-from ui.email_otp_verify import EmailOTPVerifyWindow
-import sqlite3, random, datetime
-import pyotp
-import sqlite3
+import random, datetime
+from core.db import get_connection, transaction
 
 class OTPVerifyWindow(QWidget):
     def __init__(self, username, on_success):
@@ -100,13 +97,12 @@ class OTPVerifyWindow(QWidget):
     def verify_otp(self):
         entered_code = self.otp_input.text().strip()
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
+        c = get_connection().cursor()
         c.execute("SELECT otp_secret FROM users WHERE username = ?", (self.username,))
         result = c.fetchone()
-        conn.close()
 
         if result:
+            import pyotp
             otp_secret = result[0]
             totp = pyotp.TOTP(otp_secret)
             if totp.verify(entered_code):
@@ -119,29 +115,27 @@ class OTPVerifyWindow(QWidget):
             QMessageBox.critical(self, "Error", "User not found.")
 
     def use_email_otp(self):
+        from ui.email_otp_verify import EmailOTPVerifyWindow
         otp_code = str(random.randint(100000, 999999))
         otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=5)
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
+        c = get_connection().cursor()
         c.execute("SELECT email FROM users WHERE username = ?", (self.username,))
         row = c.fetchone()
 
         if not row or not row[0]:
             QMessageBox.critical(self, "Error", "No email found for this user.")
-            conn.close()
             return
 
         email = row[0]
 
         # Update DB with new email OTP
-        c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?", 
-                (otp_code, otp_expiry, self.username))
-        conn.commit()
-        conn.close()
+        with transaction() as c:
+            c.execute("UPDATE users SET otp_code = ?, otp_expiry = ? WHERE username = ?",
+                    (otp_code, otp_expiry, self.username))
 
-        send_otp_email(email, otp_code)
-        # Open Email OTP Window
+        # Open Email OTP Window; it sends the code in the background
         self.email_otp_window = EmailOTPVerifyWindow(self.username, self.on_success)
+        self.email_otp_window.send_code(email, otp_code)
         self.email_otp_window.show()
         self.close()
@@ -4,7 +4,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-import bcrypt, sqlite3, pyotp
+import sqlite3
+from core.db import transaction
 
 class RegisterWindow(QWidget):
     def __init__(self):
@@ -125,18 +126,16 @@ class RegisterWindow(QWidget):
             QMessageBox.warning(self, "Error", "All fields are required.")
             return
 
+        import bcrypt, pyotp
         try:
             hashed_pwd = bcrypt.hashpw(pwd.encode(), bcrypt.gensalt())
             otp_secret = pyotp.random_base32()
 
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO users (username, email, password, is_verified, otp_secret)
-                VALUES (?, ?, ?, 1, ?)
-            """, (uname, email, hashed_pwd, otp_secret))
-            conn.commit()
-            conn.close()
+            with transaction() as c:
+                c.execute("""
+                    INSERT INTO users (username, email, password, is_verified, otp_secret)
+                    VALUES (?, ?, ?, 1, ?)
+                """, (uname, email, hashed_pwd, otp_secret))
 
             QMessageBox.information(self, "Success", "Account created successfully!")
 
@@ -0,0 +1,52 @@
+from PyQt5.QtWidgets import QWidget, QLabel, QProgressBar, QVBoxLayout
+
+
+class StrengthMeterWidget(QWidget):
+    """Strength bar and label that follow a password field as it is typed.
+
+    Scores come from one core.strength.StrengthMeter, so each keystroke only
+    rescores the changed tail of the password. user_inputs is a callable
+    returning the strings (name, email, URL) a password shouldn't be built on.
+    """
+
+    def __init__(self, password_input, user_inputs=None, parent=None):
+        super().__init__(parent)
+        from core.strength import StrengthMeter
+
+        self.meter = StrengthMeter()
+        self.user_inputs = user_inputs
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+        self.bar = QProgressBar()
+        self.bar.setFixedHeight(8)
+        self.bar.setRange(0, 100)
+        self.bar.setTextVisible(False)
+        self.label = QLabel()
+        self.label.setWordWrap(True)
+        self.label.setStyleSheet("font-size: 11px; color: #444;")
+        layout.addWidget(self.bar)
+        layout.addWidget(self.label)
+        self.setLayout(layout)
+
+        password_input.textChanged.connect(self.update_strength)
+        self.update_strength(password_input.text())
+
+    def update_strength(self, password):
+        if not password:
+            self.bar.setValue(0)
+            self.label.clear()
+            return
+        if self.user_inputs is not None:
+            self.meter.set_user_inputs(self.user_inputs())
+        result = self.meter.update(password)
+        self.bar.setValue(max(result.percent, 5))
+        self.bar.setStyleSheet(f"""
+            QProgressBar {{ background-color: #DDD7CE; border-radius: 4px; }}
+            QProgressBar::chunk {{ background-color: {result.color}; border-radius: 4px; }}
+        """)
+        text = f"Strength: {result.label}"
+        if result.warning:
+            text += f" - {result.warning}"
+        self.label.setText(text)
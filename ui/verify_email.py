@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox
-import sqlite3
 import datetime
+from core.db import get_connection, transaction
 
 class EmailVerificationWindow(QWidget):
     def __init__(self, username):
@@ -27,8 +27,7 @@ class EmailVerificationWindow(QWidget):
     def verify_code(self):
         code_entered = self.code_input.text()
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
+        c = get_connection().cursor()
         c.execute("SELECT verification_code, code_expiry FROM users WHERE username = ?", (self.username,))
         row = c.fetchone()
 
@@ -40,9 +39,8 @@ class EmailVerificationWindow(QWidget):
         if datetime.datetime.now() > datetime.datetime.fromisoformat(expiry):
             QMessageBox.warning(self, "Expired", "Verification code expired.")
         elif code_entered == actual_code:
-            c.execute("UPDATE users SET is_verified = 1 WHERE username = ?", (self.username,))
-            conn.commit()
-            conn.close()
+            with transaction() as c:
+                c.execute("UPDATE users SET is_verified = 1 WHERE username = ?", (self.username,))
             QMessageBox.information(self, "Verified", "Email verified successfully!")
             self.open_master_password()
         else:
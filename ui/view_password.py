@@ -4,9 +4,11 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QIcon
-import sqlite3
-from core.crypto import decrypt_password, encrypt_password
-from core.db import insert_password_entry  # Optional if you reuse db functions
+from core.crypto import current_key_version, seal_password
+from core.fingerprint import fingerprint
+from core.secret_cache import reveal_password
+from ui.strength_meter import StrengthMeterWidget
+from ui.db_worker import get_db_worker, PRIORITY_HIGH
 
 class ViewPasswordWindow(QWidget):
     def __init__(self, entry_id, username, refresh_callback=None):
@@ -14,6 +16,9 @@ class ViewPasswordWindow(QWidget):
         self.entry_id = entry_id
         self.username = username
         self.refresh_callback = refresh_callback
+        # (ciphertext, data_key, key_version) as stored; only decrypted on
+        # reveal or copy
+        self.sealed_password = None
         self.setWindowTitle("Password Detail")
         self.setGeometry(550, 200, 420, 520)
 
@@ -104,6 +109,7 @@ class ViewPasswordWindow(QWidget):
         # Password
         self.password_input = QLineEdit()
         self.password_input.setEchoMode(QLineEdit.Password)
+        self.password_input.setPlaceholderText("••••••••")
         pw_row = QHBoxLayout()
         pw_row.addWidget(self.password_input)
 
@@ -112,7 +118,7 @@ class ViewPasswordWindow(QWidget):
         toggle_btn.toggled.connect(self.toggle_visibility)
 
         copy_btn = emoji_button("📋")
-        copy_btn.clicked.connect(lambda: self.copy_to_clipboard(self.password_input.text()))
+        copy_btn.clicked.connect(lambda: self.copy_to_clipboard(self.current_password()))
 
         pw_row.addWidget(copy_btn)
         pw_row.addWidget(toggle_btn)
@@ -121,19 +127,24 @@ class ViewPasswordWindow(QWidget):
         pw_frame.setLayout(pw_row)
         grid.addWidget(QLabel("Password"), 3, 0)
         grid.addWidget(pw_frame, 3, 1)
+        self.strength_meter = StrengthMeterWidget(
+            self.password_input,
+            lambda: (self.name_input.text(), self.email_input.text(), self.url_input.text())
+        )
+        grid.addWidget(self.strength_meter, 4, 1)
 
         # Notes
         self.notes_input = QTextEdit()
         self.notes_input.setPlaceholderText("Notes")
-        grid.addWidget(QLabel("Notes"), 4, 0)
-        grid.addWidget(self.notes_input, 4, 1)
+        grid.addWidget(QLabel("Notes"), 5, 0)
+        grid.addWidget(self.notes_input, 5, 1)
 
         # Expiry
         self.expiry_input = QDateEdit()
         self.expiry_input.setCalendarPopup(True)
         self.expiry_input.setDisplayFormat("yyyy-MM-dd")
-        grid.addWidget(QLabel("Expiry Date"), 5, 0)
-        grid.addWidget(self.expiry_input, 5, 1)
+        grid.addWidget(QLabel("Expiry Date"), 6, 0)
+        grid.addWidget(self.expiry_input, 6, 1)
 
         layout.addLayout(grid)
 
@@ -157,17 +168,15 @@ class ViewPasswordWindow(QWidget):
 
 
     def load_entry(self):
-        from core.db import update_last_used
-        update_last_used(self.entry_id)
-
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
-        c.execute("SELECT name, email, url, password, notes, expiry_date, is_favourite FROM passwords WHERE id = ?", (self.entry_id,))
-        row = c.fetchone()
-        conn.close()
+        from core.db import fetch_password_entry, touch_last_used
+        # Buffered in memory and flushed in a batch (see core.db write-behind)
+        touch_last_used(self.entry_id)
+        get_db_worker().submit(fetch_password_entry, self.entry_id, priority=PRIORITY_HIGH, on_result=self.show_entry)
 
+    def show_entry(self, row):
         if row:
-            name, email, url, encrypted_pw, notes, expiry_date, is_fav = row
+            name, email, url, encrypted_pw, notes, expiry_date, is_fav, key_version, data_key = row
+            self.sealed_password = (encrypted_pw, data_key, key_version)
             if expiry_date:
                 y, m, d = map(int, expiry_date.split("-"))
                 self.expiry_input.setDate(QDate(y, m, d))
@@ -175,88 +184,107 @@ class ViewPasswordWindow(QWidget):
                 self.expiry_input.setDate(QDate.currentDate())
 
             import datetime
-            from core.db import log_notification
+            from core.db import queue_notification
 
             try:
                 if expiry_date:
                     expiry = datetime.datetime.strptime(expiry_date, "%Y-%m-%d").date()
                     today = datetime.date.today()
                     if expiry < today:
-                        log_notification(self.username, f"Password for '{name}' has expired.")
+                        queue_notification(self.username, f"Password for '{name}' has expired.", self.entry_id, "expired")
                     elif expiry <= today + datetime.timedelta(days=7):
-                        log_notification(self.username, f"Password for '{name}' is expiring soon.")
+                        queue_notification(self.username, f"Password for '{name}' is expiring soon.", self.entry_id, "soon")
             except Exception as e:
                 print(f"Failed expiry check: {e}")
 
             self.name_input.setText(name)
             self.email_input.setText(email)
             self.url_input.setText(url)
-            self.password_input.setText(decrypt_password(encrypted_pw))
             self.notes_input.setPlainText(notes)
             self.fav_btn.setChecked(bool(is_fav))
             self.fav_btn.setText("⭐ Unfavourite" if is_fav else "⭐ Mark as Favourite")
-            log_notification(self.username, f"Viewed password: {name}")
+            queue_notification(self.username, f"Viewed password: {name}", self.entry_id, "view")
 
     def save_entry(self):
         name = self.name_input.text()
         email = self.email_input.text()
         url = self.url_input.text()
-        password = encrypt_password(self.password_input.text())
+        if self.sealed_password is not None and not self.password_input.isModified() \
+                and self.sealed_password[2] == current_key_version():
+            # Unchanged: keep the stored ciphertext (and its fingerprint), no need to decrypt it
+            password, data_key, key_version = self.sealed_password
+            password_fingerprint = None
+        else:
+            # Edited, or under an older key while a rotation runs
+            plaintext = self.current_password()
+            password, data_key, key_version = seal_password(plaintext)
+            password_fingerprint = fingerprint(plaintext) if plaintext else None
         notes = self.notes_input.toPlainText()
         expiry_qdate = self.expiry_input.date()
         expiry_date = expiry_qdate.toString("yyyy-MM-dd")
         if expiry_qdate == QDate.currentDate():
             expiry_date = None
 
-        conn = sqlite3.connect("vault.db")
-        c = conn.cursor()
-        c.execute("""
-            UPDATE passwords
-            SET name = ?, email = ?, url = ?, password = ?, notes = ?, expiry_date = ?
-            WHERE id = ?
-        """, (name, email, url, password, notes, expiry_date, self.entry_id))
-        conn.commit()
-        conn.close()
+        from core.db import update_password_details
+        get_db_worker().submit(
+            update_password_details, self.entry_id, name, email, url, password, notes, expiry_date, key_version, data_key,
+            password_fingerprint,
+            priority=PRIORITY_HIGH, on_result=self.on_saved, on_error=self.on_write_failed
+        )
 
+    def on_saved(self, _result):
         QMessageBox.information(self, "Saved", "Password updated.")
         self.close()
         if self.refresh_callback:
             self.refresh_callback()
 
+    def on_write_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Failed to save changes:\n{str(error)}")
+
     def delete_entry(self):
         confirm = QMessageBox.question(
             self, "Confirm Delete", "Are you sure you want to delete this entry?",
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect("vault.db")
-            c = conn.cursor()
-            c.execute("DELETE FROM passwords WHERE id = ?", (self.entry_id,))
-            conn.commit()
-            conn.close()
-            QMessageBox.information(self, "Deleted", "Password entry deleted.")
-            self.close()
-            if self.refresh_callback:
-                self.refresh_callback()
+            from core.db import delete_password_entry
+            get_db_worker().submit(
+                delete_password_entry, self.entry_id,
+                priority=PRIORITY_HIGH, on_result=self.on_deleted, on_error=self.on_write_failed
+            )
+
+    def on_deleted(self, _result):
+        QMessageBox.information(self, "Deleted", "Password entry deleted.")
+        self.close()
+        if self.refresh_callback:
+            self.refresh_callback()
 
     def copy_to_clipboard(self, text):
         clipboard = QApplication.clipboard()
         clipboard.setText(text)
 
+    def current_password(self):
+        # What's in the field if the user typed it, else the stored one
+        if self.password_input.isModified() or self.sealed_password is None:
+            return self.password_input.text()
+        return reveal_password(self.entry_id, *self.sealed_password)
+
     def toggle_visibility(self, checked):
+        if checked and not self.password_input.isModified() and self.sealed_password is not None:
+            self.password_input.setText(self.current_password())
         self.password_input.setEchoMode(QLineEdit.Normal if checked else QLineEdit.Password)
 
     def toggle_favourite(self):
         from core.db import set_favourite
         is_checked = self.fav_btn.isChecked()
         
-        # Update favourite in database
-        set_favourite(self.entry_id, is_checked)
-        
         # Update button label
         self.fav_btn.setText("⭐ Unfavourite" if is_checked else "⭐ Mark as Favourite")
-        
-        # Trigger refresh callback (e.g., reload_all from HomeWindow)
+
+        # Update favourite in database, then refresh (e.g., reload_all from HomeWindow)
+        get_db_worker().submit(set_favourite, self.entry_id, is_checked, on_result=self.on_favourite_saved)
+
+    def on_favourite_saved(self, _result):
         if hasattr(self, 'refresh_callback') and callable(self.refresh_callback):
             self.refresh_callback()
 